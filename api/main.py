@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,12 +13,23 @@ from api.routes.agents import router as agents_router
 from api.routes.communications import router as communications_router
 from api.routes.demo import router as demo_router
 from api.routes.review_queue import router as review_router
+from api.services.agent_runtime import safe_json
 from api.services.config import get_settings
-from api.services.llm import llm_enabled
+from api.services.database import close_db_pool
+from api.services.llm import aclose_llm_client, llm_enabled
 from api.services.session_manager import session_manager
 
 settings = get_settings()
-app = FastAPI(title="RPMX Orchestration API", version="0.1.0")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    await aclose_llm_client()
+    await close_db_pool()
+
+
+app = FastAPI(title="RPMX Orchestration API", version="0.1.0", lifespan=lifespan)
 base_dir = Path(__file__).resolve().parents[1]
 
 app.add_middleware(
@@ -51,17 +64,17 @@ async def ws_agent_session(websocket: WebSocket, session_id: str) -> None:
         while True:
             state = await session_manager.get(session_id)
             if state is None:
-                await websocket.send_json(
-                    {
+                await websocket.send_text(
+                    safe_json({
                         "type": "error",
                         "payload": {"message": "Unknown session"},
                         "session_id": session_id,
-                    }
+                    })
                 )
                 break
 
             while sent_index < len(state.events):
-                await websocket.send_json(state.events[sent_index])
+                await websocket.send_text(safe_json(state.events[sent_index]))
                 sent_index += 1
 
             if state.done and sent_index >= len(state.events):
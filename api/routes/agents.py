@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import asyncio
-import json
 from datetime import datetime
 from typing import Any, Optional
 
+import orjson
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
@@ -204,6 +204,7 @@ async def financial_query(body: QueryRequest) -> QueryResponse:
 
     async def execute() -> None:
         conn = await connect_db()
+        emitter: Optional[EventEmitter] = None
         try:
             emitter = EventEmitter(conn, session.session_id, agent_id)
             await conn.execute(
@@ -214,6 +215,7 @@ async def financial_query(body: QueryRequest) -> QueryResponse:
 
             result = await run_financial_query(conn, emitter, body.message, conversation)
 
+            await emitter.flush()
             await conn.execute(
                 "UPDATE agent_status SET status = 'idle', current_activity = 'Ready', "
                 "last_run_at = ?, cost_today = cost_today + ? WHERE agent_id = ?",
@@ -257,6 +259,8 @@ async def financial_query(body: QueryRequest) -> QueryResponse:
             )
             await session_manager.mark_done(session.session_id, output={"error": str(exc)})
         finally:
+            if emitter is not None:
+                await emitter.aclose()
             await conn.close()
 
     asyncio.create_task(execute())
@@ -342,7 +346,9 @@ async def ask_agent(agent_id: str, body: AgentAskRequest) -> dict[str, Any]:
     output_summary = ""
     if latest_output:
         try:
-            output_summary = json.dumps(latest_output, indent=2, default=str)[:3000]
+            output_summary = orjson.dumps(
+                latest_output, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode()[:3000]
         except Exception:
             output_summary = str(latest_output)[:3000]
 
@@ -414,8 +420,8 @@ async def get_review_queue(agent_id: str) -> list[dict[str, Any]]:
             item = dict(row)
             if item.get("context"):
                 try:
-                    item["context"] = json.loads(item["context"])
-                except (json.JSONDecodeError, TypeError):
+                    item["context"] = orjson.loads(item["context"])
+                except (orjson.JSONDecodeError, TypeError):
                     item["context"] = None
             result.append(item)
         return result
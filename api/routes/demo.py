@@ -5,7 +5,10 @@ from pathlib import Path
 
 from fastapi import APIRouter, HTTPException
 
+from api.services.agent_runtime import clear_json_cache, clear_route_cache
+from api.services.database import close_db_pool
 from api.services.session_manager import session_manager
+from api.services.skills import clear_skills_cache
 
 router = APIRouter(prefix="/api/demo", tags=["demo"])
 
@@ -16,6 +19,8 @@ async def reset_demo() -> dict[str, str]:
     if not script.exists():
         raise HTTPException(status_code=500, detail="Reset script not found")
 
+    # Don't hold idle connections open while the script rebuilds the schema
+    await close_db_pool()
     proc = await asyncio.create_subprocess_exec(
         "python3",
         str(script),
@@ -28,6 +33,11 @@ async def reset_demo() -> dict[str, str]:
 
     # Clear in-memory session state so stale latest_output doesn't persist
     await session_manager.clear_all()
+    # The reset script rewrote the scenario JSON files, and routing decisions start over with them
+    clear_json_cache()
+    clear_route_cache()
+    # ...and restored every agent's skills.md from skills_original.md
+    clear_skills_cache()
 
     return {
         "status": "ok",
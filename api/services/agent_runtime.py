@@ -1,19 +1,51 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import hashlib
+import heapq
 import re
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, defaultdict
+from contextlib import asynccontextmanager, suppress
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import chain, cycle, pairwise
+from operator import itemgetter, mul
 from pathlib import Path
-from typing import Any, Callable, Optional
-from uuid import uuid4
-
+from types import MappingProxyType
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Coroutine,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+)
+from uuid import UUID, uuid4
+
+import httpx
+import orjson
 from pypdf import PdfReader
 
-from api.services.database import connect_db
-from api.services.llm import LLMResponse, llm_chat, llm_chat_with_usage, llm_enabled, try_parse_json_object
+from api.services.config import get_settings
+from api.services.database import pooled_db
+from api.services.llm import (
+    LLMResponse,
+    llm_chat,
+    llm_chat_stream_with_usage,
+    llm_chat_with_usage,
+    llm_enabled,
+    try_parse_json_object,
+)
 from api.services.session_manager import session_manager
 from api.services.skills import read_skills
 
@@ -25,7 +57,13 @@ def utc_now() -> str:
 
 
 def safe_json(payload: Any) -> str:
-    return json.dumps(payload, separators=(",", ":"), default=str)
+    """Compact JSON for event payloads and websocket frames; unknown types fall back to str()."""
+    return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def dumps_json(payload: Any) -> str:
+    """Serialize an LLM message payload with orjson (non-string keys allowed)."""
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode()
 
 
 def estimate_tokens(message: str, payload: Any) -> tuple[int, int, float]:
@@ -37,12 +75,19 @@ def estimate_tokens(message: str, payload: Any) -> tuple[int, int, float]:
     return input_tokens, output_tokens, cost
 
 
+async def emit_tick() -> None:
+    """Cosmetic pause between UI emits; off unless AGENT_EMIT_TICK_MS is set for demo pacing."""
+    tick_ms = get_settings().agent_emit_tick_ms
+    if tick_ms > 0:
+        await asyncio.sleep(tick_ms / 1000)
+
+
 # Pricing per token (Claude 3.7 Sonnet on OpenRouter)
 INPUT_TOKEN_PRICE = 0.000003
 OUTPUT_TOKEN_PRICE = 0.000015
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LLMResult:
     """Parsed JSON output from an LLM call plus accumulated token usage."""
     data: dict[str, Any]
@@ -88,7 +133,22 @@ async def update_agent_status(
     )
 
 
+# Activity-log rows queued within this window are written together in one executemany
+_ACTIVITY_FLUSH_WINDOW_SECONDS = 0.02
+
+_ACTIVITY_LOG_INSERT = """
+    INSERT INTO activity_logs (agent_id, session_id, event_type, message, cost, input_tokens, output_tokens, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 class EventEmitter:
+    """Streams agent events to the session immediately and logs them to activity_logs.
+
+    Activity-log rows are queued and written in the background in small batches; call
+    ``flush()`` before committing and ``aclose()`` when the run ends.
+    """
+
     def __init__(self, conn, session_id: str, agent_id: str) -> None:
         self.conn = conn
         self.session_id = session_id
@@ -97,19 +157,96 @@ class EventEmitter:
         self.total_raw_cost = 0.0
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        self._pending_rows: list[tuple[Any, ...]] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._writing = False
 
         from api.services.config import get_settings
         self._multiplier = get_settings().get_multiplier(agent_id)
 
-    async def emit(self, event_type: str, payload: dict[str, Any], *, message: str) -> None:
+    def _queue_rows(self, rows: Sequence[tuple[Any, ...]]) -> None:
+        self._pending_rows.extend(rows)
+        flusher = self._flusher
+        # A failed background write is kept (not replaced) so flush() can re-raise it
+        if flusher is None or (flusher.done() and flusher.exception() is None):
+            self._flusher = asyncio.create_task(self._flush_after_window())
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(_ACTIVITY_FLUSH_WINDOW_SECONDS)
+        await self._write_pending()
+
+    async def _write_pending(self) -> None:
+        rows = self._pending_rows
+        if not rows:
+            return
+        self._pending_rows = []
+        self._writing = True
+        try:
+            await self.conn.executemany(_ACTIVITY_LOG_INSERT, rows)
+        except BaseException:
+            # Put the rows back ahead of anything queued meanwhile; the error is re-raised by flush()
+            self._pending_rows[:0] = rows
+            raise
+        finally:
+            self._writing = False
+
+    async def flush(self) -> None:
+        """Write every queued activity-log row now (before a commit).
+
+        A background writer still waiting out its window is cancelled (its rows are still
+        queued); one already writing is awaited. Either way a failed background write is
+        re-raised here, so a lost insert fails the run as a direct insert would.
+        """
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            if not flusher.done() and not self._writing:
+                flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+            if not flusher.cancelled() and (error := flusher.exception()) is not None:
+                raise error
+        await self._write_pending()
+
+    async def aclose(self) -> None:
+        """Flush queued rows and stop the background writer; write errors are re-raised."""
+        await self.flush()
+
+    def _account(self, message: str, payload: dict[str, Any]) -> tuple[float, int, int]:
         input_tokens, output_tokens, cost = estimate_tokens(message, payload)
         projected = round(cost * self._multiplier, 6)
         self.total_raw_cost += cost
         self.total_cost += projected
         self.total_input_tokens += input_tokens
         self.total_output_tokens += output_tokens
+        return projected, input_tokens, output_tokens
+
+    async def emit(self, event_type: str, payload: dict[str, Any], *, message: str) -> None:
+        await self._persist(event_type, payload, message, *self._account(message, payload))
+
+    async def emit_batch(self, events: Sequence[tuple[str, dict[str, Any], str]]) -> None:
+        """Emit consecutive ``(event_type, payload, message)`` events, e.g. from
+        ``reasoning_event``/``tool_call_event``/``tool_result_event``, with one session append
+        and one activity-log insert. With demo pacing on they still stream one tick apart."""
+        if len(events) == 1:
+            event_type, payload, message = events[0]
+            await self.emit(event_type, payload, message=message)
+            return
+        accounted = [self._account(message, payload) for _, payload, message in events]
+        if get_settings().agent_emit_tick_ms > 0:
+            stream = []
+            for idx, (event_type, payload, _) in enumerate(events):
+                if idx:
+                    await emit_tick()
+                stream.append(self._event(event_type, payload))
+                await session_manager.append_event(self.session_id, stream[-1])
+        else:
+            stream = [self._event(event_type, payload) for event_type, payload, _ in events]
+            await session_manager.append_events(self.session_id, stream)
 
-        await self._persist(event_type, payload, message, projected, input_tokens, output_tokens)
+        self._queue_rows([
+            (self.agent_id, self.session_id, event["type"], message, cost, input_tokens, output_tokens,
+             event["timestamp"])
+            for event, (_, _, message), (cost, input_tokens, output_tokens) in zip(stream, events, accounted)
+        ])
 
     async def emit_llm(self, event_type: str, payload: dict[str, Any], *, message: str,
                        prompt_tokens: int, completion_tokens: int) -> None:
@@ -125,35 +262,46 @@ class EventEmitter:
 
         await self._persist(event_type, payload, message, projected, prompt_tokens, completion_tokens)
 
-    async def _persist(self, event_type: str, payload: dict[str, Any], message: str,
-                       cost: float, input_tokens: int, output_tokens: int) -> None:
-        event = {
+    def _event(self, event_type: str, payload: dict[str, Any]) -> dict[str, Any]:
+        return {
             "type": event_type,
             "payload": payload,
             "session_id": self.session_id,
             "timestamp": utc_now(),
         }
+
+    async def _persist(self, event_type: str, payload: dict[str, Any], message: str,
+                       cost: float, input_tokens: int, output_tokens: int) -> None:
+        event = self._event(event_type, payload)
         await session_manager.append_event(self.session_id, event)
 
-        await self.conn.execute(
-            """
-            INSERT INTO activity_logs (agent_id, session_id, event_type, message, cost, input_tokens, output_tokens, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                self.agent_id,
-                self.session_id,
-                event_type,
-                message,
-                cost,
-                input_tokens,
-                output_tokens,
-                event["timestamp"],
-            ),
-        )
+        self._queue_rows([(
+            self.agent_id,
+            self.session_id,
+            event_type,
+            message,
+            cost,
+            input_tokens,
+            output_tokens,
+            event["timestamp"],
+        )])
+
+    @staticmethod
+    def reasoning_event(text: str) -> tuple[str, dict[str, Any], str]:
+        return "reasoning", {"text": text}, text
+
+    @staticmethod
+    def tool_call_event(tool_name: str, args: dict[str, Any]) -> tuple[str, dict[str, Any], str]:
+        return "tool_call", {"tool": tool_name, "args": args}, f"Tool call: {tool_name}"
+
+    @staticmethod
+    def tool_result_event(
+        tool_name: str, result: dict[str, Any], summary: str
+    ) -> tuple[str, dict[str, Any], str]:
+        return "tool_result", {"tool": tool_name, "result": result, "summary": summary}, summary
 
     async def emit_reasoning(self, text: str) -> None:
-        await self.emit("reasoning", {"text": text}, message=text)
+        await self.emit_batch([self.reasoning_event(text)])
 
     async def emit_thinking(self, text: str) -> None:
         """Lightweight thinking event — streams to frontend only (no DB persist, no token cost)."""
@@ -166,14 +314,10 @@ class EventEmitter:
         await session_manager.append_event(self.session_id, event)
 
     async def emit_tool_call(self, tool_name: str, args: dict[str, Any]) -> None:
-        await self.emit("tool_call", {"tool": tool_name, "args": args}, message=f"Tool call: {tool_name}")
+        await self.emit_batch([self.tool_call_event(tool_name, args)])
 
     async def emit_tool_result(self, tool_name: str, result: dict[str, Any], summary: str) -> None:
-        await self.emit(
-            "tool_result",
-            {"tool": tool_name, "result": result, "summary": summary},
-            message=summary,
-        )
+        await self.emit_batch([self.tool_result_event(tool_name, result, summary)])
 
     async def emit_status_change(self, status: str, detail: str) -> None:
         await self.emit(
@@ -249,6 +393,39 @@ async def insert_internal_task(
     )
 
 
+async def insert_communications_many(conn, agent_id: str, rows: list[tuple[str, str, str]]) -> None:
+    """Bulk insert_communication for (recipient, subject, body) rows."""
+    if not rows:
+        return
+    created_at = utc_now()
+    await conn.executemany(
+        """
+        INSERT INTO communications (agent_id, recipient, subject, body, channel, created_at)
+        VALUES (?, ?, ?, ?, 'email', ?)
+        """,
+        [(agent_id, recipient, subject, body, created_at) for recipient, subject, body in rows],
+    )
+
+
+async def insert_internal_tasks_many(
+    conn,
+    agent_id: str,
+    rows: list[tuple[str, str, str, Optional[str]]],
+) -> None:
+    """Bulk insert_internal_task for (title, description, priority, due_date) rows."""
+    if not rows:
+        return
+    created_at = utc_now()
+    await conn.executemany(
+        """
+        INSERT INTO internal_tasks (agent_id, title, description, priority, due_date, status, created_at)
+        VALUES (?, ?, ?, ?, ?, 'open', ?)
+        """,
+        [(agent_id, title, description, priority, due_date, created_at)
+         for title, description, priority, due_date in rows],
+    )
+
+
 async def insert_collection_item(conn, customer_name: str, amount: float, reason: str) -> None:
     await conn.execute(
         """
@@ -259,9 +436,73 @@ async def insert_collection_item(conn, customer_name: str, amount: float, reason
     )
 
 
+async def insert_collection_items_many(conn, rows: list[tuple[str, float, str]]) -> None:
+    """Bulk insert_collection_item for (customer_name, amount, reason) rows."""
+    if not rows:
+        return
+    created_at = utc_now()
+    await conn.executemany(
+        """
+        INSERT INTO collections_queue (customer_name, amount, reason, created_at)
+        VALUES (?, ?, ?, ?)
+        """,
+        [(customer_name, amount, reason, created_at) for customer_name, amount, reason in rows],
+    )
+
+
+# Raw scenario file bytes keyed by name, tagged with the file's mtime so edits on disk
+# are picked up. Parsing still happens per call so every run gets its own mutable
+# objects; the demo reset rewrites the files and clears this.
+_JSON_CACHE: dict[str, tuple[int, bytes]] = {}
+
+
 async def load_json(name: str) -> dict[str, Any]:
     path = BASE_DIR / "data" / "json" / name
-    return json.loads(path.read_text())
+    mtime_ns = path.stat().st_mtime_ns
+    cached = _JSON_CACHE.get(name)
+    if cached is None or cached[0] != mtime_ns:
+        cached = _JSON_CACHE[name] = (mtime_ns, await asyncio.to_thread(path.read_bytes))
+    return orjson.loads(cached[1])
+
+
+def clear_json_cache() -> None:
+    _JSON_CACHE.clear()
+
+
+# Inquiry routing decisions (ROUTE_CACHE, off by default) keyed by (router skills digest,
+# sender, subject digest), least recently used first. Training rewrites skills.md, so a
+# retrained router never reuses decisions made under the old instructions; entries also
+# expire after the TTL.
+_ROUTE_CACHE: OrderedDict[tuple[str, str, str], tuple[float, dict[str, Any]]] = OrderedDict()
+_ROUTE_CACHE_MAXSIZE = 4096
+_ROUTE_CACHE_TTL_SECONDS = 3600.0
+
+
+def _route_cache_key(skills_digest: str, sender: Any, subject: Any) -> tuple[str, str, str]:
+    subject_digest = hashlib.blake2s(str(subject).strip().encode(), digest_size=8).hexdigest()
+    return skills_digest, str(sender).strip().lower(), subject_digest
+
+
+def _route_cache_get(key: tuple[str, str, str]) -> Optional[dict[str, Any]]:
+    entry = _ROUTE_CACHE.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del _ROUTE_CACHE[key]
+        return None
+    _ROUTE_CACHE.move_to_end(key)
+    return entry[1]
+
+
+def _route_cache_put(key: tuple[str, str, str], route: dict[str, Any]) -> None:
+    _ROUTE_CACHE[key] = (time.monotonic() + _ROUTE_CACHE_TTL_SECONDS, route)
+    _ROUTE_CACHE.move_to_end(key)
+    if len(_ROUTE_CACHE) > _ROUTE_CACHE_MAXSIZE:
+        _ROUTE_CACHE.popitem(last=False)
+
+
+def clear_route_cache() -> None:
+    _ROUTE_CACHE.clear()
 
 
 def parse_currency(value: str) -> float:
@@ -278,6 +519,13 @@ async def fetchone(conn, query: str, params: tuple[Any, ...] = ()) -> Optional[A
     return await cursor.fetchone()
 
 
+# Invoice PDF header fields, compiled once at import
+_INVOICE_NUMBER_RE = re.compile(r"Invoice #:?\s*(INV-[A-Z0-9-]+)")
+_INVOICE_DATE_RE = re.compile(r"Date:?\s*(\d{4}-\d{2}-\d{2})")
+_INVOICE_PO_RE = re.compile(r"PO Ref:?\s*(PO-\d{4}-\d{4})")
+_INVOICE_TOTAL_RE = re.compile(r"Total:?\s*\$([\d,]+\.\d{2})")
+
+
 async def read_invoice_pdf(file_path: str) -> dict[str, Any]:
     path = BASE_DIR / file_path
     reader = PdfReader(path)
@@ -285,10 +533,10 @@ async def read_invoice_pdf(file_path: str) -> dict[str, Any]:
     lines = [line.strip() for line in text.splitlines() if line.strip()]
 
     vendor = lines[0] if lines else "Unknown Vendor"
-    invoice_match = re.search(r"Invoice #:?\s*(INV-[A-Z0-9-]+)", text)
-    date_match = re.search(r"Date:?\s*(\d{4}-\d{2}-\d{2})", text)
-    po_match = re.search(r"PO Ref:?\s*(PO-\d{4}-\d{4})", text)
-    total_match = re.search(r"Total:?\s*\$([\d,]+\.\d{2})", text)
+    invoice_match = _INVOICE_NUMBER_RE.search(text)
+    date_match = _INVOICE_DATE_RE.search(text)
+    po_match = _INVOICE_PO_RE.search(text)
+    total_match = _INVOICE_TOTAL_RE.search(text)
 
     return {
         "vendor": vendor,
@@ -319,29 +567,41 @@ async def search_purchase_orders(
         )
         return [dict(row) | {"confidence": 0.99} for row in rows]
 
+    if amount is None:
+        return []
+
+    # Only POs within a cent of the invoice amount come back from SQLite (indexed on amount);
+    # the exact tolerance is re-checked below
+    target_amount = float(amount)
     rows = await fetchall(
         conn,
         """
         SELECT p.po_number, p.amount, p.job_id, p.gl_code, v.name AS vendor
         FROM purchase_orders p
         JOIN vendors v ON p.vendor_id = v.id
+        WHERE p.amount BETWEEN ? AND ?
         ORDER BY p.po_number
         """,
+        (target_amount - 0.011, target_amount + 0.011),
     )
 
+    # One matcher for the whole scan; the cheap upper bounds reject most vendors before
+    # the full ratio() is computed
+    matcher = SequenceMatcher(None, (vendor or "").lower())
     scored: list[dict[str, Any]] = []
     for row in rows:
-        candidate = dict(row)
-        if amount is None or abs(float(candidate["amount"]) - float(amount)) > 0.01:
+        if abs(float(row["amount"]) - target_amount) > 0.01:
             continue
-        vendor_score = SequenceMatcher(None, (vendor or "").lower(), candidate["vendor"].lower()).ratio()
+        matcher.set_seq2(row["vendor"].lower())
+        if matcher.real_quick_ratio() < 0.68 or matcher.quick_ratio() < 0.68:
+            continue
+        vendor_score = matcher.ratio()
         if vendor_score < 0.68:
             continue
         confidence = round((vendor_score * 0.7) + 0.3, 3)
-        scored.append(candidate | {"confidence": confidence})
+        scored.append(dict(row) | {"confidence": confidence})
 
-    scored.sort(key=lambda row: row["confidence"], reverse=True)
-    return scored[:5]
+    return heapq.nlargest(5, scored, key=itemgetter("confidence"))
 
 
 async def get_project(conn, project_id: str) -> Optional[dict[str, Any]]:
@@ -412,6 +672,26 @@ async def model_training_rule_active(agent_id: str, skills_text: str) -> bool:
     raise RuntimeError(f"{agent_id}: model did not return boolean training_rule_active")
 
 
+# Validated llm_json_response results (orjson bytes) keyed by a digest of the full request,
+# least recently used first; only consulted when LLM_CACHE is enabled
+_LLM_RESPONSE_CACHE: OrderedDict[bytes, bytes] = OrderedDict()
+_LLM_RESPONSE_CACHE_MAXSIZE = 512
+
+
+def _validator_cache_tag(validator: Optional[Callable[[dict[str, Any]], list[str]]]) -> Optional[list[Any]]:
+    """Identity of ``validator`` for the response cache key, or None if it cannot be keyed.
+
+    Factory-made validators share one qualname, so they carry their factory arguments as
+    ``cache_params``; any other closure may capture different state and is never cached.
+    """
+    if validator is None:
+        return []
+    params = getattr(validator, "cache_params", None)
+    if params is None and getattr(validator, "__closure__", None):
+        return None
+    return [getattr(validator, "__module__", None), getattr(validator, "__qualname__", None), params]
+
+
 async def llm_json_response(
     *,
     agent_id: str,
@@ -421,8 +701,23 @@ async def llm_json_response(
     temperature: float = 0.1,
     validator: Optional[Callable[[dict[str, Any]], list[str]]] = None,
     model: Optional[str] = None,
+    cached_prefix: Optional[str] = None,
+    on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+    on_discard: Optional[Callable[[], None]] = None,
 ) -> LLMResult:
-    """Call the LLM to produce structured JSON. Returns LLMResult with accumulated real token usage."""
+    """Call the LLM to produce structured JSON. Returns LLMResult with accumulated real token usage.
+
+    ``cached_prefix`` carries long instructions that are byte-identical across calls; it is sent
+    as a separate system content block marked for provider prompt caching.
+
+    ``on_delta`` streams the first attempt's raw text as it arrives (for progress previews);
+    the assembled response is still parsed and validated as usual. ``on_discard`` is called if
+    that streamed text is abandoned (stream failure, unparseable output, or a speculative
+    attempt 2 winning), so a preview can drop what it has not shown yet.
+
+    With ``LLM_CACHE`` enabled, a request identical to an earlier successful one returns that
+    result again with zero token usage and no model call.
+    """
     if not llm_enabled():
         raise RuntimeError(
             "Real LLM mode is required. Set USE_REAL_LLM=true and OPENROUTER_API_KEY in .env."
@@ -432,9 +727,23 @@ async def llm_json_response(
     _acc_prompt = 0
     _acc_completion = 0
 
-    async def _tracked_chat(messages, *, temp=0.2, mtokens=max_tokens) -> str:
+    def discard_stream() -> None:
+        if on_discard is not None:
+            on_discard()
+
+    async def _tracked_chat(messages, *, temp=0.2, mtokens=max_tokens, stream=False) -> str:
         nonlocal _acc_prompt, _acc_completion
-        resp = await llm_chat_with_usage(messages, temperature=temp, max_tokens=mtokens, model=model)
+        resp = None
+        if stream and on_delta is not None:
+            try:
+                resp = await llm_chat_stream_with_usage(
+                    messages, temperature=temp, max_tokens=mtokens, model=model, on_delta=on_delta
+                )
+            except (RuntimeError, httpx.HTTPError, ValueError):
+                resp = None  # fall back to the retried non-streaming request
+                discard_stream()
+        if resp is None:
+            resp = await llm_chat_with_usage(messages, temperature=temp, max_tokens=mtokens, model=model)
         _acc_prompt += resp.prompt_tokens
         _acc_completion += resp.completion_tokens
         return resp.text
@@ -445,12 +754,42 @@ async def llm_json_response(
         "Return strict JSON only, no markdown, no commentary. "
         "Use the provided skills and objective to decide the output."
     )
-    user_payload = {
+    def system_message(text: str) -> dict[str, Any]:
+        if not cached_prefix:
+            return {"role": "system", "content": text}
+        return {
+            "role": "system",
+            "content": [
+                {"type": "text", "text": text},
+                {"type": "text", "text": cached_prefix, "cache_control": {"type": "ephemeral"}},
+            ],
+        }
+
+    # Serialized once: the same user message is resent on every acquisition attempt.
+    user_content = dumps_json({
         "agent_id": agent_id,
         "objective": objective,
         "skills": skills,
         "context": context_payload,
-    }
+    })
+
+    cache_key: Optional[bytes] = None
+    validator_tag = _validator_cache_tag(validator) if get_settings().llm_cache else None
+    if validator_tag is not None:
+        cache_key = hashlib.sha256(
+            dumps_json([model, max_tokens, temperature, cached_prefix, validator_tag, system_prompt]).encode()
+            + user_content.encode()
+        ).digest()
+        if (cached := _LLM_RESPONSE_CACHE.get(cache_key)) is not None:
+            _LLM_RESPONSE_CACHE.move_to_end(cache_key)
+            return LLMResult(data=orjson.loads(cached))
+
+    def accepted(data: dict[str, Any]) -> LLMResult:
+        if cache_key is not None:
+            _LLM_RESPONSE_CACHE[cache_key] = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+            if len(_LLM_RESPONSE_CACHE) > _LLM_RESPONSE_CACHE_MAXSIZE:
+                _LLM_RESPONSE_CACHE.popitem(last=False)
+        return LLMResult(data=data, prompt_tokens=_acc_prompt, completion_tokens=_acc_completion)
 
     async def parse_candidate_text(initial_text: str) -> tuple[Optional[dict[str, Any]], str]:
         parsed = try_parse_json_object(initial_text)
@@ -473,18 +812,15 @@ async def llm_json_response(
             return repaired_parsed, repaired
         return None, repaired
 
-    last_text = ""
-    candidate: Optional[dict[str, Any]] = None
-
-    # JSON-shape acquisition loop.
-    for attempt in range(1, 4):
+    async def acquire(attempt: int) -> tuple[Optional[dict[str, Any]], str]:
         if attempt in {1, 2}:
             text = await _tracked_chat(
                 [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": json.dumps(user_payload)},
+                    system_message(system_prompt),
+                    {"role": "user", "content": user_content},
                 ],
                 temp=temperature if attempt == 1 else 0.0,
+                stream=attempt == 1,
             )
         else:
             strict_retry_prompt = (
@@ -493,12 +829,44 @@ async def llm_json_response(
             )
             text = await _tracked_chat(
                 [
-                    {"role": "system", "content": strict_retry_prompt},
-                    {"role": "user", "content": json.dumps(user_payload)},
+                    system_message(strict_retry_prompt),
+                    {"role": "user", "content": user_content},
                 ],
                 temp=0.0,
             )
         parsed, raw_text = await parse_candidate_text(text)
+        if attempt == 1 and parsed is None:
+            discard_stream()
+        return parsed, raw_text
+
+    async def acquire_tagged(attempt: int) -> tuple[int, tuple[Optional[dict[str, Any]], str]]:
+        return attempt, await acquire(attempt)
+
+    last_text = ""
+    candidate: Optional[dict[str, Any]] = None
+    attempts: tuple[int, ...] = (1, 2, 3)
+
+    if get_settings().speculative_llm:
+        # Attempts 1 and 2 race; the first valid JSON wins and the other is cancelled
+        # (its tokens are only billed if it already finished). Attempt 3 stays a fallback.
+        speculative = [asyncio.create_task(acquire_tagged(attempt)) for attempt in (1, 2)]
+        try:
+            for next_done in asyncio.as_completed(speculative):
+                attempt, (parsed, last_text) = await next_done
+                if parsed is not None:
+                    candidate = parsed
+                    if attempt != 1:
+                        discard_stream()
+                    break
+        finally:
+            for task in speculative:
+                task.cancel()
+            await asyncio.gather(*speculative, return_exceptions=True)
+        attempts = () if candidate is not None else (3,)
+
+    # JSON-shape acquisition loop.
+    for attempt in attempts:
+        parsed, raw_text = await acquire(attempt)
         last_text = raw_text
         if parsed is not None:
             candidate = parsed
@@ -509,12 +877,12 @@ async def llm_json_response(
         raise RuntimeError(f"{agent_id}: model output was not valid JSON (preview: {preview})")
 
     if validator is None:
-        return LLMResult(data=candidate, prompt_tokens=_acc_prompt, completion_tokens=_acc_completion)
+        return accepted(candidate)
 
     # Schema/contract validation and model-repair loop.
     errors = validator(candidate)
     if not errors:
-        return LLMResult(data=candidate, prompt_tokens=_acc_prompt, completion_tokens=_acc_completion)
+        return accepted(candidate)
 
     current_candidate = candidate
     for _ in range(3):
@@ -526,14 +894,11 @@ async def llm_json_response(
         }
         repair_text = await _tracked_chat(
             [
-                {
-                    "role": "system",
-                    "content": (
-                        "Repair the JSON so it satisfies all validation errors. "
-                        "Return a single strict JSON object only."
-                    ),
-                },
-                {"role": "user", "content": json.dumps(repair_objective)},
+                system_message(
+                    "Repair the JSON so it satisfies all validation errors. "
+                    "Return a single strict JSON object only."
+                ),
+                {"role": "user", "content": dumps_json(repair_objective)},
             ],
             temp=0.0,
         )
@@ -543,7 +908,7 @@ async def llm_json_response(
             continue
         errors = validator(repaired)
         if not errors:
-            return LLMResult(data=repaired, prompt_tokens=_acc_prompt, completion_tokens=_acc_completion)
+            return accepted(repaired)
         current_candidate = repaired
 
     preview = last_text[:180].replace("\n", " ")
@@ -556,6 +921,12 @@ def _is_non_empty_string(value: Any) -> bool:
     return isinstance(value, str) and bool(value.strip())
 
 
+def _missing_string_fields(row: dict[str, Any], fields: tuple[str, ...]) -> list[str]:
+    """Names from ``fields`` whose value in ``row`` is not a non-empty string, in field order."""
+    get = row.get
+    return [field for field in fields if not _is_non_empty_string(get(field))]
+
+
 def _is_number(value: Any) -> bool:
     return isinstance(value, (int, float))
 
@@ -570,7 +941,16 @@ def make_po_step_validator(
     allowed_actions: list[str],
     available_po_numbers: set[str],
 ) -> Callable[[dict[str, Any]], list[str]]:
-    allowed = set(allowed_actions)
+    # PO steps repeat the same few action/PO combinations, so validators are reused
+    return _po_step_validator(frozenset(allowed_actions), frozenset(available_po_numbers))
+
+
+@lru_cache(maxsize=128)
+def _po_step_validator(
+    allowed: frozenset[str],
+    available_po_numbers: frozenset[str],
+) -> Callable[[dict[str, Any]], list[str]]:
+    action_error = f"action must be one of: {', '.join(sorted(allowed))}"
 
     def validate(payload: dict[str, Any]) -> list[str]:
         errors: list[str] = []
@@ -579,7 +959,7 @@ def make_po_step_validator(
         args = payload.get("args")
 
         if action not in allowed:
-            errors.append(f"action must be one of: {', '.join(sorted(allowed))}")
+            errors.append(action_error)
             return errors
         if not _is_non_empty_string(reason):
             errors.append("reason is required")
@@ -627,6 +1007,7 @@ def make_po_step_validator(
 
         return errors
 
+    validate.cache_params = [sorted(allowed), sorted(available_po_numbers)]
     return validate
 
 
@@ -705,9 +1086,15 @@ def validate_financial_query_report(payload: dict[str, Any]) -> list[str]:
     return errors
 
 
+# Field specs for the row validators, built once at import
+_VENDOR_FINDING_FIELDS = ("vendor", "issue", "reason")
+_VENDOR_ACTION_TYPES = frozenset({"renewal_email", "urgent_hold_task", "w9_email", "contract_task"})
+_PROGRESS_FINDING_FIELDS = ("project_id", "project_name", "finding", "executive_summary", "root_cause_analysis")
+_MAINTENANCE_ISSUE_FIELDS = ("unit", "issue", "action", "severity")
+
+
 def validate_vendor_compliance_findings(payload: dict[str, Any]) -> list[str]:
     errors: list[str] = []
-    allowed_action_types = {"renewal_email", "urgent_hold_task", "w9_email", "contract_task"}
     findings = payload.get("findings")
     if not isinstance(findings, list):
         return ["findings must be an array"]
@@ -715,14 +1102,11 @@ def validate_vendor_compliance_findings(payload: dict[str, Any]) -> list[str]:
         if not isinstance(row, dict):
             errors.append(f"findings[{idx}] must be object")
             continue
-        if not _is_non_empty_string(row.get("vendor")):
-            errors.append(f"findings[{idx}].vendor is required")
-        if not _is_non_empty_string(row.get("issue")):
-            errors.append(f"findings[{idx}].issue is required")
-        if not _is_non_empty_string(row.get("reason")):
-            errors.append(f"findings[{idx}].reason is required")
+        errors.extend(
+            f"findings[{idx}].{field} is required" for field in _missing_string_fields(row, _VENDOR_FINDING_FIELDS)
+        )
         action_type = str(row.get("action_type", "")).strip()
-        if action_type not in allowed_action_types:
+        if action_type not in _VENDOR_ACTION_TYPES:
             errors.append(f"findings[{idx}].action_type invalid")
         if action_type in {"renewal_email", "w9_email"}:
             if not _is_non_empty_string(row.get("subject")):
@@ -799,16 +1183,9 @@ def validate_progress_report(payload: dict[str, Any]) -> list[str]:
         if not isinstance(row, dict):
             errors.append(f"findings[{idx}] must be object")
             continue
-        if not _is_non_empty_string(row.get("project_id")):
-            errors.append(f"findings[{idx}].project_id is required")
-        if not _is_non_empty_string(row.get("project_name")):
-            errors.append(f"findings[{idx}].project_name is required")
-        if not _is_non_empty_string(row.get("finding")):
-            errors.append(f"findings[{idx}].finding is required")
-        if not _is_non_empty_string(row.get("executive_summary")):
-            errors.append(f"findings[{idx}].executive_summary is required")
-        if not _is_non_empty_string(row.get("root_cause_analysis")):
-            errors.append(f"findings[{idx}].root_cause_analysis is required")
+        errors.extend(
+            f"findings[{idx}].{field} is required" for field in _missing_string_fields(row, _PROGRESS_FINDING_FIELDS)
+        )
         if not isinstance(row.get("create_task"), bool):
             errors.append(f"findings[{idx}].create_task must be boolean")
         if not _is_non_empty_string(row.get("status_color")):
@@ -827,14 +1204,9 @@ def validate_maintenance_issues(payload: dict[str, Any]) -> list[str]:
         if not isinstance(row, dict):
             errors.append(f"issues[{idx}] must be object")
             continue
-        if not _is_non_empty_string(row.get("unit")):
-            errors.append(f"issues[{idx}].unit is required")
-        if not _is_non_empty_string(row.get("issue")):
-            errors.append(f"issues[{idx}].issue is required")
-        if not _is_non_empty_string(row.get("action")):
-            errors.append(f"issues[{idx}].action is required")
-        if not _is_non_empty_string(row.get("severity")):
-            errors.append(f"issues[{idx}].severity is required")
+        errors.extend(
+            f"issues[{idx}].{field} is required" for field in _missing_string_fields(row, _MAINTENANCE_ISSUE_FIELDS)
+        )
         if not isinstance(row.get("create_task"), bool):
             errors.append(f"issues[{idx}].create_task must be boolean")
     return errors
@@ -993,14 +1365,12 @@ async def cost_estimate_price_category(
     agent_id: str,
     category: str,
     items: list[dict[str, Any]],
-    cost_db: dict[str, Any],
+    cost_rates: dict[str, Any],
     category_index: int,
     total_categories: int,
     model: Optional[str] = None,
 ) -> LLMResult:
-    """Ask the LLM to price one category of takeoff items against cost rates."""
-    category_costs = cost_db.get(category, {})
-
+    """Ask the LLM to price one category of takeoff items against its cost-database rates."""
     objective = (
         f"Price the '{category}' section of a construction takeoff (category {category_index} "
         f"of {total_categories}). For each item, use the rates from the cost database and calculate: "
@@ -1022,7 +1392,7 @@ async def cost_estimate_price_category(
         context_payload={
             "category": category,
             "items": items,
-            "cost_rates": category_costs,
+            "cost_rates": cost_rates,
         },
         max_tokens=1500,
         temperature=0.1,
@@ -1031,6 +1401,103 @@ async def cost_estimate_price_category(
     )
 
 
+def _split_tokens(total: int, parts: int) -> list[int]:
+    """Split a combined call's token count into ``parts`` near-equal shares that sum to ``total``."""
+    share, remainder = divmod(total, parts)
+    return [share + 1 if idx < remainder else share for idx in range(parts)]
+
+
+@lru_cache(maxsize=16)
+def _make_category_batch_validator(categories: tuple[str, ...]) -> Callable[[dict[str, Any]], list[str]]:
+    def validator(payload: dict[str, Any]) -> list[str]:
+        results = payload.get("categories")
+        if not isinstance(results, list) or len(results) != len(categories):
+            return [f"categories must be an array of exactly {len(categories)} category results"]
+        errors: list[str] = []
+        for idx, (expected, result) in enumerate(zip(categories, results)):
+            if not isinstance(result, dict):
+                errors.append(f"categories[{idx}] must be an object")
+                continue
+            errors.extend(f"categories[{idx}]: {err}" for err in validate_cost_category(result))
+            if _is_non_empty_string(result.get("category")) and result["category"] != expected:
+                errors.append(f"categories[{idx}].category must be '{expected}'")
+        return errors
+
+    validator.cache_params = list(categories)
+    return validator
+
+
+async def cost_estimate_price_categories(
+    *,
+    agent_id: str,
+    batch: list[tuple[str, list[dict[str, Any]], dict[str, Any]]],
+    first_index: int,
+    total_categories: int,
+    model: Optional[str] = None,
+) -> list[LLMResult]:
+    """Price consecutive takeoff categories, in one LLM call when there are several.
+
+    ``batch`` holds (category, items, cost_rates); token usage for a combined call is
+    split evenly across the categories' results.
+    """
+    if len(batch) == 1:
+        category, items, cost_rates = batch[0]
+        return [await cost_estimate_price_category(
+            agent_id=agent_id,
+            category=category,
+            items=items,
+            cost_rates=cost_rates,
+            category_index=first_index,
+            total_categories=total_categories,
+            model=model,
+        )]
+    names = tuple(category for category, _, _ in batch)
+    objective = (
+        f"Price {len(batch)} sections of a construction takeoff (categories {first_index}-"
+        f"{first_index + len(batch) - 1} of {total_categories}: {', '.join(names)}). "
+        f"Price each section on its own items and rates. For each item, use the rates from the "
+        f"cost database and calculate: "
+        f"labor_cost = quantity × labor_rate, "
+        f"material_cost = quantity × material_rate, "
+        f"equipment_cost = quantity × equipment_rate, "
+        f"subtotal = labor_cost + material_cost + equipment_cost. "
+        f"Return JSON with key categories: an array of exactly {len(batch)} objects, one per entry "
+        f"of `categories` in the same order, each with keys: "
+        f"category (the section name), "
+        f"line_items (array of objects with: item, quantity, unit, labor_cost, material_cost, "
+        f"equipment_cost, subtotal), "
+        f"category_subtotal (sum of all subtotals), "
+        f"category_notes (1-2 sentences about key cost considerations for this scope category)."
+    )
+
+    _llm = await llm_json_response(
+        agent_id=agent_id,
+        objective=objective,
+        context_payload={
+            "categories": {
+                category: {"items": items, "cost_rates": cost_rates}
+                for category, items, cost_rates in batch
+            },
+        },
+        max_tokens=1500 * len(batch),
+        temperature=0.1,
+        validator=_make_category_batch_validator(names),
+        model=model,
+    )
+    prompt_shares = _split_tokens(_llm.prompt_tokens, len(batch))
+    completion_shares = _split_tokens(_llm.completion_tokens, len(batch))
+    return [
+        LLMResult(data=result, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        for result, prompt_tokens, completion_tokens in zip(
+            _llm.data["categories"], prompt_shares, completion_shares
+        )
+    ]
+
+
+# Fields every routed inquiry must carry as non-empty strings
+_INQUIRY_ROUTE_FIELDS = ("from", "subject", "route", "priority", "description")
+
+
 def validate_inquiry_routes(payload: dict[str, Any]) -> list[str]:
     errors: list[str] = []
     routes = payload.get("routes")
@@ -1040,9 +1507,9 @@ def validate_inquiry_routes(payload: dict[str, Any]) -> list[str]:
         if not isinstance(route, dict):
             errors.append(f"routes[{idx}] must be object")
             continue
-        for field in ["from", "subject", "route", "priority", "description"]:
-            if not _is_non_empty_string(route.get(field)):
-                errors.append(f"routes[{idx}].{field} is required")
+        errors.extend(
+            f"routes[{idx}].{field} is required" for field in _missing_string_fields(route, _INQUIRY_ROUTE_FIELDS)
+        )
     return errors
 
 
@@ -1207,6 +1674,8 @@ async def run_po_match(conn, emitter: EventEmitter) -> dict[str, Any]:
 
     invoices = [dict(row) for row in rows]
     processed: list[dict[str, Any]] = []
+    matched_count = 0
+    exception_count = 0
 
     for index, invoice in enumerate(invoices, start=1):
         await emitter.emit_reasoning(
@@ -1333,7 +1802,7 @@ async def run_po_match(conn, emitter: EventEmitter) -> dict[str, Any]:
                 continue
 
             if action == "post_to_vista":
-                await asyncio.sleep(0.35)
+                await emit_tick()
                 state["posted_to_vista"] = True
                 await emitter.emit_tool_result(
                     "post_to_vista",
@@ -1433,6 +1902,7 @@ async def run_po_match(conn, emitter: EventEmitter) -> dict[str, Any]:
                         variance_pct = round((variance_amount / float(selected_po["amount"])) * 100, 1)
 
                 if final_status == "matched":
+                    matched_count += 1
                     processed.append(
                         {
                             "invoice_number": invoice["invoice_number"],
@@ -1445,6 +1915,7 @@ async def run_po_match(conn, emitter: EventEmitter) -> dict[str, Any]:
                         }
                     )
                 else:
+                    exception_count += 1
                     output_row = {
                         "invoice_number": invoice["invoice_number"],
                         "status": "exception",
@@ -1463,7 +1934,7 @@ async def run_po_match(conn, emitter: EventEmitter) -> dict[str, Any]:
                     {"invoice_id": invoice["invoice_number"], "status": final_status, "summary": summary},
                     f"Completed processing for {invoice['invoice_number']} as {final_status}.",
                 )
-                await asyncio.sleep(0.12)
+                await emit_tick()
                 break
 
             raise RuntimeError(f"po_match: unsupported action '{action}'")
@@ -1473,8 +1944,8 @@ async def run_po_match(conn, emitter: EventEmitter) -> dict[str, Any]:
     summary_subject = "PO Match Daily Summary"
     summary_body = (
         f"Processed {len(processed)} invoice(s): "
-        f"{sum(1 for item in processed if item['status'] == 'matched')} matched, "
-        f"{sum(1 for item in processed if item['status'] == 'exception')} exception(s)."
+        f"{matched_count} matched, "
+        f"{exception_count} exception(s)."
     )
     await insert_communication(conn, agent_id, "apmanager@rpmx.com", summary_subject, summary_body)
     await emitter.emit_communication("apmanager@rpmx.com", summary_subject, summary_body)
@@ -1483,8 +1954,8 @@ async def run_po_match(conn, emitter: EventEmitter) -> dict[str, Any]:
         "processed": processed,
         "queue_progress": {
             "total": len(processed),
-            "matched": sum(1 for row in processed if row["status"] == "matched"),
-            "exceptions": sum(1 for row in processed if row["status"] == "exception"),
+            "matched": matched_count,
+            "exceptions": exception_count,
         },
         "training_rule_active": send_pm_variance_notifications,
     }
@@ -1539,179 +2010,189 @@ async def run_ar_followup(conn, emitter: EventEmitter) -> dict[str, Any]:
         "SELECT customer_name, days_out, amount, is_retainage, notes FROM ar_aging ORDER BY days_out DESC",
     )
     accounts = [dict(row) for row in rows]
+    total_accounts = len(accounts)
 
     await emitter.emit_status_change("working", "AR Follow-Up Agent started aging review")
     await update_agent_status(conn, agent_id, status="working", current_activity="Reviewing AR aging accounts")
 
     await emitter.emit_reasoning(
-        f"Loading AR aging data. Found {len(accounts)} accounts to review, "
+        f"Loading AR aging data. Found {total_accounts} accounts to review, "
         f"ranging from {min(a['days_out'] for a in accounts)} to {max(a['days_out'] for a in accounts)} days outstanding."
     )
 
     total_outstanding = sum(float(a["amount"]) for a in accounts)
-    await emitter.emit_tool_call("scan_ar_aging", {"accounts": len(accounts), "total_outstanding": round(total_outstanding, 2)})
+    await emitter.emit_tool_call("scan_ar_aging", {"accounts": total_accounts, "total_outstanding": round(total_outstanding, 2)})
     await emitter.emit_tool_result(
         "scan_ar_aging",
-        {"accounts": len(accounts), "total_outstanding": round(total_outstanding, 2)},
-        f"Loaded {len(accounts)} accounts totaling ${total_outstanding:,.2f} outstanding.",
+        {"accounts": total_accounts, "total_outstanding": round(total_outstanding, 2)},
+        f"Loaded {total_accounts} accounts totaling ${total_outstanding:,.2f} outstanding.",
     )
 
     results: list[dict[str, Any]] = []
     emails_sent = 0
     escalated = 0
     skipped = 0
+    # Aging summary for the frontend, accumulated alongside the account loop
+    buckets = {"current": 0, "30_60": 0, "61_90": 0, "over_90": 0}
+    bucket_amounts = {"current": 0.0, "30_60": 0.0, "61_90": 0.0, "over_90": 0.0}
+    # Side-effect rows are written in one executemany per table once the account loop ends
+    pending_comms: list[tuple[str, str, str]] = []
+    pending_collections: list[tuple[str, float, str]] = []
+    pending_tasks: list[tuple[str, str, str, Optional[str]]] = []
 
-    for idx, account in enumerate(accounts, start=1):
-        customer = account["customer_name"]
-        days_out = int(account["days_out"])
-        amount = float(account["amount"])
-        is_retainage = bool(account.get("is_retainage"))
-
-        await update_agent_status(
-            conn, agent_id, status="working",
-            current_activity=f"Reviewing {customer} ({idx}/{len(accounts)})",
-        )
-
-        # ── Step 1: Emit reasoning about this account ──
-        retainage_note = " (Retainage balance)" if is_retainage else ""
-        await emitter.emit_reasoning(
-            f"Reviewing account {idx} of {len(accounts)}: {customer} — "
-            f"${amount:,.2f} outstanding, {days_out} days.{retainage_note}"
-        )
+    try:
+        for idx, account in enumerate(accounts, start=1):
+            customer = account["customer_name"]
+            days_out = int(account["days_out"])
+            amount = float(account["amount"])
+            is_retainage = bool(account.get("is_retainage"))
+
+            if days_out <= 30:
+                bucket = "current"
+            elif days_out <= 60:
+                bucket = "30_60"
+            elif days_out <= 90:
+                bucket = "61_90"
+            else:
+                bucket = "over_90"
+            buckets[bucket] += 1
+            bucket_amounts[bucket] += amount
 
-        # ── Step 2: Load account details ──
-        await emitter.emit_tool_call("review_account", {
-            "customer": customer,
-            "days_out": days_out,
-            "amount": amount,
-            "is_retainage": is_retainage,
-            "notes": account.get("notes", ""),
-        })
-        await emitter.emit_tool_result(
-            "review_account",
-            {"customer": customer, "days_out": days_out, "amount": amount},
-            f"Loaded account details for {customer}.",
-        )
+            await update_agent_status(
+                conn, agent_id, status="working",
+                current_activity=f"Reviewing {customer} ({idx}/{total_accounts})",
+            )
 
-        # ── Step 3: LLM decides action + composes email ──
-        _llm = await ar_choose_account_action(
-            agent_id=agent_id,
-            account=account,
-            account_index=idx,
-            total_accounts=len(accounts),
-        )
-        decision = _llm.data
-        await emitter.emit_llm(
-            "tool_result",
-            {"tool": "llm_analysis", "result": {}, "summary": f"Analyzed {customer}"},
-            message=f"LLM analysis for {customer}",
-            prompt_tokens=_llm.prompt_tokens,
-            completion_tokens=_llm.completion_tokens,
-        )
+            # ── Step 1: Emit reasoning about this account ──
+            retainage_note = " (Retainage balance)" if is_retainage else ""
+            await emitter.emit_reasoning(
+                f"Reviewing account {idx} of {total_accounts}: {customer} — "
+                f"${amount:,.2f} outstanding, {days_out} days.{retainage_note}"
+            )
 
-        action = str(decision.get("action", "")).strip()
-        reason = str(decision.get("reason", "")).strip() or "Model-selected AR action."
+            # ── Step 2: Load account details ──
+            await emitter.emit_tool_call("review_account", {
+                "customer": customer,
+                "days_out": days_out,
+                "amount": amount,
+                "is_retainage": is_retainage,
+                "notes": account.get("notes", ""),
+            })
+            await emitter.emit_tool_result(
+                "review_account",
+                {"customer": customer, "days_out": days_out, "amount": amount},
+                f"Loaded account details for {customer}.",
+            )
 
-        if action not in AR_ALLOWED_ACTIONS:
-            raise RuntimeError(f"ar_followup: invalid action '{action}' for {customer}")
+            # ── Step 3: LLM decides action + composes email ──
+            _llm = await ar_choose_account_action(
+                agent_id=agent_id,
+                account=account,
+                account_index=idx,
+                total_accounts=total_accounts,
+            )
+            decision = _llm.data
+            await emitter.emit_llm(
+                "tool_result",
+                {"tool": "llm_analysis", "result": {}, "summary": f"Analyzed {customer}"},
+                message=f"LLM analysis for {customer}",
+                prompt_tokens=_llm.prompt_tokens,
+                completion_tokens=_llm.completion_tokens,
+            )
 
-        # ── Step 4: Emit the determination ──
-        await emitter.emit_tool_call("determine_action", {
-            "customer": customer,
-            "days_out": days_out,
-            "amount": amount,
-            "action": action,
-        })
-        await emitter.emit_tool_result(
-            "determine_action",
-            {"customer": customer, "action": action, "reason": reason},
-            f"Action for {customer}: {action.replace('_', ' ')}.",
-        )
+            action = str(decision.get("action", "")).strip()
+            reason = str(decision.get("reason", "")).strip() or "Model-selected AR action."
 
-        # ── Step 5: Execute the action ──
-        recipient = (
-            str(decision.get("recipient", "")).strip()
-            or f"billing@{customer.lower().replace(' ', '')}.com"
-        )
-        subject = str(decision.get("email_subject", "")).strip()
-        body = str(decision.get("email_body", "")).strip()
-
-        if action in {"polite_reminder", "firm_email_plus_internal_task", "escalated_to_collections"}:
-            if subject and body:
-                await emitter.emit_tool_call("compose_email", {
-                    "recipient": recipient,
-                    "subject": subject,
-                })
-                await insert_communication(conn, agent_id, recipient, subject, body)
-                await emitter.emit_communication(recipient, subject, body)
-                emails_sent += 1
+            if action not in AR_ALLOWED_ACTIONS:
+                raise RuntimeError(f"ar_followup: invalid action '{action}' for {customer}")
 
-        if action == "escalated_to_collections":
-            await emitter.emit_tool_call("escalate_to_collections", {
+            # ── Step 4: Emit the determination ──
+            await emitter.emit_tool_call("determine_action", {
                 "customer": customer,
+                "days_out": days_out,
                 "amount": amount,
+                "action": action,
             })
-            await insert_collection_item(conn, customer, amount, reason)
-            await emitter.emit_tool_result(
-                "escalate_to_collections",
-                {"customer": customer, "amount": amount, "reason": reason},
-                f"Escalated {customer} (${amount:,.2f}) to collections queue.",
-            )
-            escalated += 1
-
-        if action == "firm_email_plus_internal_task":
-            title = f"AR follow-up call: {customer}"
-            description = f"Follow up by phone on ${amount:,.2f} outstanding ({days_out} days). {reason}"
-            await emitter.emit_tool_call("create_internal_task", {
-                "title": title,
-                "priority": "high",
-            })
-            await insert_internal_task(
-                conn, agent_id, title, description, "high",
-                (datetime.utcnow() + timedelta(days=2)).date().isoformat(),
-            )
             await emitter.emit_tool_result(
-                "create_internal_task",
-                {"title": title, "priority": "high"},
-                f"Created internal follow-up task for {customer}.",
+                "determine_action",
+                {"customer": customer, "action": action, "reason": reason},
+                f"Action for {customer}: {action.replace('_', ' ')}.",
             )
 
-        if action in {"skip_retainage", "no_action_within_terms"}:
-            skipped += 1
+            # ── Step 5: Execute the action ──
+            recipient = (
+                str(decision.get("recipient", "")).strip()
+                or f"billing@{customer.lower().replace(' ', '')}.com"
+            )
+            subject = str(decision.get("email_subject", "")).strip()
+            body = str(decision.get("email_body", "")).strip()
+
+            if action in {"polite_reminder", "firm_email_plus_internal_task", "escalated_to_collections"}:
+                if subject and body:
+                    await emitter.emit_tool_call("compose_email", {
+                        "recipient": recipient,
+                        "subject": subject,
+                    })
+                    pending_comms.append((recipient, subject, body))
+                    await emitter.emit_communication(recipient, subject, body)
+                    emails_sent += 1
+
+            if action == "escalated_to_collections":
+                await emitter.emit_tool_call("escalate_to_collections", {
+                    "customer": customer,
+                    "amount": amount,
+                })
+                pending_collections.append((customer, amount, reason))
+                await emitter.emit_tool_result(
+                    "escalate_to_collections",
+                    {"customer": customer, "amount": amount, "reason": reason},
+                    f"Escalated {customer} (${amount:,.2f}) to collections queue.",
+                )
+                escalated += 1
+
+            if action == "firm_email_plus_internal_task":
+                title = f"AR follow-up call: {customer}"
+                description = f"Follow up by phone on ${amount:,.2f} outstanding ({days_out} days). {reason}"
+                await emitter.emit_tool_call("create_internal_task", {
+                    "title": title,
+                    "priority": "high",
+                })
+                pending_tasks.append(
+                    (title, description, "high", (datetime.utcnow() + timedelta(days=2)).date().isoformat())
+                )
+                await emitter.emit_tool_result(
+                    "create_internal_task",
+                    {"title": title, "priority": "high"},
+                    f"Created internal follow-up task for {customer}.",
+                )
 
-        # ── Step 6: Mark account complete ──
-        await emitter.emit_tool_result(
-            "complete_account",
-            {"customer": customer, "action": action},
-            f"Completed review of {customer} — {action.replace('_', ' ')}.",
-        )
+            if action in {"skip_retainage", "no_action_within_terms"}:
+                skipped += 1
 
-        results.append({
-            "customer": customer,
-            "action": action,
-            "reason": reason,
-            "amount": amount,
-            "days_out": days_out,
-            "is_retainage": is_retainage,
-        })
+            # ── Step 6: Mark account complete ──
+            await emitter.emit_tool_result(
+                "complete_account",
+                {"customer": customer, "action": action},
+                f"Completed review of {customer} — {action.replace('_', ' ')}.",
+            )
 
-    # Build aging summary for the frontend
-    buckets = {"current": 0, "30_60": 0, "61_90": 0, "over_90": 0}
-    bucket_amounts = {"current": 0.0, "30_60": 0.0, "61_90": 0.0, "over_90": 0.0}
-    for a in accounts:
-        d = int(a["days_out"])
-        amt = float(a["amount"])
-        if d <= 30:
-            buckets["current"] += 1; bucket_amounts["current"] += amt
-        elif d <= 60:
-            buckets["30_60"] += 1; bucket_amounts["30_60"] += amt
-        elif d <= 90:
-            buckets["61_90"] += 1; bucket_amounts["61_90"] += amt
-        else:
-            buckets["over_90"] += 1; bucket_amounts["over_90"] += amt
+            results.append({
+                "customer": customer,
+                "action": action,
+                "reason": reason,
+                "amount": amount,
+                "days_out": days_out,
+                "is_retainage": is_retainage,
+            })
+    finally:
+        # Also on failure: the error path commits the activity log, so every email, escalation
+        # and task already reported for earlier accounts must be stored alongside it
+        await insert_communications_many(conn, agent_id, pending_comms)
+        await insert_collection_items_many(conn, pending_collections)
+        await insert_internal_tasks_many(conn, agent_id, pending_tasks)
 
     aging_summary = {
-        "total_accounts": len(accounts),
+        "total_accounts": total_accounts,
         "total_outstanding": round(total_outstanding, 2),
         "buckets": buckets,
         "bucket_amounts": {k: round(v, 2) for k, v in bucket_amounts.items()},
@@ -1721,7 +2202,7 @@ async def run_ar_followup(conn, emitter: EventEmitter) -> dict[str, Any]:
         "results": results,
         "aging_summary": aging_summary,
         "queue_progress": {
-            "total": len(accounts),
+            "total": total_accounts,
             "actions_taken": emails_sent + escalated,
             "emails_sent": emails_sent,
             "escalated": escalated,
@@ -1734,34 +2215,38 @@ async def run_financial_reporting(conn, emitter: EventEmitter) -> dict[str, Any]
     """Batch mode: Generate an Executive Dashboard report with sections."""
     payload = await load_json("financial_reporting.json")
     gl_records = payload.get("monthly_gl", [])
+    gl_index = _GLIndex(gl_records)
 
     await emitter.emit_reasoning(
         "Loading financial data for RPMX Construction Group ($850M annual revenue). "
         "Generating executive dashboard with KPIs, P&L summary, and division performance."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
-    divisions = list(DIVISION_NAMES.keys())
+    divisions = list(_DIVISION_KEYS)
     await emitter.emit_tool_call("load_financial_data", {"divisions": divisions})
-    await asyncio.sleep(0.2)
+    await emit_tick()
     await emitter.emit_tool_result(
         "load_financial_data",
         {"status": "loaded", "gl_records": len(gl_records)},
         f"Loaded {len(gl_records)} GL records across {len(divisions)} divisions.",
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     # Pre-compute data for the dashboard
-    q4_records = _filter_gl(gl_records, None, "2025-10", "2025-12")
-    company_pnl = _compute_pnl(q4_records)
-    q_trend = _quarterly_trend(gl_records, "gross_margin")
-    rev_trend = _quarterly_trend(gl_records, "revenue")
-
+    q4_ids = gl_index.select(None, "2025-10", "2025-12")
+    # One pass over the Q4 window feeds both the company P&L and the overhead ratio
+    q4_gl_totals = gl_index.sum_by_gl(q4_ids)
+    company_pnl = _pnl_from_gl_totals(q4_gl_totals)
+    trends = _quarterly_trend_multi(gl_records, ("gross_margin", "revenue"))
+    q_trend = trends["gross_margin"]
+    rev_trend = trends["revenue"]
+
+    q4_division_pnls = gl_index.pnl_by_division(q4_ids)
     div_performance = {}
-    for d in DIVISION_NAMES:
-        d_recs = _filter_gl(gl_records, d, "2025-10", "2025-12")
-        d_pnl = _compute_pnl(d_recs)
-        div_performance[DIVISION_NAMES[d]] = {
+    for d, d_name in _DIVISION_ITEMS:
+        d_pnl = q4_division_pnls.get(d) or _compute_pnl([])
+        div_performance[d_name] = {
             "revenue": d_pnl["revenue"],
             "gross_margin_pct": d_pnl["gross_margin_pct"],
             "net_margin_pct": d_pnl["net_margin_pct"],
@@ -1782,9 +2267,9 @@ async def run_financial_reporting(conn, emitter: EventEmitter) -> dict[str, Any]
             "q4_revenue": company_pnl["revenue"],
             "gross_margin_pct": company_pnl["gross_margin_pct"],
             "net_margin_pct": company_pnl["net_margin_pct"],
-            "overhead_ratio": _compute_overhead_ratio(q4_records),
+            "overhead_ratio": _overhead_ratio_from_gl_totals(q4_gl_totals),
             "dso": _compute_dso(ar, monthly_rev),
-            "total_backlog": sum(b["contracted_backlog"] for b in bl),
+            "total_backlog": sum(map(itemgetter("contracted_backlog"), bl)),
             "cash_balance": cf[-1]["ending_cash_balance"] if cf else 0,
         },
         "targets": targets,
@@ -1794,10 +2279,10 @@ async def run_financial_reporting(conn, emitter: EventEmitter) -> dict[str, Any]
         "Computing Q4 2025 P&L, division performance, margin trends, "
         "and key performance indicators."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     await emitter.emit_tool_call("generate_report", {"type": "executive_dashboard", "period": "Q4 2025"})
-    await asyncio.sleep(0.1)
+    await emit_tick()
 
     _llm = await llm_json_response(
         agent_id="financial_reporting",
@@ -1849,6 +2334,8 @@ DIVISION_SHORT = {
     "EX": "Excavation", "RC": "Roads", "SD": "Site Dev",
     "LM": "Landscape", "RW": "Walls",
 }
+_DIVISION_ITEMS = tuple(DIVISION_NAMES.items())
+_DIVISION_KEYS = tuple(DIVISION_NAMES.keys())
 GL_CATEGORIES = {
     "revenue": ["4100", "4200", "4300"],
     "cogs": ["5100", "5200", "5300", "5400", "5500", "5600", "5700", "5800"],
@@ -1863,68 +2350,202 @@ GL_DESCRIPTIONS: dict[str, str] = {
     "6400": "IT & Software", "6500": "Professional Fees", "6600": "Depreciation",
 }
 
+# Chart label → ar_aging_snapshot column
+_AR_AGING_BUCKETS = (
+    ("Current", "current"),
+    ("1-30 Days", "days_1_30"),
+    ("31-60 Days", "days_31_60"),
+    ("61-90 Days", "days_61_90"),
+    ("Over 90 Days", "days_over_90"),
+)
+
+# Per-category GL codes (and their P&L labels) resolved once for _compute_pnl
+_REVENUE_CODES = tuple(GL_CATEGORIES["revenue"])
+_COGS_LINES = tuple((c, GL_DESCRIPTIONS.get(c, c)) for c in GL_CATEGORIES["cogs"])
+_OPEX_LINES = tuple((c, GL_DESCRIPTIONS.get(c, c)) for c in GL_CATEGORIES["opex"])
+# Default expense-analysis code set (all costs)
+_COGS_OPEX_CODES = frozenset(GL_CATEGORIES["cogs"]) | frozenset(GL_CATEGORIES["opex"])
 
 # ── Deterministic computation helpers ──
 
 def _filter_gl(records: list[dict], division: str | None = None,
                period_start: str | None = None, period_end: str | None = None,
-               gl_codes: list[str] | None = None) -> list[dict]:
-    """Filter GL records by division, period range, and/or GL code list."""
-    out = records
-    if division and division != "all":
-        out = [r for r in out if r["division_id"] == division]
-    if period_start:
-        out = [r for r in out if r["period"] >= period_start]
-    if period_end:
-        out = [r for r in out if r["period"] <= period_end]
-    if gl_codes:
-        out = [r for r in out if r["gl_code"] in gl_codes]
-    return out
+               gl_codes: Collection[str] | None = None) -> list[dict]:
+    """Filter GL records by division, period range, and/or GL code list in a single pass."""
+    if division == "all":
+        division = None
+    codes = frozenset(gl_codes) if gl_codes else None
+    if not (division or period_start or period_end or codes):
+        return records
+    return [
+        r for r in records
+        if (not division or r["division_id"] == division)
+        and (not period_start or r["period"] >= period_start)
+        and (not period_end or r["period"] <= period_end)
+        and (codes is None or r["gl_code"] in codes)
+    ]
 
 
-def _sum_by_gl(records: list[dict]) -> dict[str, float]:
-    """Sum amounts grouped by GL code."""
+class _GLIndex:
+    """Columnar view plus inverted division / period / GL-code indices over GL records.
+
+    Built once per request. Filters intersect small index sets instead of
+    rescanning every record, and P&L sums run over the parallel amount and
+    GL-code columns rather than per-row dict lookups.
+    """
+
+    def __init__(self, records: list[dict]):
+        self.records = records
+        self.amounts = array("d")
+        self.gl_codes: list[str] = []
+        self.division_ids: list[str] = []
+        self.period_column: list[str] = []
+        self.by_division: dict[str, list[int]] = {}
+        self.by_period: dict[str, list[int]] = {}
+        self.by_gl: dict[str, list[int]] = {}
+        for i, r in enumerate(records):
+            division_id = sys.intern(r["division_id"])
+            gl_code = sys.intern(r["gl_code"])
+            self.amounts.append(r["amount"])
+            self.gl_codes.append(gl_code)
+            self.division_ids.append(division_id)
+            self.period_column.append(r["period"])
+            self.by_division.setdefault(division_id, []).append(i)
+            self.by_period.setdefault(r["period"], []).append(i)
+            self.by_gl.setdefault(gl_code, []).append(i)
+        self.periods = sorted(self.by_period)
+        # Ledger exports are chronological; when they are, a period window is one contiguous run
+        column = self.period_column
+        self.chronological = all(column[i] <= column[i + 1] for i in range(len(column) - 1))
+
+    def select(self, division: str | None = None,
+               period_start: str | None = None, period_end: str | None = None,
+               gl_codes: Collection[str] | None = None) -> Sequence[int]:
+        """Ascending record indices matching the _filter_gl criteria."""
+        if division == "all":
+            division = None
+        candidates: list[Sequence[int]] = []
+        if division:
+            candidates.append(self.by_division.get(division, []))
+        if period_start or period_end:
+            candidates.append(self._select_periods(period_start, period_end))
+        if gl_codes:
+            candidates.append([i for code in frozenset(gl_codes) for i in self.by_gl.get(code, [])])
+        if not candidates:
+            return range(len(self.records))
+        if len(candidates) == 1 and not gl_codes and (division or self.chronological):
+            # Division lists and chronological period runs are already ascending
+            return candidates[0]
+        candidates.sort(key=len)
+        ids = set(candidates[0])
+        for other in candidates[1:]:
+            ids.intersection_update(other)
+            if not ids:
+                return []
+        return sorted(ids)
+
+    def _select_periods(self, period_start: str | None, period_end: str | None) -> Sequence[int]:
+        if self.chronological:
+            column = self.period_column
+            lo = bisect_left(column, period_start) if period_start else 0
+            hi = bisect_right(column, period_end) if period_end else len(column)
+            return range(lo, max(lo, hi))
+        periods = self.periods
+        lo = bisect_left(periods, period_start) if period_start else 0
+        hi = bisect_right(periods, period_end) if period_end else len(periods)
+        return [i for p in periods[lo:hi] for i in self.by_period[p]]
+
+    def filter(self, division: str | None = None,
+               period_start: str | None = None, period_end: str | None = None,
+               gl_codes: Collection[str] | None = None) -> list[dict]:
+        """Same contract as _filter_gl, resolved through the indices."""
+        ids = self.select(division, period_start, period_end, gl_codes)
+        records = self.records
+        if isinstance(ids, range):
+            return records if len(ids) == len(records) else records[ids.start:ids.stop]
+        return [records[i] for i in ids]
+
+    def sum_by_gl(self, ids: Sequence[int]) -> dict[str, float]:
+        """Same result as _sum_by_gl over the selected records."""
+        totals: dict[str, float] = {}
+        get = totals.get
+        codes = self.gl_codes
+        amounts = self.amounts
+        for i in ids:
+            code = codes[i]
+            totals[code] = get(code, 0.0) + amounts[i]
+        return {k: round(v, 2) for k, v in totals.items()}
+
+    def pnl(self, ids: Sequence[int]) -> dict[str, Any]:
+        """Same result as _compute_pnl over the selected records."""
+        return _pnl_from_gl_totals(self.sum_by_gl(ids))
+
+    def pnl_by_division(self, ids: Sequence[int]) -> dict[str, dict[str, Any]]:
+        """P&L per division_id over the selected records, bucketed in one pass."""
+        groups: dict[str, list[int]] = {}
+        division_ids = self.division_ids
+        for i in ids:
+            groups.setdefault(division_ids[i], []).append(i)
+        return {d: self.pnl(group) for d, group in groups.items()}
+
+
+def _sum_by_key(records: list[dict], key: str) -> dict[str, float]:
+    """Sum amounts grouped by a record field (unrounded)."""
     totals: dict[str, float] = {}
+    get = totals.get
     for r in records:
-        totals[r["gl_code"]] = totals.get(r["gl_code"], 0.0) + r["amount"]
-    return {k: round(v, 2) for k, v in totals.items()}
+        k = r[key]
+        totals[k] = get(k, 0.0) + r["amount"]
+    return totals
+
+
+def _sum_by_gl(records: list[dict]) -> dict[str, float]:
+    """Sum amounts grouped by GL code."""
+    return {k: round(v, 2) for k, v in _sum_by_key(records, "gl_code").items()}
 
 
 def _sum_by_division(records: list[dict]) -> dict[str, float]:
     """Sum amounts grouped by division_id."""
-    totals: dict[str, float] = {}
-    for r in records:
-        totals[r["division_id"]] = totals.get(r["division_id"], 0.0) + r["amount"]
-    return {k: round(v, 2) for k, v in totals.items()}
+    return {k: round(v, 2) for k, v in _sum_by_key(records, "division_id").items()}
 
 
 def _sum_by_period(records: list[dict]) -> dict[str, float]:
     """Sum amounts grouped by period."""
-    totals: dict[str, float] = {}
-    for r in records:
-        totals[r["period"]] = totals.get(r["period"], 0.0) + r["amount"]
-    return {k: round(v, 2) for k, v in sorted(totals.items())}
+    return {k: round(v, 2) for k, v in sorted(_sum_by_key(records, "period").items())}
 
 
 def _compute_pnl(gl_records: list[dict]) -> dict[str, Any]:
     """Compute a full P&L structure from GL records."""
-    by_gl = _sum_by_gl(gl_records)
-    revenue = sum(by_gl.get(c, 0) for c in GL_CATEGORIES["revenue"])
-    cogs_items = {GL_DESCRIPTIONS.get(c, c): by_gl.get(c, 0) for c in GL_CATEGORIES["cogs"] if by_gl.get(c, 0) != 0}
+    return _pnl_from_gl_totals(_sum_by_gl(gl_records))
+
+
+def _pnl_from_gl_totals(by_gl: dict[str, float]) -> dict[str, Any]:
+    """Build the P&L structure from rounded per-GL-code totals."""
+    get = by_gl.get
+    revenue = sum(get(c, 0) for c in _REVENUE_CODES)
+    cogs_items: dict[str, float] = {}
+    for code, label in _COGS_LINES:
+        value = get(code, 0)
+        if value != 0:
+            cogs_items[label] = value
     cogs_total = sum(cogs_items.values())
     gross_profit = revenue - cogs_total
     gross_margin = round((gross_profit / revenue * 100) if revenue else 0, 1)
-    opex_items = {GL_DESCRIPTIONS.get(c, c): by_gl.get(c, 0) for c in GL_CATEGORIES["opex"] if by_gl.get(c, 0) != 0}
+    opex_items: dict[str, float] = {}
+    for code, label in _OPEX_LINES:
+        value = get(code, 0)
+        if value != 0:
+            opex_items[label] = value
     opex_total = sum(opex_items.values())
     net_income = gross_profit - opex_total
     net_margin = round((net_income / revenue * 100) if revenue else 0, 1)
     return {
         "revenue": round(revenue, 2),
-        "cogs_breakdown": {k: round(v, 2) for k, v in cogs_items.items()},
+        "cogs_breakdown": cogs_items,
         "cogs_total": round(cogs_total, 2),
         "gross_profit": round(gross_profit, 2),
         "gross_margin_pct": gross_margin,
-        "opex_breakdown": {k: round(v, 2) for k, v in opex_items.items()},
+        "opex_breakdown": opex_items,
         "opex_total": round(opex_total, 2),
         "net_income": round(net_income, 2),
         "net_margin_pct": net_margin,
@@ -1966,6 +2587,14 @@ def _resolve_period_range(period: str | None) -> tuple[str | None, str | None]:
     """Resolve period string to start/end range."""
     if not period:
         return None, None
+    if isinstance(period, str):
+        return _resolve_period_label(period)
+    # Periods straight from model output may be lists or dicts, which cannot key the memo
+    return _resolve_period_label.__wrapped__(period)
+
+
+@lru_cache(maxsize=64)
+def _resolve_period_label(period: str) -> tuple[str | None, str | None]:
     if "-Q" in period:
         return _period_range_for_quarter(period)
     if len(period) == 4:  # just year
@@ -1976,47 +2605,60 @@ def _resolve_period_range(period: str | None) -> tuple[str | None, str | None]:
 
 def _compute_dso(ar_snapshot: list[dict], monthly_rev: float) -> float:
     """Days Sales Outstanding = total AR / average daily revenue."""
-    total_ar = sum(a["total_outstanding"] for a in ar_snapshot)
+    total_ar = sum(map(itemgetter("total_outstanding"), ar_snapshot))
     daily_rev = monthly_rev / 30 if monthly_rev else 1
     return round(total_ar / daily_rev, 1)
 
 
-def _compute_overhead_ratio(gl_records: list[dict]) -> float:
-    """OpEx as % of revenue."""
-    by_gl = _sum_by_gl(gl_records)
-    revenue = sum(by_gl.get(c, 0) for c in GL_CATEGORIES["revenue"])
-    opex = sum(by_gl.get(c, 0) for c in GL_CATEGORIES["opex"])
+def _overhead_ratio_from_gl_totals(gl_totals: dict[str, float]) -> float:
+    """OpEx as % of revenue, from per-GL totals (e.g. _GLIndex.sum_by_gl)."""
+    get = gl_totals.get
+    revenue = sum(get(c, 0) for c in _REVENUE_CODES)
+    opex = sum(get(c, 0) for c, _ in _OPEX_LINES)
     return round((opex / revenue * 100) if revenue else 0, 1)
 
 
-def _quarterly_trend(gl_records: list[dict], metric: str = "gross_margin") -> list[dict]:
-    """Compute quarterly trend for a given metric across all available data."""
-    from collections import defaultdict
-    by_q: dict[str, list[dict]] = defaultdict(list)
+def _quarter_label(period: str) -> str:
+    """Convert '2025-11' → '2025-Q4'."""
+    return f"{period[:4]}-Q{(int(period[5:7]) - 1) // 3 + 1}"
+
+
+def _trend_value(pnl: dict[str, Any], metric: str) -> Any:
+    if metric == "gross_margin":
+        return pnl["gross_margin_pct"]
+    if metric == "net_margin":
+        return pnl["net_margin_pct"]
+    if metric == "revenue":
+        return pnl["revenue"]
+    if metric == "overhead":
+        return round((pnl["opex_total"] / pnl["revenue"] * 100) if pnl["revenue"] else 0, 1)
+    return pnl.get(metric, 0)
+
+
+def _quarterly_trend_multi(gl_records: list[dict], metrics: tuple[str, ...]) -> dict[str, list[dict]]:
+    """Compute several quarterly trends from one bucketing pass and one P&L per quarter."""
+    by_q: dict[str, list[dict]] = {}
+    labels: dict[str, str] = {}
     for r in gl_records:
-        y = r["period"][:4]
-        m = int(r["period"][5:7])
-        q = (m - 1) // 3 + 1
-        q_label = f"{y}-Q{q}"
-        by_q[q_label].append(r)
-
-    result = []
-    for q_label in sorted(by_q.keys()):
+        period = r["period"]
+        q_label = labels.get(period)
+        if q_label is None:
+            q_label = labels[period] = _quarter_label(period)
+        by_q.setdefault(q_label, []).append(r)
+
+    result: dict[str, list[dict]] = {metric: [] for metric in metrics}
+    for q_label in sorted(by_q):
         pnl = _compute_pnl(by_q[q_label])
-        if metric == "gross_margin":
-            result.append({"quarter": q_label, "value": pnl["gross_margin_pct"]})
-        elif metric == "net_margin":
-            result.append({"quarter": q_label, "value": pnl["net_margin_pct"]})
-        elif metric == "revenue":
-            result.append({"quarter": q_label, "value": pnl["revenue"]})
-        elif metric == "overhead":
-            oh = round((pnl["opex_total"] / pnl["revenue"] * 100) if pnl["revenue"] else 0, 1)
-            result.append({"quarter": q_label, "value": oh})
-        else:
-            result.append({"quarter": q_label, "value": pnl.get(metric, 0)})
+        for metric in metrics:
+            result[metric].append({"quarter": q_label, "value": _trend_value(pnl, metric)})
     return result
 
 
+def _quarterly_trend(gl_records: list[dict], metric: str = "gross_margin") -> list[dict]:
+    """Compute quarterly trend for a given metric across all available data."""
+    return _quarterly_trend_multi(gl_records, (metric,))[metric]
+
+
 def _build_simulated_sql(intent: str, division: str | None, period: str | None, gl_filter: str | None) -> str:
     """Create a realistic-looking SQL query for the code-block visualization."""
     div_name = DIVISION_NAMES.get(division, "All Divisions") if division and division != "all" else "All Divisions"
@@ -2078,18 +2720,360 @@ def _build_simulated_sql(intent: str, division: str | None, period: str | None,
     )
 
 
-async def run_financial_query(
-    conn,
-    emitter: EventEmitter,
-    user_message: str,
-    conversation: "ConversationContext",
-) -> dict[str, Any]:
-    """Chat-driven financial reporting: classify intent → compute data → generate sectioned report."""
-    from .session_manager import ConversationContext  # avoid circular at module-level
+@dataclass
+class _IntentContext:
+    """Classified query parameters plus the data shared by every intent handler."""
+
+    payload: dict[str, Any]
+    gl_index: _GLIndex
+    intent: str
+    division: str | None
+    p_start: str | None
+    p_end: str | None
+    compare_p_start: str | None
+    compare_p_end: str | None
+    gl_filter: str | None
+    gl_category: str | None
+    job_id: str | None
+    # Division/period slice (GL index positions) shared by most intents and reported as the row count
+    base_ids: Sequence[int]
+
+
+IntentHandler = Callable[[_IntentContext], Any]
+_INTENT_HANDLERS: dict[str, IntentHandler] = {}
+
+
+def _intent_handler(*intents: str) -> Callable[[IntentHandler], IntentHandler]:
+    """Register a Phase 2 data handler for one or more classified intents.
+
+    Plain functions run in a worker thread; coroutine functions are awaited on the loop.
+    """
+    def register(fn: IntentHandler) -> IntentHandler:
+        for intent in intents:
+            _INTENT_HANDLERS[intent] = fn
+        return fn
+    return register
+
+
+@_intent_handler("p_and_l", "custom_query")
+def _intent_p_and_l(ctx: _IntentContext) -> dict[str, Any]:
+    ids = ctx.base_ids
+    data: dict[str, Any] = {"pnl": ctx.gl_index.pnl(ids), "record_count": len(ids)}
+    # Add per-division breakdown for company-wide P&L
+    if not ctx.division or ctx.division == "all":
+        # One pass over the already-selected rows instead of a rescan per division
+        division_pnls = ctx.gl_index.pnl_by_division(ids)
+        div_pnls = {}
+        for d_code, d_name in _DIVISION_ITEMS:
+            d_pnl = division_pnls.get(d_code) or _compute_pnl([])
+            div_pnls[d_name] = {"revenue": d_pnl["revenue"], "gross_profit": d_pnl["gross_profit"],
+                                "gross_margin_pct": d_pnl["gross_margin_pct"], "net_income": d_pnl["net_income"]}
+        data["division_breakdown"] = div_pnls
+    return data
+
+
+@_intent_handler("comparison")
+def _intent_comparison(ctx: _IntentContext) -> dict[str, Any]:
+    p_start, p_end = ctx.p_start, ctx.p_end
+    current_pnl = ctx.gl_index.pnl(ctx.base_ids)
+    # Determine prior period from compare_p_start/compare_p_end, or default to prior year
+    cp_s = ctx.compare_p_start
+    cp_e = ctx.compare_p_end
+    if not cp_s and p_start:
+        try:
+            y = int(p_start[:4]) - 1
+            cp_s = f"{y}{p_start[4:]}"
+            cp_e = f"{y}{p_end[4:]}" if p_end else None
+        except Exception:
+            cp_s, cp_e = None, None
+    prior_pnl = ctx.gl_index.pnl(ctx.gl_index.select(ctx.division, cp_s, cp_e))
+    return {
+        "current_pnl": current_pnl,
+        "prior_pnl": prior_pnl,
+        "variance": _compute_variance(current_pnl, prior_pnl),
+        "current_period_label": f"{p_start} to {p_end}" if p_start else "current",
+        "prior_period_label": f"{cp_s} to {cp_e}" if cp_s else "prior year",
+    }
+
+
+@_intent_handler("expense_analysis")
+def _intent_expense_analysis(ctx: _IntentContext) -> dict[str, Any]:
+    if ctx.gl_filter:
+        gl_list = [ctx.gl_filter]
+    elif ctx.gl_category:
+        gl_list = GL_CATEGORIES.get(ctx.gl_category)
+    else:
+        gl_list = _COGS_OPEX_CODES
+    filtered = ctx.gl_index.filter(ctx.division, ctx.p_start, ctx.p_end, gl_list)
+    return {
+        "expense_by_gl": {GL_DESCRIPTIONS.get(k, k): v for k, v in _sum_by_gl(filtered).items()},
+        "expense_by_division": {DIVISION_NAMES.get(k, k): v for k, v in _sum_by_division(filtered).items()},
+        "total": round(sum(_sum_by_gl(filtered).values()), 2),
+        # Monthly trend for the filtered expense codes
+        "monthly_trend": _sum_by_period(filtered),
+    }
+
+
+@_intent_handler("job_costing")
+def _intent_job_costing(ctx: _IntentContext) -> dict[str, Any]:
+    jobs = ctx.payload.get("jobs", [])
+    if ctx.job_id:
+        jobs = [j for j in jobs if j["job_id"] == ctx.job_id]
+    elif ctx.division and ctx.division != "all":
+        jobs = [j for j in jobs if j["division_id"] == ctx.division]
+    return {"jobs": jobs}
+
+
+@_intent_handler("ar_analysis")
+def _intent_ar_analysis(ctx: _IntentContext) -> dict[str, Any]:
+    division = ctx.division
+    ar = ctx.payload.get("ar_aging_snapshot", [])
+    if division and division != "all":
+        ar = [a for a in ar if a["division_id"] == division]
+    # Total and aging buckets accumulated in one pass over the snapshot
+    total_ar = 0
+    aging = dict.fromkeys(map(itemgetter(0), _AR_AGING_BUCKETS), 0)
+    for a in ar:
+        total_ar += a["total_outstanding"]
+        for label, column in _AR_AGING_BUCKETS:
+            aging[label] += a.get(column, 0)
+    # Get last 3 months of revenue for DSO - use the most recent available
+    all_periods = ctx.gl_index.periods
+    recent_3 = all_periods[-3:] if len(all_periods) >= 3 else all_periods
+    dso_rev_start = recent_3[0] if recent_3 else "2025-10"
+    dso_rev_end = recent_3[-1] if recent_3 else "2025-12"
+    recent_rev = ctx.gl_index.filter(division, dso_rev_start, dso_rev_end, GL_CATEGORIES["revenue"])
+    monthly_rev = sum(map(itemgetter("amount"), recent_rev)) / len(recent_3) if recent_rev else 1
+    return {
+        "ar_accounts": ar,
+        "total_ar": total_ar,
+        "dso": _compute_dso(ar, monthly_rev),
+        # Aging summary for chart
+        "aging_summary": {label: round(total, 2) for label, total in aging.items()},
+    }
+
+
+@_intent_handler("backlog")
+def _intent_backlog(ctx: _IntentContext) -> dict[str, Any]:
+    bl = ctx.payload.get("backlog", [])
+    if ctx.division and ctx.division != "all":
+        bl = [b for b in bl if b["division_id"] == ctx.division]
+    # Map division IDs to names in backlog records
+    for b in bl:
+        b["division_name"] = DIVISION_NAMES.get(b.get("division_id", ""), b.get("division_id", ""))
+    return {
+        "backlog": bl,
+        "total_backlog": sum(map(itemgetter("contracted_backlog"), bl)),
+        "total_pipeline": sum(map(itemgetter("proposal_pipeline"), bl)),
+    }
+
+
+_period_of = itemgetter("period")
+
+
+@_intent_handler("cash_flow")
+def _intent_cash_flow(ctx: _IntentContext) -> dict[str, Any]:
+    p_start, p_end = ctx.p_start, ctx.p_end
+    cf = ctx.payload.get("cash_flow", [])
+    if p_start or p_end:
+        if all(a["period"] <= b["period"] for a, b in pairwise(cf)):
+            # Chronological rows (as exported; the last row is the current balance) bisect to one slice
+            lo = bisect_left(cf, p_start, key=_period_of) if p_start else 0
+            hi = bisect_right(cf, p_end, key=_period_of) if p_end else len(cf)
+            cf = cf[lo:hi]
+        else:
+            cf = [
+                c for c in cf
+                if (not p_start or c["period"] >= p_start) and (not p_end or c["period"] <= p_end)
+            ]
+    data: dict[str, Any] = {"cash_flow": cf}
+    if cf:
+        data["total_net_cash_flow"] = round(sum(map(itemgetter("net_cash_flow"), cf)), 2)
+        data["ending_balance"] = cf[-1]["ending_cash_balance"]
+        data["starting_balance"] = cf[0]["ending_cash_balance"] - cf[0]["net_cash_flow"]
+    return data
+
+
+@_intent_handler("margin_analysis")
+def _intent_margin_analysis(ctx: _IntentContext) -> dict[str, Any]:
+    gl_index = ctx.gl_index
+    trends = _quarterly_trend_multi(gl_index.records, ("gross_margin", "net_margin", "revenue"))
+    data: dict[str, Any] = {
+        "quarterly_gross_margin": trends["gross_margin"],
+        "quarterly_net_margin": trends["net_margin"],
+        "quarterly_revenue": trends["revenue"],
+    }
+    if ctx.division and ctx.division != "all":
+        data["division_gross_margin"] = _quarterly_trend(gl_index.filter(ctx.division), "gross_margin")
+    # Also per-division current
+    division_pnls = gl_index.pnl_by_division(gl_index.select(None, ctx.p_start, ctx.p_end))
+    div_margins = {}
+    for d, d_name in _DIVISION_ITEMS:
+        d_pnl = division_pnls.get(d) or _compute_pnl([])
+        div_margins[d_name] = {"gross_margin": d_pnl["gross_margin_pct"], "net_margin": d_pnl["net_margin_pct"],
+                               "revenue": d_pnl["revenue"]}
+    data["division_margins"] = div_margins
+    return data
+
+
+@_intent_handler("budget_variance")
+def _intent_budget_variance(ctx: _IntentContext) -> dict[str, Any]:
+    budget_records = ctx.payload.get("monthly_budget", [])
+    filtered_budget = _filter_gl(budget_records, ctx.division, ctx.p_start, ctx.p_end)
+    actual_by_gl = ctx.gl_index.sum_by_gl(ctx.base_ids)
+    budget_by_gl: defaultdict[str, float] = defaultdict(float)
+    for r in filtered_budget:
+        budget_by_gl[r["gl_code"]] += r.get("budget_amount", 0)
+    variance_lines = []
+    for gl in sorted(actual_by_gl.keys() | budget_by_gl.keys()):
+        act = actual_by_gl.get(gl, 0)
+        bud = budget_by_gl.get(gl, 0)
+        var_d = round(act - bud, 2)
+        var_p = round((var_d / bud * 100) if bud else 0, 1)
+        variance_lines.append({
+            "gl_code": gl,
+            "description": GL_DESCRIPTIONS.get(gl, gl),
+            "actual": round(act, 2),
+            "budget": round(bud, 2),
+            "variance": var_d,
+            "variance_pct": var_p,
+        })
+    return {
+        "budget_variance_lines": variance_lines,
+        "total_actual": round(sum(map(itemgetter("actual"), variance_lines)), 2),
+        "total_budget": round(sum(map(itemgetter("budget"), variance_lines)), 2),
+    }
+
+
+def _kpi_recent_quarter(gl_index: _GLIndex) -> tuple[dict[str, Any], float]:
+    """Full company P&L and overhead ratio for the most recent quarter."""
+    gl_totals = gl_index.sum_by_gl(gl_index.select(None, "2025-10", "2025-12"))
+    return _pnl_from_gl_totals(gl_totals), _overhead_ratio_from_gl_totals(gl_totals)
+
+
+@_intent_handler("kpi_dashboard")
+async def _intent_kpi_dashboard(ctx: _IntentContext) -> dict[str, Any]:
+    payload = ctx.payload
+    # The quarter P&L and the revenue trend scan the ledger independently; a failure in one
+    # cancels and collects the other, and the first error is re-raised unwrapped
+    try:
+        async with asyncio.TaskGroup() as tg:
+            quarter_task = tg.create_task(asyncio.to_thread(_kpi_recent_quarter, ctx.gl_index))
+            trend_task = tg.create_task(asyncio.to_thread(_quarterly_trend, ctx.gl_index.records, "revenue"))
+    except ExceptionGroup as group:
+        raise group.exceptions[0]
+    pnl, overhead_ratio = quarter_task.result()
+    quarterly_revenue = trend_task.result()
+    monthly_rev = pnl["revenue"] / 3 if pnl["revenue"] else 1
+    ar = payload.get("ar_aging_snapshot", [])
+    bl = payload.get("backlog", [])
+    cf = payload.get("cash_flow", [])
+    targets = payload.get("kpi_targets", {})
+    return {
+        "kpis": {
+            "quarterly_revenue": pnl["revenue"],
+            "gross_margin_pct": pnl["gross_margin_pct"],
+            "net_margin_pct": pnl["net_margin_pct"],
+            "overhead_ratio": overhead_ratio,
+            "dso": _compute_dso(ar, monthly_rev),
+            "total_backlog": sum(map(itemgetter("contracted_backlog"), bl)),
+            "cash_balance": cf[-1]["ending_cash_balance"] if cf else 0,
+            "revenue_per_employee": round(pnl["revenue"] * 4 / 1200, 0),
+        },
+        "targets": targets,
+        "pnl": pnl,
+        "quarterly_revenue": quarterly_revenue,
+    }
+
+
+def _intent_fallback(ctx: _IntentContext) -> dict[str, Any]:
+    # Unrecognized intent: provide full P&L
+    return {"pnl": ctx.gl_index.pnl(ctx.base_ids)}
+
+
+async def _compute_intent_data(
+    payload: dict[str, Any],
+    gl_index: _GLIndex,
+    intent: str,
+    *,
+    division: str | None,
+    p_start: str | None,
+    p_end: str | None,
+    compare_p_start: str | None,
+    compare_p_end: str | None,
+    gl_filter: str | None,
+    gl_category: str | None,
+    job_id: str | None,
+) -> tuple[dict[str, Any], int]:
+    """Phase 2 of a financial query: deterministic data computation via the intent handler registry.
+
+    Returns the computed data and the number of GL rows in the requested division/period.
+    """
+    ctx = _IntentContext(
+        payload=payload,
+        gl_index=gl_index,
+        intent=intent,
+        division=division,
+        p_start=p_start,
+        p_end=p_end,
+        compare_p_start=compare_p_start,
+        compare_p_end=compare_p_end,
+        gl_filter=gl_filter,
+        gl_category=gl_category,
+        job_id=job_id,
+        base_ids=await asyncio.to_thread(gl_index.select, division, p_start, p_end),
+    )
+    handler = _INTENT_HANDLERS.get(intent, _intent_fallback)
+    if asyncio.iscoroutinefunction(handler):
+        data = await handler(ctx)
+    else:
+        data = await asyncio.to_thread(handler, ctx)
+    # computed_data is what the LLM uses to structure the report
+    computed_data: dict[str, Any] = {"intent": intent, **data}
+    return computed_data, len(ctx.base_ids)
+
+
+# Report-prompt context limits: the UI tables come from the LLM's sections, so
+# bookkeeping fields and long account tails only cost prompt tokens.
+_LLM_CONTEXT_DROP_KEYS = frozenset({"record_count"})
+_LLM_MAX_AR_ACCOUNTS = 10
+
+
+def _round_floats(value: Any, ndigits: int = 2) -> Any:
+    if isinstance(value, float):
+        return round(value, ndigits)
+    if isinstance(value, dict):
+        return {k: _round_floats(v, ndigits) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_round_floats(v, ndigits) for v in value]
+    return value
+
+
+def _trim_context_for_llm(intent: str, computed_data: dict[str, Any]) -> dict[str, Any]:
+    """Shrink Phase 2 output to what the report prompt needs, with floats quantized to cents."""
+    trimmed = {k: v for k, v in computed_data.items() if k not in _LLM_CONTEXT_DROP_KEYS}
+    if intent == "ar_analysis":
+        accounts = trimmed.get("ar_accounts") or []
+        if len(accounts) > _LLM_MAX_AR_ACCOUNTS:
+            # Totals and aging buckets already cover every account
+            trimmed["ar_accounts"] = sorted(
+                accounts, key=itemgetter("total_outstanding"), reverse=True
+            )[:_LLM_MAX_AR_ACCOUNTS]
+            trimmed["ar_accounts_omitted"] = len(accounts) - _LLM_MAX_AR_ACCOUNTS
+    return _round_floats(trimmed)
+
+
+async def run_financial_query(
+    conn,
+    emitter: EventEmitter,
+    user_message: str,
+    conversation: "ConversationContext",
+) -> dict[str, Any]:
+    """Chat-driven financial reporting: classify intent → compute data → generate sectioned report."""
+    from .session_manager import ConversationContext  # avoid circular at module-level
 
     payload = await load_json("financial_reporting.json")
     gl_records = payload.get("monthly_gl", [])
-    budget_records = payload.get("monthly_budget", [])
     gl_chart = payload.get("gl_chart", {})
 
     # --- Phase 1: Emit initial reasoning ---
@@ -2097,11 +3081,11 @@ async def run_financial_query(
         f"Analyzing your request: \"{user_message[:100]}\" — "
         "I'll classify your intent, query the relevant financial data, and generate a report."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     # --- Phase 1b: Intent classification (LLM call 1) ---
     await emitter.emit_tool_call("classify_intent", {"message": user_message[:80]})
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     history_for_llm = ""
     if conversation.messages:
@@ -2112,325 +3096,171 @@ async def run_financial_query(
     available_divisions = ", ".join(f"{k}={v}" for k, v in DIVISION_NAMES.items())
     available_jobs = ", ".join(j["job_id"] + "=" + j["name"] for j in payload.get("jobs", [])[:15])
 
-    _llm = await llm_json_response(
-        agent_id="financial_reporting",
-        objective=(
-            "Classify the user's financial query and extract parameters.\n"
-            "Return strict JSON with these keys:\n"
-            "- intent: one of p_and_l, comparison, expense_analysis, job_costing, ar_analysis, "
-            "backlog, cash_flow, margin_analysis, budget_variance, kpi_dashboard, custom_query, clarification_needed\n"
-            "- division: one of EX, RC, SD, LM, RW, all, or null\n"
-            "- period_start: YYYY-MM format for the start of the period range, or null\n"
-            "- period_end: YYYY-MM format for the end of the period range, or null\n"
-            "- compare_period_start: YYYY-MM for comparison start, or null\n"
-            "- compare_period_end: YYYY-MM for comparison end, or null\n"
-            "- gl_filter: a GL code like 5500, or null\n"
-            "- gl_category: revenue, cogs, or opex — or null\n"
-            "- job_id: a job ID like J-1001, or null\n"
-            "- aggregation: monthly, quarterly, or annual — default quarterly\n"
-            "- clarification_question: a follow-up question string if intent is clarification_needed, else null\n\n"
-            "IMPORTANT DATE RULES:\n"
-            "- Today is January 2026. The most recent complete quarter is Q4 2025 (2025-10 to 2025-12).\n"
-            "- The most recent complete fiscal year is FY 2025 (2025-01 to 2025-12).\n"
-            "- For 'last N months' → count back N months from 2026-01 (e.g. 'last 6 months' → 2025-08 to 2026-01)\n"
-            "- For 'this year' or 'YTD 2025' → 2025-01 to 2025-12\n"
-            "- For 'Q4 2025' → 2025-10 to 2025-12\n"
-            "- For 'Q3 2025' → 2025-07 to 2025-09\n"
-            "- For a single month like 'October 2025' → 2025-10 to 2025-10\n"
-            "- For year-over-year → set period_start/end to current period AND compare_period_start/end to prior year equivalent\n"
-            "- If no period is specified, use smart defaults based on intent:\n"
-            "  * p_and_l/budget_variance → most recent quarter: 2025-10 to 2025-12\n"
-            "  * comparison → current year vs prior year: period 2025-01..2025-12, compare 2024-01..2024-12\n"
-            "  * cash_flow → last 12 months: 2025-02 to 2026-01\n"
-            "  * margin_analysis → all available (null, let backend handle)\n"
-            "  * expense_analysis → last 12 months: 2025-02 to 2026-01\n"
-            "  * kpi_dashboard → null (backend uses latest)\n"
-            "  * ar_analysis/backlog/job_costing → null (point-in-time data)\n\n"
-            f"Division lookup: {available_divisions}\n"
-            "Available periods: 2024-01 through 2026-01\n"
-            f"Sample jobs: {available_jobs}\n"
-            "GL codes: 4100=Contract Revenue, 4200=Service Revenue, 4300=Change Orders, "
-            "5100=Materials, 5200=Equipment Rental, 5300=Subcontractor, 5400=Direct Labor, "
-            "5500=Fuel, 5600=Hauling, 5700=Permits, 5800=Equip Maintenance, "
-            "6100=Office/Admin, 6200=Insurance, 6300=Vehicle/Fleet, 6400=IT, 6500=Prof Fees, 6600=Depreciation\n\n"
-            "Intent guide:\n"
-            "- P&L questions → p_and_l\n"
-            "- Year-over-year, compare periods → comparison\n"
-            "- Cost breakdown, specific cost line, comparing cost categories → expense_analysis\n"
-            "  NOTE: For expense_analysis, if the user asks about MULTIPLE cost types (e.g. 'labor vs subcontractor'),\n"
-            "  leave gl_filter null and set gl_category to the broader category (cogs or opex), or leave both null\n"
-            "  to get ALL expenses. The backend will include all relevant GL codes.\n"
-            "- Specific project costs → job_costing\n"
-            "- Receivables, DSO, collections → ar_analysis\n"
-            "- Backlog, pipeline → backlog\n"
-            "- Cash position, cash flow → cash_flow\n"
-            "- Margin trends, profitability → margin_analysis\n"
-            "- Budget vs actual → budget_variance\n"
-            "- Dashboard, KPIs, overview → kpi_dashboard\n"
-            "- Anything else specific → custom_query\n"
-        ),
-        context_payload={
-            "user_message": user_message,
-            "conversation_history": history_for_llm,
-        },
-        max_tokens=500,
-        temperature=0.0,
-    )
-    intent_result = _llm.data
-    await emitter.emit_llm("tool_result", {"tool": "llm_analysis", "result": {}, "summary": "Intent classified"}, message="Intent classified", prompt_tokens=_llm.prompt_tokens, completion_tokens=_llm.completion_tokens)
-
-    intent = intent_result.get("intent", "custom_query")
-    division = intent_result.get("division")
-    # Support both new range format and old single-period format
-    p_start = intent_result.get("period_start")
-    p_end = intent_result.get("period_end")
-    # Fallback for old single-period format
-    if not p_start and not p_end:
-        old_period = intent_result.get("period")
-        if old_period:
-            p_start, p_end = _resolve_period_range(old_period)
-    compare_p_start = intent_result.get("compare_period_start")
-    compare_p_end = intent_result.get("compare_period_end")
-    if not compare_p_start and not compare_p_end:
-        old_cp = intent_result.get("compare_period")
-        if old_cp:
-            compare_p_start, compare_p_end = _resolve_period_range(old_cp)
-    gl_filter = intent_result.get("gl_filter")
-    gl_category = intent_result.get("gl_category")
-    job_id = intent_result.get("job_id")
-    aggregation = intent_result.get("aggregation", "quarterly")
-    # Build a human-readable period label for display
-    if intent in ("ar_analysis", "backlog", "job_costing") and not p_start:
-        period_display = "As of January 2026"
-    else:
-        period_display = f"{p_start} to {p_end}" if p_start and p_end and p_start != p_end else (p_start or "latest")
+    # Speculatively index the ledger while the classifier call is in flight;
+    # almost every intent filters GL records once the intent is known.
+    gl_index_task = asyncio.create_task(asyncio.to_thread(_GLIndex, gl_records))
 
-    div_label = DIVISION_NAMES.get(division, division or "all divisions") if division else "all divisions"
-    await emitter.emit_tool_result(
-        "classify_intent",
-        {"intent": intent, "division": division, "period": period_display},
-        f"Classified as {intent} for {div_label}",
-    )
-    await asyncio.sleep(0.2)
+    try:
+        _llm = await llm_json_response(
+            agent_id="financial_reporting",
+            objective="Classify the user's financial query and extract parameters.",
+            # The classification rules below are byte-identical across requests, so they are
+            # sent as a cacheable prompt prefix; only the user message/history vary.
+            cached_prefix=(
+                "Return strict JSON with these keys:\n"
+                "- intent: one of p_and_l, comparison, expense_analysis, job_costing, ar_analysis, "
+                "backlog, cash_flow, margin_analysis, budget_variance, kpi_dashboard, custom_query, clarification_needed\n"
+                "- division: one of EX, RC, SD, LM, RW, all, or null\n"
+                "- period_start: YYYY-MM format for the start of the period range, or null\n"
+                "- period_end: YYYY-MM format for the end of the period range, or null\n"
+                "- compare_period_start: YYYY-MM for comparison start, or null\n"
+                "- compare_period_end: YYYY-MM for comparison end, or null\n"
+                "- gl_filter: a GL code like 5500, or null\n"
+                "- gl_category: revenue, cogs, or opex — or null\n"
+                "- job_id: a job ID like J-1001, or null\n"
+                "- aggregation: monthly, quarterly, or annual — default quarterly\n"
+                "- clarification_question: a follow-up question string if intent is clarification_needed, else null\n\n"
+                "IMPORTANT DATE RULES:\n"
+                "- Today is January 2026. The most recent complete quarter is Q4 2025 (2025-10 to 2025-12).\n"
+                "- The most recent complete fiscal year is FY 2025 (2025-01 to 2025-12).\n"
+                "- For 'last N months' → count back N months from 2026-01 (e.g. 'last 6 months' → 2025-08 to 2026-01)\n"
+                "- For 'this year' or 'YTD 2025' → 2025-01 to 2025-12\n"
+                "- For 'Q4 2025' → 2025-10 to 2025-12\n"
+                "- For 'Q3 2025' → 2025-07 to 2025-09\n"
+                "- For a single month like 'October 2025' → 2025-10 to 2025-10\n"
+                "- For year-over-year → set period_start/end to current period AND compare_period_start/end to prior year equivalent\n"
+                "- If no period is specified, use smart defaults based on intent:\n"
+                "  * p_and_l/budget_variance → most recent quarter: 2025-10 to 2025-12\n"
+                "  * comparison → current year vs prior year: period 2025-01..2025-12, compare 2024-01..2024-12\n"
+                "  * cash_flow → last 12 months: 2025-02 to 2026-01\n"
+                "  * margin_analysis → all available (null, let backend handle)\n"
+                "  * expense_analysis → last 12 months: 2025-02 to 2026-01\n"
+                "  * kpi_dashboard → null (backend uses latest)\n"
+                "  * ar_analysis/backlog/job_costing → null (point-in-time data)\n\n"
+                f"Division lookup: {available_divisions}\n"
+                "Available periods: 2024-01 through 2026-01\n"
+                f"Sample jobs: {available_jobs}\n"
+                "GL codes: 4100=Contract Revenue, 4200=Service Revenue, 4300=Change Orders, "
+                "5100=Materials, 5200=Equipment Rental, 5300=Subcontractor, 5400=Direct Labor, "
+                "5500=Fuel, 5600=Hauling, 5700=Permits, 5800=Equip Maintenance, "
+                "6100=Office/Admin, 6200=Insurance, 6300=Vehicle/Fleet, 6400=IT, 6500=Prof Fees, 6600=Depreciation\n\n"
+                "Intent guide:\n"
+                "- P&L questions → p_and_l\n"
+                "- Year-over-year, compare periods → comparison\n"
+                "- Cost breakdown, specific cost line, comparing cost categories → expense_analysis\n"
+                "  NOTE: For expense_analysis, if the user asks about MULTIPLE cost types (e.g. 'labor vs subcontractor'),\n"
+                "  leave gl_filter null and set gl_category to the broader category (cogs or opex), or leave both null\n"
+                "  to get ALL expenses. The backend will include all relevant GL codes.\n"
+                "- Specific project costs → job_costing\n"
+                "- Receivables, DSO, collections → ar_analysis\n"
+                "- Backlog, pipeline → backlog\n"
+                "- Cash position, cash flow → cash_flow\n"
+                "- Margin trends, profitability → margin_analysis\n"
+                "- Budget vs actual → budget_variance\n"
+                "- Dashboard, KPIs, overview → kpi_dashboard\n"
+                "- Anything else specific → custom_query\n"
+            ),
+            context_payload={
+                "user_message": user_message,
+                "conversation_history": history_for_llm,
+            },
+            max_tokens=500,
+            temperature=0.0,
+        )
+        intent_result = _llm.data
+        await emitter.emit_llm("tool_result", {"tool": "llm_analysis", "result": {}, "summary": "Intent classified"}, message="Intent classified", prompt_tokens=_llm.prompt_tokens, completion_tokens=_llm.completion_tokens)
+
+        intent = intent_result.get("intent", "custom_query")
+        division = intent_result.get("division")
+        # Support both new range format and old single-period format
+        p_start = intent_result.get("period_start")
+        p_end = intent_result.get("period_end")
+        # Fallback for old single-period format
+        if not p_start and not p_end:
+            old_period = intent_result.get("period")
+            if old_period:
+                p_start, p_end = _resolve_period_range(old_period)
+        compare_p_start = intent_result.get("compare_period_start")
+        compare_p_end = intent_result.get("compare_period_end")
+        if not compare_p_start and not compare_p_end:
+            old_cp = intent_result.get("compare_period")
+            if old_cp:
+                compare_p_start, compare_p_end = _resolve_period_range(old_cp)
+        gl_filter = intent_result.get("gl_filter")
+        gl_category = intent_result.get("gl_category")
+        job_id = intent_result.get("job_id")
+        aggregation = intent_result.get("aggregation", "quarterly")
+        # Build a human-readable period label for display
+        if intent in ("ar_analysis", "backlog", "job_costing") and not p_start:
+            period_display = "As of January 2026"
+        else:
+            period_display = f"{p_start} to {p_end}" if p_start and p_end and p_start != p_end else (p_start or "latest")
 
-    # --- Handle clarification ---
-    if intent == "clarification_needed":
-        question = intent_result.get("clarification_question") or (
-            "Could you be more specific? For example, which division, time period, or metric are you interested in?"
+        div_label = DIVISION_NAMES.get(division, division or "all divisions") if division else "all divisions"
+        await emitter.emit_tool_result(
+            "classify_intent",
+            {"intent": intent, "division": division, "period": period_display},
+            f"Classified as {intent} for {div_label}",
         )
-        conversation.append_message("user", user_message)
-        conversation.append_message("assistant", question)
-        await emitter.emit_agent_message(question, msg_type="clarification")
-        return {"type": "clarification", "question": question}
+        await emit_tick()
 
-    # --- Phase 2: Deterministic data computation (NO LLM) ---
-    await emitter.emit_reasoning(
-        f"Connecting to Vista ERP to pull financial data"
-        + (f" for {div_label}" if division else "")
-        + (f", period {period_display}" if p_start else "")
-        + "."
-    )
-    await asyncio.sleep(0.3)
-
-    await emitter.emit_tool_call("query_gl_data", {"intent": intent, "division": division, "period": period_display})
-    await asyncio.sleep(0.2)
-
-    sql_query = _build_simulated_sql(intent, division, p_start or "latest", gl_filter)
-    await emitter.emit_code_block("sql", sql_query)
-    await asyncio.sleep(0.3)
-
-    # Build computed_data dict that the LLM will use to structure the report
-    computed_data: dict[str, Any] = {"intent": intent}
-
-    if intent in ("p_and_l", "custom_query"):
-        filtered = _filter_gl(gl_records, division, p_start, p_end)
-        computed_data["pnl"] = _compute_pnl(filtered)
-        computed_data["record_count"] = len(filtered)
-        # Add per-division breakdown for company-wide P&L
-        if not division or division == "all":
-            div_pnls = {}
-            for d_code, d_name in DIVISION_NAMES.items():
-                d_filtered = _filter_gl(gl_records, d_code, p_start, p_end)
-                d_pnl = _compute_pnl(d_filtered)
-                div_pnls[d_name] = {"revenue": d_pnl["revenue"], "gross_profit": d_pnl["gross_profit"],
-                                     "gross_margin_pct": d_pnl["gross_margin_pct"], "net_income": d_pnl["net_income"]}
-            computed_data["division_breakdown"] = div_pnls
-
-    elif intent == "comparison":
-        filtered_current = _filter_gl(gl_records, division, p_start, p_end)
-        current_pnl = _compute_pnl(filtered_current)
-        # Determine prior period from compare_p_start/compare_p_end, or default to prior year
-        cp_s = compare_p_start
-        cp_e = compare_p_end
-        if not cp_s and p_start:
-            try:
-                y = int(p_start[:4]) - 1
-                cp_s = f"{y}{p_start[4:]}"
-                cp_e = f"{y}{p_end[4:]}" if p_end else None
-            except Exception:
-                cp_s, cp_e = None, None
-        filtered_prior = _filter_gl(gl_records, division, cp_s, cp_e)
-        prior_pnl = _compute_pnl(filtered_prior)
-        computed_data["current_pnl"] = current_pnl
-        computed_data["prior_pnl"] = prior_pnl
-        computed_data["variance"] = _compute_variance(current_pnl, prior_pnl)
-        computed_data["current_period_label"] = f"{p_start} to {p_end}" if p_start else "current"
-        computed_data["prior_period_label"] = f"{cp_s} to {cp_e}" if cp_s else "prior year"
-
-    elif intent == "expense_analysis":
-        gl_list = None
-        if gl_filter:
-            gl_list = [gl_filter]
-        elif gl_category:
-            gl_list = GL_CATEGORIES.get(gl_category)
-        else:
-            gl_list = GL_CATEGORIES["cogs"] + GL_CATEGORIES["opex"]
-        filtered = _filter_gl(gl_records, division, p_start, p_end, gl_list)
-        computed_data["expense_by_gl"] = {GL_DESCRIPTIONS.get(k, k): v for k, v in _sum_by_gl(filtered).items()}
-        computed_data["expense_by_division"] = {DIVISION_NAMES.get(k, k): v for k, v in _sum_by_division(filtered).items()}
-        computed_data["total"] = round(sum(_sum_by_gl(filtered).values()), 2)
-        # Monthly trend for the filtered expense codes
-        computed_data["monthly_trend"] = _sum_by_period(filtered)
-
-    elif intent == "job_costing":
-        jobs = payload.get("jobs", [])
-        if job_id:
-            jobs = [j for j in jobs if j["job_id"] == job_id]
-        elif division and division != "all":
-            jobs = [j for j in jobs if j["division_id"] == division]
-        computed_data["jobs"] = jobs
-
-    elif intent == "ar_analysis":
-        ar = payload.get("ar_aging_snapshot", [])
-        if division and division != "all":
-            ar = [a for a in ar if a["division_id"] == division]
-        total_ar = sum(a["total_outstanding"] for a in ar)
-        # Get last 3 months of revenue for DSO - use the most recent available
-        all_periods = sorted(set(r["period"] for r in gl_records))
-        recent_3 = all_periods[-3:] if len(all_periods) >= 3 else all_periods
-        dso_rev_start = recent_3[0] if recent_3 else "2025-10"
-        dso_rev_end = recent_3[-1] if recent_3 else "2025-12"
-        recent_rev = _filter_gl(gl_records, division, dso_rev_start, dso_rev_end, GL_CATEGORIES["revenue"])
-        monthly_rev = sum(r["amount"] for r in recent_rev) / len(recent_3) if recent_rev else 1
-        computed_data["ar_accounts"] = ar
-        computed_data["total_ar"] = total_ar
-        computed_data["dso"] = _compute_dso(ar, monthly_rev)
-        # Aging summary for chart
-        aging_summary = {"Current": 0, "1-30 Days": 0, "31-60 Days": 0, "61-90 Days": 0, "Over 90 Days": 0}
-        for a in ar:
-            aging_summary["Current"] += a.get("current", 0)
-            aging_summary["1-30 Days"] += a.get("days_1_30", 0)
-            aging_summary["31-60 Days"] += a.get("days_31_60", 0)
-            aging_summary["61-90 Days"] += a.get("days_61_90", 0)
-            aging_summary["Over 90 Days"] += a.get("days_over_90", 0)
-        computed_data["aging_summary"] = {k: round(v, 2) for k, v in aging_summary.items()}
-
-    elif intent == "backlog":
-        bl = payload.get("backlog", [])
-        if division and division != "all":
-            bl = [b for b in bl if b["division_id"] == division]
-        # Map division IDs to names in backlog records
-        for b in bl:
-            b["division_name"] = DIVISION_NAMES.get(b.get("division_id", ""), b.get("division_id", ""))
-        computed_data["backlog"] = bl
-        computed_data["total_backlog"] = sum(b["contracted_backlog"] for b in bl)
-        computed_data["total_pipeline"] = sum(b["proposal_pipeline"] for b in bl)
-
-    elif intent == "cash_flow":
-        cf = payload.get("cash_flow", [])
-        if p_start:
-            cf = [c for c in cf if c["period"] >= p_start]
-        if p_end:
-            cf = [c for c in cf if c["period"] <= p_end]
-        computed_data["cash_flow"] = cf
-        if cf:
-            computed_data["total_net_cash_flow"] = round(sum(c["net_cash_flow"] for c in cf), 2)
-            computed_data["ending_balance"] = cf[-1]["ending_cash_balance"]
-            computed_data["starting_balance"] = cf[0]["ending_cash_balance"] - cf[0]["net_cash_flow"]
-
-    elif intent == "margin_analysis":
-        computed_data["quarterly_gross_margin"] = _quarterly_trend(gl_records, "gross_margin")
-        computed_data["quarterly_net_margin"] = _quarterly_trend(gl_records, "net_margin")
-        computed_data["quarterly_revenue"] = _quarterly_trend(gl_records, "revenue")
-        if division and division != "all":
-            div_records = _filter_gl(gl_records, division)
-            computed_data["division_gross_margin"] = _quarterly_trend(div_records, "gross_margin")
-        # Also per-division current
-        div_margins = {}
-        for d in DIVISION_NAMES:
-            d_recs = _filter_gl(gl_records, d, p_start, p_end)
-            d_pnl = _compute_pnl(d_recs)
-            div_margins[DIVISION_NAMES[d]] = {"gross_margin": d_pnl["gross_margin_pct"], "net_margin": d_pnl["net_margin_pct"],
-                                              "revenue": d_pnl["revenue"]}
-        computed_data["division_margins"] = div_margins
-
-    elif intent == "budget_variance":
-        filtered_actual = _filter_gl(gl_records, division, p_start, p_end)
-        filtered_budget = _filter_gl(budget_records, division, p_start, p_end)
-        actual_by_gl = _sum_by_gl(filtered_actual)
-        budget_by_gl = {}
-        for r in filtered_budget:
-            budget_by_gl[r["gl_code"]] = budget_by_gl.get(r["gl_code"], 0.0) + r.get("budget_amount", 0)
-        variance_lines = []
-        for gl in sorted(set(list(actual_by_gl.keys()) + list(budget_by_gl.keys()))):
-            act = actual_by_gl.get(gl, 0)
-            bud = budget_by_gl.get(gl, 0)
-            var_d = round(act - bud, 2)
-            var_p = round((var_d / bud * 100) if bud else 0, 1)
-            variance_lines.append({
-                "gl_code": gl,
-                "description": GL_DESCRIPTIONS.get(gl, gl),
-                "actual": round(act, 2),
-                "budget": round(bud, 2),
-                "variance": var_d,
-                "variance_pct": var_p,
-            })
-        computed_data["budget_variance_lines"] = variance_lines
-        computed_data["total_actual"] = round(sum(v["actual"] for v in variance_lines), 2)
-        computed_data["total_budget"] = round(sum(v["budget"] for v in variance_lines), 2)
-
-    elif intent == "kpi_dashboard":
-        # Full company P&L for most recent quarter
-        recent_q = _filter_gl(gl_records, None, "2025-10", "2025-12")
-        pnl = _compute_pnl(recent_q)
-        monthly_rev = pnl["revenue"] / 3 if pnl["revenue"] else 1
-        ar = payload.get("ar_aging_snapshot", [])
-        bl = payload.get("backlog", [])
-        cf = payload.get("cash_flow", [])
-        targets = payload.get("kpi_targets", {})
-        computed_data["kpis"] = {
-            "quarterly_revenue": pnl["revenue"],
-            "gross_margin_pct": pnl["gross_margin_pct"],
-            "net_margin_pct": pnl["net_margin_pct"],
-            "overhead_ratio": _compute_overhead_ratio(recent_q),
-            "dso": _compute_dso(ar, monthly_rev),
-            "total_backlog": sum(b["contracted_backlog"] for b in bl),
-            "cash_balance": cf[-1]["ending_cash_balance"] if cf else 0,
-            "revenue_per_employee": round(pnl["revenue"] * 4 / 1200, 0),
-        }
-        computed_data["targets"] = targets
-        computed_data["pnl"] = pnl
-        computed_data["quarterly_revenue"] = _quarterly_trend(gl_records, "revenue")
+        # --- Handle clarification ---
+        if intent == "clarification_needed":
+            question = intent_result.get("clarification_question") or (
+                "Could you be more specific? For example, which division, time period, or metric are you interested in?"
+            )
+            conversation.append_message("user", user_message)
+            conversation.append_message("assistant", question)
+            await emitter.emit_agent_message(question, msg_type="clarification")
+            return {"type": "clarification", "question": question}
 
-    else:
-        # custom_query fallback: provide full P&L
-        filtered = _filter_gl(gl_records, division, p_start, p_end)
-        computed_data["pnl"] = _compute_pnl(filtered)
+        # --- Phase 2: Deterministic data computation (NO LLM) ---
+        await emitter.emit_reasoning(
+            f"Connecting to Vista ERP to pull financial data"
+            + (f" for {div_label}" if division else "")
+            + (f", period {period_display}" if p_start else "")
+            + "."
+        )
+        await emit_tick()
+
+        await emitter.emit_tool_call("query_gl_data", {"intent": intent, "division": division, "period": period_display})
+        await emit_tick()
+
+        sql_query = _build_simulated_sql(intent, division, p_start or "latest", gl_filter)
+        gl_index = await gl_index_task
+    finally:
+        # No-op once awaited; otherwise (clarification, or an error before the await) the
+        # speculative index build is cancelled and collected rather than left pending.
+        gl_index_task.cancel()
+        await asyncio.gather(gl_index_task, return_exceptions=True)
+    # Crunch the numbers off the event loop while the SQL visualization is shown. A failure on
+    # either side cancels and collects the other; the first error is re-raised unwrapped.
+    try:
+        async with asyncio.TaskGroup() as tg:
+            compute_task = tg.create_task(_compute_intent_data(
+                payload, gl_index, intent,
+                division=division, p_start=p_start, p_end=p_end,
+                compare_p_start=compare_p_start, compare_p_end=compare_p_end,
+                gl_filter=gl_filter, gl_category=gl_category, job_id=job_id,
+            ))
+            tg.create_task(emitter.emit_code_block("sql", sql_query))
+            tg.create_task(emit_tick())
+    except ExceptionGroup as group:
+        raise group.exceptions[0]
+    computed_data, row_count = compute_task.result()
 
-    row_count = len(_filter_gl(gl_records, division, p_start, p_end))
     await emitter.emit_tool_result(
         "query_gl_data",
         {"rows_returned": row_count, "data_sections": list(computed_data.keys())},
         f"Retrieved {row_count} GL records, computed {intent} data.",
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     # --- Phase 3: Report generation (LLM call 2) ---
     await emitter.emit_reasoning("Generating the report with tables, charts, and executive narrative...")
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     await emitter.emit_tool_call("generate_report", {"intent": intent, "sections": "tables+charts+narrative"})
-    await asyncio.sleep(0.1)
 
     _llm = await llm_json_response(
         agent_id="financial_reporting",
@@ -2476,7 +3306,7 @@ async def run_financial_query(
             "  * For all other intents: use the actual period like 'Q4 2025', 'FY 2025', '2025-08 to 2026-01', etc.\n"
             "  * NEVER invent or hallucinate a period. Use only what is provided in the Period field above.\n"
         ),
-        context_payload=computed_data,
+        context_payload=_trim_context_for_llm(intent, computed_data),
         max_tokens=4000,
         temperature=0.1,
     )
@@ -2488,12 +3318,12 @@ async def run_financial_query(
         {"report_type": report_data.get("report_type", intent)},
         f"Report generated: {report_data.get('report_title', 'Financial Report')}",
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     # --- Phase 4: Emit results ---
     response_text = report_data.get("response_text", "Here is your report.")
     await emitter.emit_agent_message(response_text)
-    await asyncio.sleep(0.15)
+    await emit_tick()
 
     report_id = str(uuid4())
     report_payload = {
@@ -2523,16 +3353,16 @@ async def run_vendor_compliance(conn, emitter: EventEmitter) -> dict[str, Any]:
         f"Loading vendor compliance records. Found {len(vendors)} active vendors to audit for "
         "insurance certificates, W-9 status, licensing, and contract terms."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     await emitter.emit_tool_call("scan_vendor_records", {"vendor_count": len(vendors)})
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await emitter.emit_reasoning(
         "Scanning each vendor's documentation for expired insurance, missing W-9 forms, "
         "lapsed licenses, and contract renewal deadlines."
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     _llm = await llm_json_response(
         agent_id="vendor_compliance",
@@ -2558,8 +3388,12 @@ async def run_vendor_compliance(conn, emitter: EventEmitter) -> dict[str, Any]:
         f"Audit complete. Identified {len(findings)} compliance issue(s) across {len(vendors)} vendors. "
         "Processing each finding and executing required actions."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
+    # Every finding is checked before anything is emitted: emails and tasks are only written
+    # in one batch per table after the loop, so a bad entry found mid-loop would otherwise
+    # leave communication events in the log for emails that were never stored.
+    actionable: list[tuple[dict[str, Any], str, str, dict[str, Any]]] = []
     for finding in findings:
         if not isinstance(finding, dict):
             continue
@@ -2571,30 +3405,39 @@ async def run_vendor_compliance(conn, emitter: EventEmitter) -> dict[str, Any]:
         vendor = next((v for v in vendors if v["name"] == vendor_name), None)
         if not vendor:
             continue
+        if action_type in {"renewal_email", "w9_email"} and not (
+            str(finding.get("subject", "")).strip() and str(finding.get("body", "")).strip()
+        ):
+            raise RuntimeError(f"vendor_compliance: missing email content for {vendor_name}")
+        actionable.append((finding, vendor_name, action_type, vendor))
 
+    pending_comms: list[tuple[str, str, str]] = []
+    pending_tasks: list[tuple[str, str, str, Optional[str]]] = []
+    for finding, vendor_name, action_type, vendor in actionable:
         await emitter.emit_tool_call("check_vendor", {"vendor": vendor_name, "issue": str(finding.get("issue", "")), "action": action_type})
-        await asyncio.sleep(0.1)
+        await emit_tick()
 
         await emitter.emit_tool_result(
             "check_vendor",
             {"vendor": vendor_name, "issue": str(finding.get("issue", "")), "action_type": action_type, "reason": str(finding.get("reason", ""))},
             f"{vendor_name}: {finding.get('issue', 'compliance issue')} — action: {action_type.replace('_', ' ')}",
         )
-        await asyncio.sleep(0.15)
+        await emit_tick()
 
         if action_type in {"renewal_email", "w9_email"}:
             subject = str(finding.get("subject", "")).strip()
             body = str(finding.get("body", "")).strip()
-            if not subject or not body:
-                raise RuntimeError(f"vendor_compliance: missing email content for {vendor_name}")
-            await insert_communication(conn, "vendor_compliance", vendor["email"], subject, body)
+            pending_comms.append((vendor["email"], subject, body))
             await emitter.emit_communication(vendor["email"], subject, body)
 
         if action_type in {"urgent_hold_task", "contract_task"}:
             title = str(finding.get("task_title", "")).strip() or f"Compliance task: {vendor_name}"
             description = str(finding.get("task_description", "")).strip() or str(finding.get("reason", "")).strip()
             priority = str(finding.get("task_priority", "")).strip() or ("critical" if action_type == "urgent_hold_task" else "medium")
-            await insert_internal_task(conn, "vendor_compliance", title, description, priority)
+            pending_tasks.append((title, description, priority, None))
+
+    await insert_communications_many(conn, "vendor_compliance", pending_comms)
+    await insert_internal_tasks_many(conn, "vendor_compliance", pending_tasks)
 
     # Build compliance summary
     issue_types = set()
@@ -2628,26 +3471,26 @@ async def run_schedule_optimizer(conn, emitter: EventEmitter) -> dict[str, Any]:
         f"Loading dispatch data: {len(jobs)} jobs across the Raleigh-Durham metro area "
         f"with {len(crews)} available crews. Analyzing GPS coordinates and job requirements."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     await emitter.emit_tool_call("load_dispatch_data", {"jobs": len(jobs), "crews": len(crews)})
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await emitter.emit_tool_result(
         "load_dispatch_data",
         {"jobs_loaded": len(jobs), "crews_available": len(crews)},
         f"Loaded {len(jobs)} dispatch jobs and {len(crews)} crew assignments.",
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await emitter.emit_reasoning(
         "Running route optimization algorithm. Minimizing total drive time by clustering nearby jobs "
         "and assigning them to the closest available crew while respecting crew skill requirements."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     await emitter.emit_tool_call("optimize_routes", {"algorithm": "proximity_cluster", "jobs": len(jobs)})
-    await asyncio.sleep(0.1)
+    await emit_tick()
 
     _llm = await llm_json_response(
         agent_id="schedule_optimizer",
@@ -2672,7 +3515,7 @@ async def run_schedule_optimizer(conn, emitter: EventEmitter) -> dict[str, Any]:
                 {"crew": crew_id, "jobs": job_ids, "job_count": len(job_ids)},
                 f"Assigned {len(job_ids)} jobs to {crew_id.replace('_', ' ')}: {' → '.join(str(j) for j in job_ids)}",
             )
-            await asyncio.sleep(0.15)
+            await emit_tick()
 
     improvement = result.get("improvement_percent", 0)
     optimized = result.get("optimized_drive_minutes", 0)
@@ -2681,7 +3524,7 @@ async def run_schedule_optimizer(conn, emitter: EventEmitter) -> dict[str, Any]:
         f"Optimization complete. Reduced total drive time from {unoptimized} to {optimized} minutes "
         f"({improvement}% improvement). {result.get('rationale', '')}"
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await emitter.emit_tool_result(
         "optimize_routes",
@@ -2691,6 +3534,46 @@ async def run_schedule_optimizer(conn, emitter: EventEmitter) -> dict[str, Any]:
     return result
 
 
+# Proposal-assumption checks, tried in order. Each rule is (assumption keywords,
+# (check, reason) pairs over the lowercased risk flags joined into one string,
+# schedule and lowercased critical-path delay cause, settles): once a keyword
+# matches, the first passing check breaks the assumption; when none pass, the
+# assumption holds if the rule settles it, otherwise later rules are tried (rock only).
+_AssumptionCheck = tuple[Callable[[str, dict, str], bool], str]
+_ASSUMPTION_RULES: tuple[tuple[tuple[str, ...], tuple[_AssumptionCheck, ...], bool], ...] = (
+    (("rock",), (
+        (lambda flags, schedule, delay_cause: "rock" in flags,
+         "Rock excavation encountered — contradicts assumption"),
+    ), False),
+    (("fuel",), (
+        (lambda flags, schedule, delay_cause: "fuel" in flags,
+         "Fuel costs exceeded assumed rate"),
+    ), True),
+    (("winter", "weather"), (
+        (lambda flags, schedule, delay_cause: schedule.get("days_behind", 0) > 30,
+         "Schedule delays pushed work into winter season"),
+    ), True),
+    (("subcontractor",), (
+        (lambda flags, schedule, delay_cause: "subcontractor" in flags or "sub" in flags,
+         "Subcontractor availability issues encountered"),
+        (lambda flags, schedule, delay_cause: "subcontractor" in delay_cause,
+         "Subcontractor delay impacted critical path"),
+    ), True),
+    (("blasting",), (
+        (lambda flags, schedule, delay_cause: "blast" in flags,
+         "Blasting volumes exceeded geological survey predictions"),
+    ), True),
+    (("retaining wall", "redesign"), (
+        (lambda flags, schedule, delay_cause: "redesign" in flags or "retaining" in flags,
+         "Retaining wall required redesign due to field conditions"),
+    ), True),
+    (("endangered", "environmental"), (
+        (lambda flags, schedule, delay_cause: "raptor" in flags or "environmental" in flags,
+         "Environmental mitigation required for raptor nesting"),
+    ), True),
+)
+
+
 def _compute_project_metrics(project: dict) -> dict:
     """Deterministic computation of all project metrics from proposal vs actuals.
     Returns a rich metrics dict — NO LLM involvement."""
@@ -2707,6 +3590,20 @@ def _compute_project_metrics(project: dict) -> dict:
     pct_billed = actuals.get("percent_billed", 0)
     total_cost_to_date = actuals.get("total_cost_to_date", 0)
 
+    # ── Change order totals (one pass; reused for projected revenue and the CO summary) ──
+    approved_count = pending_count = 0
+    approved_value = pending_value = 0
+    total_impact_days = 0
+    for co in change_orders:
+        status = co.get("status")
+        if status == "approved":
+            approved_count += 1
+            approved_value += co.get("amount", 0)
+        elif status == "pending":
+            pending_count += 1
+            pending_value += co.get("amount", 0)
+        total_impact_days += co.get("impact_days", 0)
+
     # ── Earned Value Analysis ──
     # BCWS (Budgeted Cost of Work Scheduled) = estimated_cost * pct_complete/100
     bcws = estimated_cost * pct_complete / 100 if estimated_cost else 0
@@ -2723,27 +3620,46 @@ def _compute_project_metrics(project: dict) -> dict:
     # Variance at Completion (VAC) = estimated_cost - EAC
     vac = estimated_cost - eac
     # Projected margin
-    projected_revenue = contract_value + sum(co.get("amount", 0) for co in change_orders if co.get("status") == "approved")
+    projected_revenue = contract_value + approved_value
     projected_margin = projected_revenue - eac if eac > 0 else projected_revenue - estimated_cost
     projected_margin_pct = (projected_margin / projected_revenue * 100) if projected_revenue > 0 else 0
 
     # ── Cost Code Variance Analysis ──
     cost_code_analysis = []
-    cost_by_code = actuals.get("cost_by_code", {})
+    append_code = cost_code_analysis.append
+    actual_for_code = actuals.get("cost_by_code", {}).get
     est_by_code = proposal.get("cost_estimate_by_code", {})
     for code, budgeted_val in est_by_code.items():
-        actual_data = cost_by_code.get(code, {})
+        actual_data = actual_for_code(code)
         if isinstance(actual_data, dict):
             actual_val = actual_data.get("actual", 0)
             code_pct = actual_data.get("pct_complete", 0)
         else:
             actual_val = 0
             code_pct = 0
+        if code_pct == 0:
+            if not budgeted_val and not actual_val:
+                # No budget, spend or progress: nothing to analyze, keep it out of the LLM context
+                continue
+            # Nothing earned yet: the derived figures are constants or the actual spend,
+            # so skip the per-column arithmetic and rounding.
+            append_code({
+                "code": code,
+                "budgeted": budgeted_val,
+                "actual": actual_val,
+                "pct_complete": code_pct,
+                "earned_value": 0,
+                "variance": round(-actual_val),
+                "variance_pct": 0,
+                "projected_final": round(actual_val),
+                "over_budget": False,
+            })
+            continue
         budgeted_for_pct = budgeted_val * code_pct / 100 if budgeted_val else 0
         variance = budgeted_for_pct - actual_val
         variance_pct = (variance / budgeted_for_pct * 100) if budgeted_for_pct > 0 else 0
         projected_final = actual_val / (code_pct / 100) if code_pct > 0 else actual_val
-        cost_code_analysis.append({
+        append_code({
             "code": code,
             "budgeted": budgeted_val,
             "actual": actual_val,
@@ -2752,21 +3668,25 @@ def _compute_project_metrics(project: dict) -> dict:
             "variance": round(variance),
             "variance_pct": round(variance_pct, 1),
             "projected_final": round(projected_final),
-            "over_budget": actual_val > budgeted_for_pct * 1.05 and code_pct > 0,
+            "over_budget": code_pct > 0 and actual_val > budgeted_for_pct * 1.05,
         })
 
     # ── Labor Analysis ──
-    labor_est = proposal.get("labor_estimate", {})
-    labor_act = actuals.get("labor", {})
-    est_hours = labor_est.get("total_labor_hours", 0)
-    est_rate = labor_est.get("avg_loaded_rate", 0)
-    est_labor_cost = labor_est.get("estimated_labor_cost", 0)
-    act_hours = labor_act.get("total_hours_to_date", 0)
-    act_rate = labor_act.get("avg_actual_loaded_rate", 0)
-    act_labor_cost = labor_act.get("labor_cost_to_date", 0)
-    overtime_hours = labor_act.get("overtime_hours", 0)
-    overtime_cost = labor_act.get("overtime_cost", 0)
-    productivity_index = labor_act.get("productivity_index", 1.0)
+    est_get = proposal.get("labor_estimate", {}).get
+    act_get = actuals.get("labor", {}).get
+    est_hours, est_rate, est_labor_cost = (
+        est_get("total_labor_hours", 0),
+        est_get("avg_loaded_rate", 0),
+        est_get("estimated_labor_cost", 0),
+    )
+    act_hours, act_rate, act_labor_cost, overtime_hours, overtime_cost, productivity_index = (
+        act_get("total_hours_to_date", 0),
+        act_get("avg_actual_loaded_rate", 0),
+        act_get("labor_cost_to_date", 0),
+        act_get("overtime_hours", 0),
+        act_get("overtime_cost", 0),
+        act_get("productivity_index", 1.0),
+    )
 
     # Hours burn rate
     expected_hours_at_pct = est_hours * pct_complete / 100 if est_hours else 0
@@ -2799,41 +3719,45 @@ def _compute_project_metrics(project: dict) -> dict:
         "actual_labor_cost": act_labor_cost,
         "projected_labor_cost": round(projected_labor),
         "labor_budget_variance": round(labor_budget_variance),
-        "monthly_labor": labor_act.get("monthly_labor", []),
+        "monthly_labor": act_get("monthly_labor", []),
     }
 
     # ── Schedule Analysis ──
     schedule = actuals.get("schedule", {})
-    milestones = schedule.get("milestones", [])
-    completed_milestones = [m for m in milestones if m.get("status") == "complete"]
-    in_progress_milestones = [m for m in milestones if m.get("status") == "in_progress"]
-    avg_delay = 0
-    if completed_milestones:
-        delays = [m.get("days_delta", 0) or 0 for m in completed_milestones]
-        avg_delay = sum(delays) / len(delays) if delays else 0
+    sched_get = schedule.get
+    milestones = sched_get("milestones", [])
+    critical_path_delay_cause = sched_get("critical_path_delay_cause")
+    completed_count = in_progress_count = 0
+    delay_sum = 0
+    for m in milestones:
+        status = m.get("status")
+        if status == "complete":
+            completed_count += 1
+            delay_sum += m.get("days_delta") or 0
+        elif status == "in_progress":
+            in_progress_count += 1
+    avg_delay = delay_sum / completed_count if completed_count else 0
 
     schedule_analysis = {
-        "days_elapsed": schedule.get("days_elapsed", 0),
-        "days_behind": schedule.get("days_behind", 0),
-        "days_ahead": schedule.get("days_ahead", 0),
-        "critical_path_delay_cause": schedule.get("critical_path_delay_cause"),
+        "days_elapsed": sched_get("days_elapsed", 0),
+        "days_behind": sched_get("days_behind", 0),
+        "days_ahead": sched_get("days_ahead", 0),
+        "critical_path_delay_cause": critical_path_delay_cause,
         "total_milestones": len(milestones),
-        "completed_milestones": len(completed_milestones),
-        "in_progress_milestones": len(in_progress_milestones),
+        "completed_milestones": completed_count,
+        "in_progress_milestones": in_progress_count,
         "avg_milestone_delay_days": round(avg_delay, 1),
         "milestones": milestones,
     }
 
     # ── Change Order Summary ──
-    approved_cos = [co for co in change_orders if co.get("status") == "approved"]
-    pending_cos = [co for co in change_orders if co.get("status") == "pending"]
     co_summary = {
         "total_count": len(change_orders),
-        "approved_count": len(approved_cos),
-        "pending_count": len(pending_cos),
-        "approved_value": sum(co.get("amount", 0) for co in approved_cos),
-        "pending_value": sum(co.get("amount", 0) for co in pending_cos),
-        "total_schedule_impact_days": sum(co.get("impact_days", 0) for co in change_orders),
+        "approved_count": approved_count,
+        "pending_count": pending_count,
+        "approved_value": approved_value,
+        "pending_value": pending_value,
+        "total_schedule_impact_days": total_impact_days,
         "items": change_orders,
     }
 
@@ -2841,44 +3765,20 @@ def _compute_project_metrics(project: dict) -> dict:
     broken_assumptions = []
     assumptions = proposal.get("key_assumptions", [])
     # Cross-reference assumptions with risk flags and schedule data
+    rf_joined = "\n".join(risk_flags).lower()
+    delay_cause = (critical_path_delay_cause or "").lower()
     for assumption in assumptions:
         a_lower = assumption.lower()
-        is_broken = False
         reason = ""
-        if "rock" in a_lower and any("rock" in rf.lower() for rf in risk_flags):
-            is_broken = True
-            reason = "Rock excavation encountered — contradicts assumption"
-        elif "fuel" in a_lower:
-            # Check if fuel costs show up in risk flags
-            if any("fuel" in rf.lower() for rf in risk_flags):
-                is_broken = True
-                reason = "Fuel costs exceeded assumed rate"
-        elif "winter" in a_lower or "weather" in a_lower:
-            if schedule.get("days_behind", 0) > 30:
-                is_broken = True
-                reason = "Schedule delays pushed work into winter season"
-        elif "subcontractor" in a_lower:
-            if any("subcontractor" in rf.lower() or "sub" in rf.lower() for rf in risk_flags):
-                is_broken = True
-                reason = "Subcontractor availability issues encountered"
-            elif schedule.get("critical_path_delay_cause") and "subcontractor" in schedule["critical_path_delay_cause"].lower():
-                is_broken = True
-                reason = "Subcontractor delay impacted critical path"
-        elif "blasting" in a_lower:
-            if any("blast" in rf.lower() for rf in risk_flags):
-                is_broken = True
-                reason = "Blasting volumes exceeded geological survey predictions"
-        elif "retaining wall" in a_lower or "redesign" in a_lower:
-            if any("redesign" in rf.lower() or "retaining" in rf.lower() for rf in risk_flags):
-                is_broken = True
-                reason = "Retaining wall required redesign due to field conditions"
-        elif "endangered" in a_lower or "environmental" in a_lower:
-            if any("raptor" in rf.lower() or "environmental" in rf.lower() for rf in risk_flags):
-                is_broken = True
-                reason = "Environmental mitigation required for raptor nesting"
+        for keywords, checks, settles in _ASSUMPTION_RULES:
+            if not any(kw in a_lower for kw in keywords):
+                continue
+            reason = next((why for check, why in checks if check(rf_joined, schedule, delay_cause)), "")
+            if reason or settles:
+                break
         broken_assumptions.append({
             "assumption": assumption,
-            "status": "broken" if is_broken else "holding",
+            "status": "broken" if reason else "holding",
             "reason": reason,
         })
 
@@ -2918,37 +3818,55 @@ def _compute_project_metrics(project: dict) -> dict:
     }
 
 
+# Serialized metrics keyed by a digest of the project's JSON. The computation is pure,
+# so replaying a scenario skips it; entries are decoded per call so every run gets its
+# own mutable objects (same approach as _JSON_CACHE).
+_PROJECT_METRICS_CACHE: dict[bytes, bytes] = {}
+_PROJECT_METRICS_CACHE_MAX = 256
+
+
+def _cached_project_metrics(project: dict) -> dict:
+    key = hashlib.sha256(orjson.dumps(project, option=orjson.OPT_NON_STR_KEYS)).digest()
+    cached = _PROJECT_METRICS_CACHE.get(key)
+    if cached is None:
+        if len(_PROJECT_METRICS_CACHE) >= _PROJECT_METRICS_CACHE_MAX:
+            del _PROJECT_METRICS_CACHE[next(iter(_PROJECT_METRICS_CACHE))]
+        cached = _PROJECT_METRICS_CACHE[key] = orjson.dumps(_compute_project_metrics(project))
+    return orjson.loads(cached)
+
+
+def _is_bool(value: Any) -> bool:
+    return isinstance(value, bool)
+
+
+# Required fields of a project analysis as (key, check, message), in validation order
+_PROJECT_ANALYSIS_CHECKS: tuple[tuple[str, Callable[[Any], bool], str], ...] = (
+    ("executive_summary", _is_non_empty_string, "executive_summary is required"),
+    ("root_cause_analysis", _is_non_empty_string, "root_cause_analysis is required"),
+    ("recommendation", _is_non_empty_string, "recommendation is required"),
+    ("proposal_vs_actual_insight", _is_non_empty_string, "proposal_vs_actual_insight is required"),
+    ("labor_insight", _is_non_empty_string, "labor_insight is required"),
+    ("schedule_insight", _is_non_empty_string, "schedule_insight is required"),
+    ("create_task", _is_bool, "create_task must be boolean"),
+    ("status_color", _is_non_empty_string, "status_color is required (green/amber/red)"),
+    ("finding", _is_non_empty_string, "finding is required (on_track/at_risk/behind_schedule)"),
+)
+
+
 def _validate_single_project_analysis(payload: dict[str, Any]) -> list[str]:
     """Validator for a single project's LLM analysis output."""
-    errors: list[str] = []
-    if not _is_non_empty_string(payload.get("executive_summary")):
-        errors.append("executive_summary is required")
-    if not _is_non_empty_string(payload.get("root_cause_analysis")):
-        errors.append("root_cause_analysis is required")
-    if not _is_non_empty_string(payload.get("recommendation")):
-        errors.append("recommendation is required")
-    if not _is_non_empty_string(payload.get("proposal_vs_actual_insight")):
-        errors.append("proposal_vs_actual_insight is required")
-    if not _is_non_empty_string(payload.get("labor_insight")):
-        errors.append("labor_insight is required")
-    if not _is_non_empty_string(payload.get("schedule_insight")):
-        errors.append("schedule_insight is required")
-    if not isinstance(payload.get("create_task"), bool):
-        errors.append("create_task must be boolean")
-    if not _is_non_empty_string(payload.get("status_color")):
-        errors.append("status_color is required (green/amber/red)")
-    if not _is_non_empty_string(payload.get("finding")):
-        errors.append("finding is required (on_track/at_risk/behind_schedule)")
+    get = payload.get
+    errors = [message for key, check, message in _PROJECT_ANALYSIS_CHECKS if not check(get(key))]
     # reasoning_chain should be a list of strings
-    chain = payload.get("reasoning_chain")
+    chain = get("reasoning_chain")
     if not isinstance(chain, list) or len(chain) < 3:
         errors.append("reasoning_chain must be an array of at least 3 reasoning steps")
     return errors
 
 
 # ── Per-project thinking lines (shown while LLM reasons through each project) ──
-_PROJECT_THINKING: dict[str, list[str]] = {
-    "behind_schedule": [
+_PROJECT_THINKING: Mapping[str, tuple[str, ...]] = MappingProxyType({
+    "behind_schedule": (
         "Reviewing earned value metrics — CPI below 1.0 indicates cost overrun...",
         "Checking which cost codes are driving the variance...",
         "Analyzing labor productivity against original bid assumptions...",
@@ -2959,8 +3877,8 @@ _PROJECT_THINKING: dict[str, list[str]] = {
         "Reviewing risk flags and their connection to field conditions...",
         "Determining root cause — is this a labor, material, or scope issue?...",
         "Formulating corrective action recommendations for the PM...",
-    ],
-    "at_risk": [
+    ),
+    "at_risk": (
         "Earned value shows potential overrun — investigating cost drivers...",
         "Examining cost code actuals vs budget at current percent complete...",
         "Checking if labor rate variance is structural or temporary...",
@@ -2971,8 +3889,8 @@ _PROJECT_THINKING: dict[str, list[str]] = {
         "Assessing productivity index against original bid estimates...",
         "Determining if risk level warrants escalation to senior leadership...",
         "Building recommendations based on leading indicator trends...",
-    ],
-    "on_track": [
+    ),
+    "on_track": (
         "Verifying earned value metrics align with schedule progress...",
         "Checking cost code performance across all categories...",
         "Confirming labor productivity is meeting or exceeding bid estimates...",
@@ -2981,9 +3899,9 @@ _PROJECT_THINKING: dict[str, list[str]] = {
         "Checking for any early warning signs in recent cost trends...",
         "Assessing change order pipeline for potential scope growth...",
         "Confirming projected margin is within acceptable range of target...",
-    ],
-}
-_PROJECT_THINKING_DEFAULT = [
+    ),
+})
+_PROJECT_THINKING_DEFAULT = (
     "Loading project financials and comparing to original proposal...",
     "Analyzing cost performance index and earned value metrics...",
     "Reviewing labor hours, rates, and productivity trends...",
@@ -2992,7 +3910,115 @@ _PROJECT_THINKING_DEFAULT = [
     "Calculating projected margin and estimate at completion...",
     "Reviewing change orders and risk flags...",
     "Formulating executive assessment and recommendations...",
-]
+)
+
+
+def _columns(rows: Sequence[dict[str, Any]], *keys: str) -> tuple[tuple[Any, ...], ...]:
+    """Transpose ``rows`` into one tuple per key (two or more keys) in a single pass."""
+    return tuple(zip(*map(itemgetter(*keys), rows))) or ((),) * len(keys)
+
+
+# Per-project LLM calls allowed in flight at once during progress tracking.
+_PROJECT_LLM_CONCURRENCY = 4
+
+
+# Per-project analysis fields, shared by the single and batched progress prompts.
+_PROJECT_ANALYSIS_SPEC = (
+    "- finding: on_track / at_risk / behind_schedule\n"
+    "- status_color: green / amber / red\n"
+    "- reasoning_chain: array of 5-8 strings, each a distinct analytical step you took to reach your conclusion. "
+    "Example: ['CPI of 0.73 indicates $0.73 earned for every $1.00 spent — 27% cost overrun', "
+    "'Earthwork cost code is the primary driver at 42% over earned value', ...]. "
+    "Each step should reference specific numbers from the data.\n"
+    "- executive_summary: 2-3 sentence high-level status for a CFO\n"
+    "- root_cause_analysis: 3-5 sentence paragraph explaining WHY the project is in its current state. "
+    "For at_risk/behind projects, reference specific broken proposal assumptions, cost code overruns, "
+    "labor productivity issues, and schedule delays. For on_track projects, highlight strengths and watch items.\n"
+    "- proposal_vs_actual_insight: 2-3 sentences comparing the original bid assumptions to field reality\n"
+    "- labor_insight: 2-3 sentences about labor productivity, overtime, rate variances\n"
+    "- schedule_insight: 2-3 sentences about schedule performance and milestone trends\n"
+    "- financial_risk_level: high / medium / low\n"
+    "- schedule_risk_level: high / medium / low\n"
+    "- recommendation: 2-3 sentence specific, actionable recommendation for the PM\n"
+    "- create_task: boolean (true for at_risk/behind_schedule)\n"
+    "- task_title: string if create_task\n"
+    "- task_priority: high / medium / low\n\n"
+    "CRITICAL: Reference specific dollar amounts, percentages, cost codes, and metrics from the data below. "
+    "The reasoning_chain is the most important field — it shows HOW you arrived at your assessment."
+)
+
+
+async def _reason_about_project(pname: str, metrics: dict[str, Any]) -> LLMResult:
+    """LLM deep-reasoning over one project's pre-computed metrics."""
+    return await llm_json_response(
+        agent_id="progress_tracking",
+        objective=(
+            f"You are a senior construction project analyst reviewing '{pname}' for a CFO/executive audience.\n"
+            "All numbers have been pre-computed — DO NOT recalculate any figures.\n\n"
+            "Analyze this project deeply and return a JSON object with:\n"
+            + _PROJECT_ANALYSIS_SPEC
+        ),
+        context_payload={
+            "project_metrics": metrics,
+        },
+        max_tokens=2000,
+        temperature=0.2,
+        validator=_validate_single_project_analysis,
+    )
+
+
+@lru_cache(maxsize=16)
+def _make_project_batch_validator(count: int) -> Callable[[dict[str, Any]], list[str]]:
+    def validator(payload: dict[str, Any]) -> list[str]:
+        analyses = payload.get("analyses")
+        if not isinstance(analyses, list) or len(analyses) != count:
+            return [f"analyses must be an array of exactly {count} project analyses"]
+        errors: list[str] = []
+        for idx, analysis in enumerate(analyses):
+            if not isinstance(analysis, dict):
+                errors.append(f"analyses[{idx}] must be an object")
+                continue
+            errors.extend(f"analyses[{idx}]: {err}" for err in _validate_single_project_analysis(analysis))
+        return errors
+
+    validator.cache_params = count
+    return validator
+
+
+async def _reason_about_projects(batch: list[tuple[str, dict[str, Any]]]) -> list[LLMResult]:
+    """LLM deep-reasoning over projects that share a finding, in one call when batched.
+
+    Token usage for a batched call is split evenly across the projects' results.
+    """
+    if len(batch) == 1:
+        return [await _reason_about_project(*batch[0])]
+    names = ", ".join(f"'{pname}'" for pname, _ in batch)
+    _llm = await llm_json_response(
+        agent_id="progress_tracking",
+        objective=(
+            f"You are a senior construction project analyst reviewing {len(batch)} projects ({names}) "
+            "for a CFO/executive audience.\n"
+            "All numbers have been pre-computed — DO NOT recalculate any figures.\n\n"
+            "Analyze each project deeply and on its own data. Return a JSON object with `analyses`: "
+            f"an array of exactly {len(batch)} objects, one per entry of `projects` in the same order, "
+            "each with:\n"
+            + _PROJECT_ANALYSIS_SPEC
+        ),
+        context_payload={
+            "projects": [metrics for _, metrics in batch],
+        },
+        max_tokens=2000 * len(batch),
+        temperature=0.2,
+        validator=_make_project_batch_validator(len(batch)),
+    )
+    prompt_shares = _split_tokens(_llm.prompt_tokens, len(batch))
+    completion_shares = _split_tokens(_llm.completion_tokens, len(batch))
+    return [
+        LLMResult(data=analysis, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        for analysis, prompt_tokens, completion_tokens in zip(
+            _llm.data["analyses"], prompt_shares, completion_shares
+        )
+    ]
 
 
 async def run_progress_tracking(conn, emitter: EventEmitter) -> dict[str, Any]:
@@ -3005,236 +4031,226 @@ async def run_progress_tracking(conn, emitter: EventEmitter) -> dict[str, Any]:
         "Will analyze each project individually — comparing proposal estimates to actuals, "
         "computing earned value metrics, and assessing labor productivity."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     await emitter.emit_tool_call("connect_vista_api", {"system": "Vista ERP", "module": "Job Cost"})
-    await asyncio.sleep(0.2)
+    await emit_tick()
     await emitter.emit_tool_result(
         "connect_vista_api",
         {"status": "connected", "modules": ["Job Cost", "Payroll", "Project Management"]},
         "Connected to Vista ERP — Job Cost, Payroll & PM modules.",
     )
-    await asyncio.sleep(0.15)
+    await emit_tick()
 
     # ═══════════════════════════════════════════════════════════════
     # Per-Project Analysis Loop (deterministic compute + individual LLM reasoning)
     # ═══════════════════════════════════════════════════════════════
-    computed_projects = []
+    # Metrics are deterministic, so compute them all up front and start the LLM calls
+    # right away (bounded), one call per project unless PROGRESS_LLM_BATCH_SIZE batches projects
+    # that share a finding; the loop below awaits them in project order, which keeps the UI
+    # event stream identical to a sequential run.
+    computed_projects = [_cached_project_metrics(project) for project in projects]
+    batch_size = max(1, get_settings().progress_llm_batch_size)
+    by_finding: dict[str, list[int]] = defaultdict(list)
+    for idx, metrics in enumerate(computed_projects):
+        by_finding[metrics["finding"]].append(idx)
+    batches = sorted(
+        (idxs[start:start + batch_size] for idxs in by_finding.values() for start in range(0, len(idxs), batch_size)),
+        key=itemgetter(0),
+    )
+    llm_gate = asyncio.Semaphore(_PROJECT_LLM_CONCURRENCY)
+
+    async def _bounded_reasoning(batch: list[int]) -> list[LLMResult]:
+        async with llm_gate:
+            return await _reason_about_projects([
+                (projects[idx].get("project_name", "Unknown"), computed_projects[idx]) for idx in batch
+            ])
+
+    llm_tasks = [asyncio.create_task(_bounded_reasoning(batch)) for batch in batches]
+    # project index -> (its batch's task, position within the batch)
+    llm_slots = {
+        idx: (task, pos) for task, batch in zip(llm_tasks, batches) for pos, idx in enumerate(batch)
+    }
     findings = []
+    task_count = 0
+    thinking_commands: asyncio.Queue = asyncio.Queue()
+    thinking_worker = asyncio.create_task(_thinking_worker(emitter, thinking_commands))
 
-    for proj_idx, project in enumerate(projects, start=1):
-        pname = project.get("project_name", "Unknown")
-        pid = project.get("project_id", "")
-
-        # ── Step 1: Announce which project we're analyzing ──
-        await emitter.emit_reasoning(
-            f"Analyzing project {proj_idx} of {len(projects)}: {pname} ({pid}). "
-            f"Loading proposal data, actuals, change orders, and risk flags."
-        )
-        await asyncio.sleep(0.2)
-
-        await emitter.emit_tool_call("load_project_data", {
-            "project": pname,
-            "project_id": pid,
-            "index": f"{proj_idx} of {len(projects)}",
-        })
-        await asyncio.sleep(0.15)
-
-        # ── Step 2: Deterministic computation ──
-        metrics = _compute_project_metrics(project)
-        computed_projects.append(metrics)
-
-        ev = metrics["earned_value_analysis"]
-        la = metrics["labor_analysis"]
-        sa = metrics["schedule_analysis"]
-        finding_status = metrics["finding"]
-        broken = [ba for ba in metrics["broken_assumptions"] if ba["status"] == "broken"]
-        over_budget_codes = [cc for cc in metrics["cost_code_analysis"] if cc.get("over_budget")]
-
-        await emitter.emit_tool_result(
-            "load_project_data",
-            {
-                "project": pname,
-                "contract_value": metrics["contract_value"],
-                "percent_complete": metrics["percent_complete"],
-                "cost_to_date": metrics["total_cost_to_date"],
-                "cost_codes": len(metrics["cost_code_analysis"]),
-                "change_orders": metrics["change_order_summary"]["total_count"],
-                "risk_flags": len(metrics["risk_flags"]),
-            },
-            f"Loaded {pname}: ${metrics['contract_value']:,.0f} contract, "
-            f"{metrics['percent_complete']}% complete, "
-            f"${metrics['total_cost_to_date']:,.0f} spent to date.",
-        )
-        await asyncio.sleep(0.15)
-
-        # ── Step 3: Show earned value computation results ──
-        await emitter.emit_tool_call("compute_earned_value", {
-            "project": pname,
-            "earned_value": ev["earned_value"],
-            "actual_cost": ev["actual_cost"],
-        })
-        await asyncio.sleep(0.1)
-        await emitter.emit_tool_result(
-            "compute_earned_value",
-            {
-                "cpi": ev["cpi"],
-                "eac": ev["eac"],
-                "etc": ev["etc"],
-                "vac": ev["vac"],
-                "projected_margin_pct": ev["projected_margin_pct"],
-            },
-            f"CPI: {ev['cpi']:.2f} | EAC: ${ev['eac']:,.0f} | "
-            f"Projected Margin: {ev['projected_margin_pct']:.1f}%"
-            + (f" | {len(over_budget_codes)} cost codes over budget" if over_budget_codes else ""),
-        )
-        await asyncio.sleep(0.15)
-
-        # ── Step 4: Show labor analysis results ──
-        await emitter.emit_tool_call("analyze_labor_productivity", {
-            "project": pname,
-            "actual_hours": la["actual_hours"],
-            "estimated_hours": la["estimated_hours"],
-        })
-        await asyncio.sleep(0.1)
-        await emitter.emit_tool_result(
-            "analyze_labor_productivity",
-            {
-                "productivity_index": la["productivity_index"],
-                "hours_variance": la["hours_variance"],
-                "overtime_pct": la["overtime_pct"],
-                "rate_impact": la["rate_impact_dollars"],
-            },
-            f"Productivity: {la['productivity_index']:.2f} | "
-            f"Hours variance: {la['hours_variance']:+,.0f} | "
-            f"Overtime: {la['overtime_pct']:.1f}% | "
-            f"Rate impact: ${la['rate_impact_dollars']:+,.0f}",
-        )
-        await asyncio.sleep(0.15)
-
-        # ── Step 5: LLM deep-reasoning on this single project ──
-        await emitter.emit_reasoning(
-            f"Running AI analysis on {pname} — evaluating cost performance, labor trends, "
-            f"schedule risk, and proposal assumptions against field data."
-        )
-        await asyncio.sleep(0.2)
-
-        await emitter.emit_tool_call("reason_about_project", {
-            "project": pname,
-            "cpi": ev["cpi"],
-            "broken_assumptions": len(broken),
-            "over_budget_codes": len(over_budget_codes),
-            "schedule_days_behind": sa["days_behind"],
-        })
-
-        # Start background thinking stream while LLM processes this project
-        thinking_lines = _PROJECT_THINKING.get(finding_status, _PROJECT_THINKING_DEFAULT)
-        thinking_task = asyncio.create_task(
-            _run_thinking_stream(emitter, thinking_lines, interval=1.8)
-        )
-
-        try:
-            _llm = await llm_json_response(
-                agent_id="progress_tracking",
-                objective=(
-                    f"You are a senior construction project analyst reviewing '{pname}' for a CFO/executive audience.\n"
-                    "All numbers have been pre-computed — DO NOT recalculate any figures.\n\n"
-                    "Analyze this project deeply and return a JSON object with:\n"
-                    "- finding: on_track / at_risk / behind_schedule\n"
-                    "- status_color: green / amber / red\n"
-                    "- reasoning_chain: array of 5-8 strings, each a distinct analytical step you took to reach your conclusion. "
-                    "Example: ['CPI of 0.73 indicates $0.73 earned for every $1.00 spent — 27% cost overrun', "
-                    "'Earthwork cost code is the primary driver at 42% over earned value', ...]. "
-                    "Each step should reference specific numbers from the data.\n"
-                    "- executive_summary: 2-3 sentence high-level status for a CFO\n"
-                    "- root_cause_analysis: 3-5 sentence paragraph explaining WHY the project is in its current state. "
-                    "For at_risk/behind projects, reference specific broken proposal assumptions, cost code overruns, "
-                    "labor productivity issues, and schedule delays. For on_track projects, highlight strengths and watch items.\n"
-                    "- proposal_vs_actual_insight: 2-3 sentences comparing the original bid assumptions to field reality\n"
-                    "- labor_insight: 2-3 sentences about labor productivity, overtime, rate variances\n"
-                    "- schedule_insight: 2-3 sentences about schedule performance and milestone trends\n"
-                    "- financial_risk_level: high / medium / low\n"
-                    "- schedule_risk_level: high / medium / low\n"
-                    "- recommendation: 2-3 sentence specific, actionable recommendation for the PM\n"
-                    "- create_task: boolean (true for at_risk/behind_schedule)\n"
-                    "- task_title: string if create_task\n"
-                    "- task_priority: high / medium / low\n\n"
-                    "CRITICAL: Reference specific dollar amounts, percentages, cost codes, and metrics from the data below. "
-                    "The reasoning_chain is the most important field — it shows HOW you arrived at your assessment."
+    try:
+        for proj_idx, (project, metrics) in enumerate(zip(projects, computed_projects), start=1):
+            pname = project.get("project_name", "Unknown")
+            pid = project.get("project_id", "")
+
+            ev = metrics["earned_value_analysis"]
+            la = metrics["labor_analysis"]
+            sa = metrics["schedule_analysis"]
+            finding_status = metrics["finding"]
+            broken = [ba for ba in metrics["broken_assumptions"] if ba["status"] == "broken"]
+            over_budget_codes = [cc for cc in metrics["cost_code_analysis"] if cc.get("over_budget")]
+
+            # Steps 1-5 only surface pre-computed metrics, so they go out as one batch
+            await emitter.emit_batch([
+                # ── Step 1: Announce which project we're analyzing ──
+                EventEmitter.reasoning_event(
+                    f"Analyzing project {proj_idx} of {len(projects)}: {pname} ({pid}). "
+                    f"Loading proposal data, actuals, change orders, and risk flags."
                 ),
-                context_payload={
-                    "project_metrics": metrics,
-                },
-                max_tokens=2000,
-                temperature=0.2,
-                validator=_validate_single_project_analysis,
+                EventEmitter.tool_call_event("load_project_data", {
+                    "project": pname,
+                    "project_id": pid,
+                    "index": f"{proj_idx} of {len(projects)}",
+                }),
+                # ── Step 2: Surface the pre-computed metrics ──
+                EventEmitter.tool_result_event(
+                    "load_project_data",
+                    {
+                        "project": pname,
+                        "contract_value": metrics["contract_value"],
+                        "percent_complete": metrics["percent_complete"],
+                        "cost_to_date": metrics["total_cost_to_date"],
+                        "cost_codes": len(metrics["cost_code_analysis"]),
+                        "change_orders": metrics["change_order_summary"]["total_count"],
+                        "risk_flags": len(metrics["risk_flags"]),
+                    },
+                    f"Loaded {pname}: ${metrics['contract_value']:,.0f} contract, "
+                    f"{metrics['percent_complete']}% complete, "
+                    f"${metrics['total_cost_to_date']:,.0f} spent to date.",
+                ),
+                # ── Step 3: Show earned value computation results ──
+                EventEmitter.tool_call_event("compute_earned_value", {
+                    "project": pname,
+                    "earned_value": ev["earned_value"],
+                    "actual_cost": ev["actual_cost"],
+                }),
+                EventEmitter.tool_result_event(
+                    "compute_earned_value",
+                    {
+                        "cpi": ev["cpi"],
+                        "eac": ev["eac"],
+                        "etc": ev["etc"],
+                        "vac": ev["vac"],
+                        "projected_margin_pct": ev["projected_margin_pct"],
+                    },
+                    f"CPI: {ev['cpi']:.2f} | EAC: ${ev['eac']:,.0f} | "
+                    f"Projected Margin: {ev['projected_margin_pct']:.1f}%"
+                    + (f" | {len(over_budget_codes)} cost codes over budget" if over_budget_codes else ""),
+                ),
+                # ── Step 4: Show labor analysis results ──
+                EventEmitter.tool_call_event("analyze_labor_productivity", {
+                    "project": pname,
+                    "actual_hours": la["actual_hours"],
+                    "estimated_hours": la["estimated_hours"],
+                }),
+                EventEmitter.tool_result_event(
+                    "analyze_labor_productivity",
+                    {
+                        "productivity_index": la["productivity_index"],
+                        "hours_variance": la["hours_variance"],
+                        "overtime_pct": la["overtime_pct"],
+                        "rate_impact": la["rate_impact_dollars"],
+                    },
+                    f"Productivity: {la['productivity_index']:.2f} | "
+                    f"Hours variance: {la['hours_variance']:+,.0f} | "
+                    f"Overtime: {la['overtime_pct']:.1f}% | "
+                    f"Rate impact: ${la['rate_impact_dollars']:+,.0f}",
+                ),
+                # ── Step 5: LLM deep-reasoning on this single project ──
+                EventEmitter.reasoning_event(
+                    f"Running AI analysis on {pname} — evaluating cost performance, labor trends, "
+                    f"schedule risk, and proposal assumptions against field data."
+                ),
+                EventEmitter.tool_call_event("reason_about_project", {
+                    "project": pname,
+                    "cpi": ev["cpi"],
+                    "broken_assumptions": len(broken),
+                    "over_budget_codes": len(over_budget_codes),
+                    "schedule_days_behind": sa["days_behind"],
+                }),
+            ])
+
+            # Play this project's thinking script on the shared worker while the LLM finishes
+            thinking_commands.put_nowait(
+                (_PROJECT_THINKING.get(finding_status, _PROJECT_THINKING_DEFAULT), 1.8)
             )
-        finally:
-            thinking_task.cancel()
+            llm_task, llm_pos = llm_slots[proj_idx - 1]
             try:
-                await thinking_task
-            except asyncio.CancelledError:
-                pass
-
-        project_analysis = _llm.data
-        await emitter.emit_llm(
-            "tool_result",
-            {"tool": "llm_analysis", "result": {}, "summary": f"AI analysis complete for {pname}"},
-            message=f"LLM analysis for {pname}",
-            prompt_tokens=_llm.prompt_tokens,
-            completion_tokens=_llm.completion_tokens,
-        )
+                _llm = (await llm_task)[llm_pos]
+            finally:
+                await _stop_thinking(thinking_commands, thinking_worker)
+
+            project_analysis = _llm.data
+            await emitter.emit_llm(
+                "tool_result",
+                {"tool": "llm_analysis", "result": {}, "summary": f"AI analysis complete for {pname}"},
+                message=f"LLM analysis for {pname}",
+                prompt_tokens=_llm.prompt_tokens,
+                completion_tokens=_llm.completion_tokens,
+            )
 
-        # Enrich the analysis with project identifiers
-        project_analysis["project_id"] = pid
-        project_analysis["project_name"] = pname
+            # Enrich the analysis with project identifiers
+            project_analysis["project_id"] = pid
+            project_analysis["project_name"] = pname
 
-        # Emit the reasoning chain as visible reasoning steps
-        reasoning_chain = project_analysis.get("reasoning_chain", [])
-        for step in reasoning_chain:
-            await emitter.emit_thinking(f"→ {step}")
-            await asyncio.sleep(0.3)
+            # Emit the reasoning chain as visible reasoning steps
+            reasoning_chain = project_analysis.get("reasoning_chain", [])
+            for step in reasoning_chain:
+                await emitter.emit_thinking(f"→ {step}")
+                await emit_tick()
 
-        status_label = project_analysis.get("finding", finding_status).replace("_", " ").title()
-        risk_level = project_analysis.get("financial_risk_level", "medium")
+            status_label = project_analysis.get("finding", finding_status).replace("_", " ").title()
+            risk_level = project_analysis.get("financial_risk_level", "medium")
 
-        await emitter.emit_tool_result(
-            "reason_about_project",
-            {
-                "project": pname,
-                "finding": project_analysis.get("finding", finding_status),
-                "financial_risk": risk_level,
-                "schedule_risk": project_analysis.get("schedule_risk_level", "medium"),
-                "reasoning_steps": len(reasoning_chain),
-            },
-            f"{pname}: {status_label} — Financial Risk: {risk_level.upper()} | "
-            f"Reasoning: {len(reasoning_chain)} analytical steps",
-        )
-        await asyncio.sleep(0.15)
+            await emitter.emit_tool_result(
+                "reason_about_project",
+                {
+                    "project": pname,
+                    "finding": project_analysis.get("finding", finding_status),
+                    "financial_risk": risk_level,
+                    "schedule_risk": project_analysis.get("schedule_risk_level", "medium"),
+                    "reasoning_steps": len(reasoning_chain),
+                },
+                f"{pname}: {status_label} — Financial Risk: {risk_level.upper()} | "
+                f"Reasoning: {len(reasoning_chain)} analytical steps",
+            )
+            await emit_tick()
 
-        findings.append(project_analysis)
+            findings.append(project_analysis)
 
-        # Create internal task if flagged
-        if bool(project_analysis.get("create_task")):
-            title = str(project_analysis.get("task_title", "")).strip() or f"PM follow-up: {pname}"
-            description = str(project_analysis.get("executive_summary", "")).strip() or "Flagged project risk."
-            priority = str(project_analysis.get("task_priority", "")).strip() or "high"
-            await insert_internal_task(conn, "progress_tracking", title, description, priority)
+            # Create internal task if flagged
+            if bool(project_analysis.get("create_task")):
+                title = str(project_analysis.get("task_title", "")).strip() or f"PM follow-up: {pname}"
+                description = str(project_analysis.get("executive_summary", "")).strip() or "Flagged project risk."
+                priority = str(project_analysis.get("task_priority", "")).strip() or "high"
+                await insert_internal_task(conn, "progress_tracking", title, description, priority)
+                task_count += 1
+    finally:
+        thinking_worker.cancel()
+        for task in llm_tasks:
+            task.cancel()
+        await asyncio.gather(thinking_worker, *llm_tasks, return_exceptions=True)
 
     # ═══════════════════════════════════════════════════════════════
     # Portfolio Summary (deterministic)
     # ═══════════════════════════════════════════════════════════════
-    total_contract = sum(p["contract_value"] for p in computed_projects)
-    total_estimated = sum(p["estimated_cost"] for p in computed_projects)
-    total_cost_to_date = sum(p["total_cost_to_date"] for p in computed_projects)
-    total_eac = sum(p["earned_value_analysis"]["eac"] for p in computed_projects)
-    total_projected_revenue = sum(p["earned_value_analysis"]["projected_revenue"] for p in computed_projects)
-    total_projected_margin = sum(p["earned_value_analysis"]["projected_margin"] for p in computed_projects)
+    contract_values, estimated_costs, costs_to_date, pct_completes, ev_analyses = _columns(
+        computed_projects,
+        "contract_value", "estimated_cost", "total_cost_to_date", "percent_complete", "earned_value_analysis",
+    )
+    eacs, projected_revenues, projected_margins = _columns(
+        ev_analyses, "eac", "projected_revenue", "projected_margin"
+    )
+    total_contract = sum(contract_values)
+    total_estimated = sum(estimated_costs)
+    total_cost_to_date = sum(costs_to_date)
+    total_eac = sum(eacs)
+    total_projected_revenue = sum(projected_revenues)
+    total_projected_margin = sum(projected_margins)
     portfolio_margin_pct = (total_projected_margin / total_projected_revenue * 100) if total_projected_revenue > 0 else 0
-    on_track = sum(1 for f in findings if f.get("finding") == "on_track")
-    at_risk = sum(1 for f in findings if f.get("finding") == "at_risk")
-    behind = sum(1 for f in findings if f.get("finding") == "behind_schedule")
-    weighted_pct = sum(p["percent_complete"] * p["contract_value"] for p in computed_projects)
+    finding_counts = Counter(f.get("finding") for f in findings)
+    on_track = finding_counts["on_track"]
+    at_risk = finding_counts["at_risk"]
+    behind = finding_counts["behind_schedule"]
+    weighted_pct = sum(map(mul, pct_completes, contract_values))
     portfolio_pct_complete = round(weighted_pct / total_contract, 1) if total_contract > 0 else 0
 
     kpi_summary = {
@@ -3253,7 +4269,6 @@ async def run_progress_tracking(conn, emitter: EventEmitter) -> dict[str, Any]:
         "behind_count": behind,
     }
 
-    task_count = sum(1 for f in findings if f.get("create_task"))
     await emitter.emit_reasoning(
         f"Portfolio analysis complete. {len(findings)} projects assessed: "
         f"{on_track} on track, {at_risk} at risk, {behind} behind schedule. "
@@ -3281,16 +4296,16 @@ async def run_maintenance_scheduler(conn, emitter: EventEmitter) -> dict[str, An
         f"Loading equipment maintenance records. Scanning {len(equipment)} units including "
         "excavators, loaders, trucks, and generators for overdue service, wear indicators, and safety issues."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     await emitter.emit_tool_call("scan_maintenance_records", {"equipment_count": len(equipment)})
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await emitter.emit_reasoning(
         "Checking each unit's service history, hour meter readings, and last inspection dates "
         "against manufacturer-recommended maintenance intervals."
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     _llm = await llm_json_response(
         agent_id="maintenance_scheduler",
@@ -3313,7 +4328,7 @@ async def run_maintenance_scheduler(conn, emitter: EventEmitter) -> dict[str, An
     await emitter.emit_reasoning(
         f"Scan complete. Found {len(issues)} maintenance issue(s). Processing each and creating work orders as needed."
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     for issue in issues:
         if not isinstance(issue, dict):
@@ -3323,7 +4338,7 @@ async def run_maintenance_scheduler(conn, emitter: EventEmitter) -> dict[str, An
         severity = str(issue.get("severity", "")).strip()
 
         await emitter.emit_tool_call("inspect_unit", {"unit": unit, "severity": severity})
-        await asyncio.sleep(0.1)
+        await emit_tick()
 
         if bool(issue.get("create_task")):
             priority = str(issue.get("task_priority", "")).strip() or (
@@ -3342,7 +4357,7 @@ async def run_maintenance_scheduler(conn, emitter: EventEmitter) -> dict[str, An
             {"unit": unit, "issue": issue.get("issue", ""), "severity": severity, "action": issue.get("action", "")},
             f"{unit}: {issue.get('issue', 'issue detected')} [{severity}] — {issue.get('action', '')}",
         )
-        await asyncio.sleep(0.15)
+        await emit_tick()
 
     # Build fleet summary
     sev_counts = {"critical": 0, "high": 0, "medium": 0, "low": 0}
@@ -3361,6 +4376,12 @@ async def run_maintenance_scheduler(conn, emitter: EventEmitter) -> dict[str, An
     return {"issues": issues, "fleet_summary": fleet_summary}
 
 
+@lru_cache(maxsize=256)
+def _issue_type_key(raw: str) -> str:
+    """Normalized, interned training issue type; the handful of distinct values are cached."""
+    return sys.intern(raw.lower().replace(" ", "_"))
+
+
 async def run_training_compliance(conn, emitter: EventEmitter) -> dict[str, Any]:
     payload = await load_json("hr_certifications.json")
     employees = payload.get("employees", [])
@@ -3369,16 +4390,16 @@ async def run_training_compliance(conn, emitter: EventEmitter) -> dict[str, Any]
         f"Loading HR certification records. Auditing {len(employees)} employees for OSHA, "
         "first aid, equipment operator, and safety certification compliance."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     await emitter.emit_tool_call("audit_employee_certifications", {"employee_count": len(employees)})
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await emitter.emit_reasoning(
         "Checking each employee's certification expiration dates, required training completions, "
         "and cross-referencing with job role requirements."
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     _llm = await llm_json_response(
         agent_id="training_compliance",
@@ -3401,51 +4422,59 @@ async def run_training_compliance(conn, emitter: EventEmitter) -> dict[str, Any]
     await emitter.emit_reasoning(
         f"Compliance audit complete. Found {len(issues)} issue(s). Reviewing each employee and creating remediation tasks."
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
+    # Summary aggregates are collected in the same pass that emits each issue
+    non_compliant_names: set[str] = set()
+    type_counts: Counter[str] = Counter()
+    # Remediation tasks are written in one batch after the loop
+    task_rows: list[tuple[str, str, str, Optional[str]]] = []
     for issue in issues:
         if not isinstance(issue, dict):
             continue
 
         name = issue.get("name", "Employee")
         issue_type = issue.get("issue_type", "")
+        non_compliant_names.add(issue.get("name", ""))
+        type_counts[_issue_type_key(str(issue.get("issue_type", "expired")))] += 1
 
         await emitter.emit_tool_call("check_employee", {"employee": name, "issue_type": issue_type})
-        await asyncio.sleep(0.1)
+        await emit_tick()
 
         if bool(issue.get("create_task")):
-            await insert_internal_task(
-                conn,
-                "training_compliance",
+            task_rows.append((
                 f"Training compliance: {name}",
                 str(issue.get("detail", "")).strip() or "Model-generated compliance issue.",
                 str(issue.get("task_priority", "")).strip() or "high",
-            )
+                None,
+            ))
 
         await emitter.emit_tool_result(
             "check_employee",
             {"employee": name, "issue_type": issue_type, "detail": issue.get("detail", ""), "task_created": bool(issue.get("create_task"))},
             f"{name}: {issue_type.replace('_', ' ')} — {issue.get('detail', '')}",
         )
-        await asyncio.sleep(0.15)
+        await emit_tick()
+
+    await insert_internal_tasks_many(conn, "training_compliance", task_rows)
 
-    # Build training compliance summary
-    type_counts = {}
-    for iss in issues:
-        t = str(iss.get("issue_type", "expired")).lower().replace(" ", "_")
-        type_counts[t] = type_counts.get(t, 0) + 1
     training_summary = {
         "total_employees": len(employees),
-        "non_compliant": len(set(iss.get("name", "") for iss in issues)),
-        "compliant": len(employees) - len(set(iss.get("name", "") for iss in issues)),
+        "non_compliant": len(non_compliant_names),
+        "compliant": len(employees) - len(non_compliant_names),
         "issues_found": len(issues),
-        "type_counts": type_counts,
+        "type_counts": dict(type_counts),
     }
 
     await emitter.emit_status_change("complete", f"Training audit finished: {len(issues)} issue(s) across {len(employees)} employees.")
     return {"issues": issues, "training_summary": training_summary}
 
 
+# Checklist statuses counted as done / underway in the onboarding summary; anything else is pending
+_ONBOARDING_STATUS_COMPLETE = frozenset({"complete", "completed", "done", "issued"})
+_ONBOARDING_STATUS_IN_PROGRESS = frozenset({"in_progress", "in progress", "scheduled", "pending_review"})
+
+
 async def run_onboarding(conn, emitter: EventEmitter) -> dict[str, Any]:
     payload = await load_json("onboarding_new_hire.json")
 
@@ -3455,26 +4484,26 @@ async def run_onboarding(conn, emitter: EventEmitter) -> dict[str, Any]:
         f"Loading new hire data for {hire_name} ({hire_role}). "
         "Building comprehensive onboarding checklist including documents, training, and equipment."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     await emitter.emit_tool_call("load_new_hire", {"name": hire_name, "role": hire_role})
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await emitter.emit_tool_result(
         "load_new_hire",
         {"name": hire_name, "role": hire_role},
         f"Loaded new hire profile: {hire_name}, {hire_role}.",
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await emitter.emit_reasoning(
         "Generating onboarding workflow: required documentation, safety training schedule, "
         "equipment assignments, and welcome communications."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     await emitter.emit_tool_call("run_onboarding_workflow", {"hire": hire_name})
-    await asyncio.sleep(0.1)
+    await emit_tick()
 
     _llm = await llm_json_response(
         agent_id="onboarding",
@@ -3517,10 +4546,10 @@ async def run_onboarding(conn, emitter: EventEmitter) -> dict[str, Any]:
                 {"section": section_name, "items": len(items), "details": items},
                 f"Prepared {len(items)} {section_name} item(s) for {hire.get('name', 'new hire')}.",
             )
-            await asyncio.sleep(0.15)
+            await emit_tick()
 
     await emitter.emit_reasoning(f"Onboarding workflow built. Sending welcome email to {hire.get('name', 'new hire')}.")
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await insert_communication(conn, "onboarding", recipient, subject, body)
     await emitter.emit_communication(recipient, subject, body)
@@ -3535,8 +4564,10 @@ async def run_onboarding(conn, emitter: EventEmitter) -> dict[str, Any]:
     all_items: list[dict[str, Any]] = []
     for section_name in ["documents", "training", "equipment"]:
         all_items.extend(checklist.get(section_name, []))
-    completed = sum(1 for i in all_items if str(i.get("status", "")).lower() in ("complete", "completed", "done", "issued"))
-    in_prog = sum(1 for i in all_items if str(i.get("status", "")).lower() in ("in_progress", "in progress", "scheduled", "pending_review"))
+    # One pass over the items; the buckets then only walk the distinct statuses
+    status_counts = Counter(str(i.get("status", "")).lower() for i in all_items)
+    completed = sum(n for status, n in status_counts.items() if status in _ONBOARDING_STATUS_COMPLETE)
+    in_prog = sum(n for status, n in status_counts.items() if status in _ONBOARDING_STATUS_IN_PROGRESS)
     pending = len(all_items) - completed - in_prog
     onboarding_summary = {
         "total_items": len(all_items),
@@ -3564,22 +4595,235 @@ _THINKING_OVERFLOW = [
 ]
 
 
+@asynccontextmanager
+async def _thinking(stream: Coroutine[Any, Any, None]) -> AsyncIterator[None]:
+    """Run a thinking stream for the duration of the block, cancelling it on exit."""
+    task = asyncio.create_task(stream)
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
 async def _run_thinking_stream(
     emitter: EventEmitter,
-    lines: list[str],
+    lines: Sequence[str],
     interval: float = 1.8,
 ) -> None:
     """Background task that emits thinking lines at intervals until cancelled."""
-    for line in lines:
-        await asyncio.sleep(interval)
+    for delay, line in _thinking_schedule(lines, interval):
+        await asyncio.sleep(delay)
         await emitter.emit_thinking(line)
+
+
+def _thinking_schedule(lines: Sequence[str], interval: float) -> Iterator[tuple[float, str]]:
+    """(delay, line) pairs for a thinking script, endless once the script runs out."""
+    for line in lines:
+        yield interval, line
     # If we run out of scripted lines, cycle through varied overflow lines
     # so the UI never shows a stale repeated message.
-    idx = 0
+    for line in cycle(_THINKING_OVERFLOW):
+        yield 2.5, line
+
+
+_NARRATIVE_FIELD = re.compile(r'"scope_narrative"\s*:\s*"')
+# Body of a JSON string up to its closing quote or the last complete escape sequence
+_JSON_STRING_BODY = re.compile(r'(?:[^"\\]|\\u[0-9a-fA-F]{4}|\\[^u])*')
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+
+class _NarrativePreview:
+    """Collects completed ``scope_narrative`` sentences from a streamed proposal JSON response."""
+
+    def __init__(self) -> None:
+        self.sentences: asyncio.Queue[str] = asyncio.Queue()
+        self._buffer = ""
+        self._start: Optional[int] = None  # buffer offset of the narrative's first raw char
+        self._queued = 0  # decoded narrative chars already queued
+        self._done = False
+
+    async def feed(self, delta: str) -> None:
+        if self._done:
+            return
+        self._buffer += delta
+        if self._start is None:
+            match = _NARRATIVE_FIELD.search(self._buffer)
+            if match is None:
+                return
+            self._start = match.end()
+        body_end = _JSON_STRING_BODY.match(self._buffer, self._start).end()
+        closed = body_end < len(self._buffer) and self._buffer[body_end] == '"'
+        try:
+            # Escapes are decoded as JSON would; a prefix that cannot decode yet waits for more
+            text = orjson.loads(f'"{self._buffer[self._start:body_end]}"')
+        except orjson.JSONDecodeError:
+            return
+        if closed:
+            complete = text[self._queued:]
+            self._done = True
+        else:
+            breaks = list(_SENTENCE_BREAK.finditer(text, self._queued))
+            if not breaks:
+                return
+            complete = text[self._queued:breaks[-1].start()]
+            self._queued = breaks[-1].end()
+        for sentence in _SENTENCE_BREAK.split(complete):
+            if sentence.strip():
+                self.sentences.put_nowait(" ".join(sentence.split()))
+
+    def discard(self) -> None:
+        """Drop unshown sentences and ignore further deltas (the streamed attempt was abandoned)."""
+        self._done = True
+        self._buffer = ""
+        while not self.sentences.empty():
+            self.sentences.get_nowait()
+
+
+async def _show_narrative_preview(emitter: EventEmitter, preview: _NarrativePreview, interval: float) -> None:
+    """Emit drafted narrative sentences as thinking lines, at most one per ``interval``.
+
+    Sentences queued before the task starts are paced out rather than shown in a burst.
+    Runs until cancelled.
+    """
     while True:
-        await asyncio.sleep(2.5)
-        await emitter.emit_thinking(_THINKING_OVERFLOW[idx % len(_THINKING_OVERFLOW)])
-        idx += 1
+        sentence = await preview.sentences.get()
+        await emitter.emit_thinking(f"Drafting: {sentence}")
+        await asyncio.sleep(interval)
+
+
+async def _thinking_worker(emitter: EventEmitter, commands: asyncio.Queue) -> None:
+    """Long-lived thinking stream shared across a run's LLM calls.
+
+    ``commands`` carries ``(lines, interval)`` to start a script or ``None`` to go quiet;
+    a new command interrupts the current script. Runs until cancelled.
+    """
+    script = None
+    try:
+        while True:
+            if script is None:
+                script = await commands.get()
+                commands.task_done()
+                continue
+            lines, interval = script
+            script = None
+            for delay, line in _thinking_schedule(lines, interval):
+                try:
+                    async with asyncio.timeout(delay):
+                        script = await commands.get()
+                except TimeoutError:
+                    await emitter.emit_thinking(line)
+                    continue
+                commands.task_done()
+                break
+    finally:
+        # Never leave _stop_thinking blocked in join() if the worker dies.
+        while not commands.empty():
+            commands.get_nowait()
+            commands.task_done()
+
+
+async def _stop_thinking(commands: asyncio.Queue, worker: asyncio.Task) -> None:
+    """Silence the thinking worker and wait until it has no emit in flight."""
+    commands.put_nowait(None)
+    if not worker.done():
+        await commands.join()
+    if worker.done():
+        worker.result()
+
+
+# Estimate markups in report order: (schedule key, label, default rate, percent format spec)
+_MARKUP_COMPONENTS: tuple[tuple[str, str, float, str], ...] = (
+    ("overhead", "Overhead", 0.12, ".0f"),
+    ("profit", "Profit", 0.10, ".0f"),
+    ("contingency", "Contingency", 0.05, ".0f"),
+    ("bond", "Bond", 0.015, ".1f"),
+    ("mobilization", "Mobilization", 0.03, ".0f"),
+)
+
+_MARKUPS_REASONING_TEMPLATE = (
+    "All {categories} categories priced. Direct cost total: ${direct_cost:,.0f}. "
+    "Applying standard markups — {breakdown}."
+)
+_MARKUP_LINE_TEMPLATE = "{label} {pct}: ${amount:,.0f}"
+
+# Shared read-only fallback for takeoff items with no cost-database rates
+_NO_RATES: Mapping[str, float] = MappingProxyType({})
+
+
+# Per-category thinking lines (shown while LLM works)
+# ~10 lines × 1.6s interval = ~16 seconds of coverage before overflow kicks in
+_CATEGORY_THINKING: Mapping[str, tuple[str, ...]] = MappingProxyType({
+    "Earthwork": (
+        "Calculating bulk excavation volumes for mass grading...",
+        "Cross-referencing dozer and loader production rates against soil conditions...",
+        "Applying crew composition factors for cut-and-fill operations...",
+        "Checking fill import quantities against material haul distances...",
+        "Estimating topsoil strip depth and stockpile handling costs...",
+        "Verifying compaction testing allowances in the equipment rates...",
+        "Comparing cut-fill balance to determine net import or export...",
+        "Factoring in equipment mobilization and site access constraints...",
+        "Reviewing fine grading tolerances and finish grade requirements...",
+        "Validating earthwork unit prices against recent bid tabulations...",
+    ),
+    "Utilities": (
+        "Mapping utility trench depths and widths for each run...",
+        "Looking up pipe material costs by diameter — 6-inch through 18-inch...",
+        "Factoring in bedding material and backfill requirements per linear foot...",
+        "Calculating manhole installation labor based on depth and connection count...",
+        "Checking dewatering allowances for shallow groundwater conditions...",
+        "Pricing fire hydrant assemblies including tees, valves, and thrust blocks...",
+        "Estimating storm drain inlet costs with precast frames and grates...",
+        "Reviewing sanitary sewer service lateral connection details...",
+        "Applying trench safety and shoring costs for deeper utility runs...",
+        "Verifying utility testing and inspection allowances per specification...",
+    ),
+    "Paving": (
+        "Computing asphalt tonnage from area and specified section thickness...",
+        "Pricing aggregate base course by the cubic yard including placement...",
+        "Applying paving crew mobilization costs for phased installation...",
+        "Verifying tack coat and prime coat rates against current supplier pricing...",
+        "Calculating compaction and density testing requirements for base course...",
+        "Reviewing HMA mix design specifications and plant delivery distances...",
+        "Checking for phased paving requirements to maintain traffic flow...",
+        "Estimating saw-cut and joint layout costs for pavement sections...",
+    ),
+    "Concrete": (
+        "Estimating concrete yardage for curb, gutter, and sidewalk sections...",
+        "Applying form and finish labor rates based on linear footage...",
+        "Factoring in reinforcement and dowel requirements per the plans...",
+        "Checking concrete pump and placement costs for accessible pours...",
+        "Calculating driveway apron dimensions and transition details...",
+        "Reviewing ADA-compliant ramp and detectable warning requirements...",
+        "Pricing expansion joint material and saw-cut control joints...",
+        "Estimating cure-and-seal application costs per square foot...",
+    ),
+    "Erosion Control": (
+        "Calculating silt fence and inlet protection quantities from the SWPPP...",
+        "Pricing hydroseeding by the acre including mobilization...",
+        "Factoring in maintenance and inspection costs over the project duration...",
+        "Checking stabilized construction entrance specifications against site access...",
+        "Reviewing NPDES permit compliance requirements and reporting costs...",
+        "Estimating temporary sediment basin sizing and removal costs...",
+        "Pricing erosion control blanket installation on disturbed slopes...",
+        "Calculating seeding and mulching rates for final stabilization...",
+    ),
+})
+_DEFAULT_CATEGORY_THINKING = (
+    "Analyzing quantity takeoff data for this scope category...",
+    "Cross-referencing unit rates against the cost database...",
+    "Computing labor, material, and equipment costs per line item...",
+    "Verifying totals and checking for pricing anomalies...",
+    "Reviewing quantity measurements against plan details...",
+    "Applying waste and overrun factors to material quantities...",
+    "Checking for scope items that may require specialized equipment...",
+    "Reconciling calculated costs with database rate structure...",
+)
+
+
+# Category pricing LLM calls allowed in flight at once in the cost estimator.
+_CATEGORY_LLM_CONCURRENCY = 4
 
 
 async def run_cost_estimator(conn, emitter: EventEmitter) -> dict[str, Any]:
@@ -3591,11 +4835,10 @@ async def run_cost_estimator(conn, emitter: EventEmitter) -> dict[str, Any]:
     markup_schedule = payload.get("markup_schedule", {})
 
     # Group takeoff items by category (preserve order)
-    categories_map: dict[str, list[dict[str, Any]]] = {}
+    categories_map: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
     for item in takeoff:
-        cat = item.get("category", "Other")
-        categories_map.setdefault(cat, []).append(item)
-    category_names = list(categories_map.keys())
+        categories_map[item.get("category", "Other")].append(item)
+    category_names = tuple(categories_map)
 
     # ═══════════════════════════════════════════════════════════════
     # Phase 1: Load & Preview Takeoff
@@ -3610,7 +4853,7 @@ async def run_cost_estimator(conn, emitter: EventEmitter) -> dict[str, Any]:
         + ", ".join(f"{c} ({len(items)})" for c, items in categories_map.items())
         + ". Will price each category against the company cost database."
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await emitter.emit_tool_call("load_takeoff_data", {
         "project": project.get("name", ""),
@@ -3619,16 +4862,13 @@ async def run_cost_estimator(conn, emitter: EventEmitter) -> dict[str, Any]:
         "line_items": len(takeoff),
         "categories": len(category_names),
     })
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     # Build takeoff preview table for activity stream
-    takeoff_preview_lines = []
-    for cat_name in category_names:
-        takeoff_preview_lines.append(f"── {cat_name} ──")
-        for ti in categories_map[cat_name]:
-            takeoff_preview_lines.append(
-                f"  {ti['item']}: {ti['quantity']:,} {ti['unit']}"
-            )
+    takeoff_preview = "\n".join(chain.from_iterable(
+        (f"── {cat_name} ──", *(f"  {ti['item']}: {ti['quantity']:,} {ti['unit']}" for ti in categories_map[cat_name]))
+        for cat_name in category_names
+    ))
 
     await emitter.emit_tool_result(
         "load_takeoff_data",
@@ -3636,12 +4876,12 @@ async def run_cost_estimator(conn, emitter: EventEmitter) -> dict[str, Any]:
             "project": project.get("name", ""),
             "total_items": len(takeoff),
             "categories": {c: len(items) for c, items in categories_map.items()},
-            "takeoff_preview": "\n".join(takeoff_preview_lines),
+            "takeoff_preview": takeoff_preview,
         },
         f"Loaded takeoff: {len(takeoff)} items across {len(category_names)} categories — "
         + ", ".join(f"{c} ({len(items)})" for c, items in categories_map.items()),
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     # ═══════════════════════════════════════════════════════════════
     # Phase 2: Per-Category Pricing Loop (LLM per category)
@@ -3650,303 +4890,258 @@ async def run_cost_estimator(conn, emitter: EventEmitter) -> dict[str, Any]:
     category_subtotals: dict[str, float] = {}
     category_notes: dict[str, str] = {}
 
-    # Per-category thinking lines (shown while LLM works)
-    # ~10 lines × 1.6s interval = ~16 seconds of coverage before overflow kicks in
-    _category_thinking: dict[str, list[str]] = {
-        "Earthwork": [
-            "Calculating bulk excavation volumes for mass grading...",
-            "Cross-referencing dozer and loader production rates against soil conditions...",
-            "Applying crew composition factors for cut-and-fill operations...",
-            "Checking fill import quantities against material haul distances...",
-            "Estimating topsoil strip depth and stockpile handling costs...",
-            "Verifying compaction testing allowances in the equipment rates...",
-            "Comparing cut-fill balance to determine net import or export...",
-            "Factoring in equipment mobilization and site access constraints...",
-            "Reviewing fine grading tolerances and finish grade requirements...",
-            "Validating earthwork unit prices against recent bid tabulations...",
-        ],
-        "Utilities": [
-            "Mapping utility trench depths and widths for each run...",
-            "Looking up pipe material costs by diameter — 6-inch through 18-inch...",
-            "Factoring in bedding material and backfill requirements per linear foot...",
-            "Calculating manhole installation labor based on depth and connection count...",
-            "Checking dewatering allowances for shallow groundwater conditions...",
-            "Pricing fire hydrant assemblies including tees, valves, and thrust blocks...",
-            "Estimating storm drain inlet costs with precast frames and grates...",
-            "Reviewing sanitary sewer service lateral connection details...",
-            "Applying trench safety and shoring costs for deeper utility runs...",
-            "Verifying utility testing and inspection allowances per specification...",
-        ],
-        "Paving": [
-            "Computing asphalt tonnage from area and specified section thickness...",
-            "Pricing aggregate base course by the cubic yard including placement...",
-            "Applying paving crew mobilization costs for phased installation...",
-            "Verifying tack coat and prime coat rates against current supplier pricing...",
-            "Calculating compaction and density testing requirements for base course...",
-            "Reviewing HMA mix design specifications and plant delivery distances...",
-            "Checking for phased paving requirements to maintain traffic flow...",
-            "Estimating saw-cut and joint layout costs for pavement sections...",
-        ],
-        "Concrete": [
-            "Estimating concrete yardage for curb, gutter, and sidewalk sections...",
-            "Applying form and finish labor rates based on linear footage...",
-            "Factoring in reinforcement and dowel requirements per the plans...",
-            "Checking concrete pump and placement costs for accessible pours...",
-            "Calculating driveway apron dimensions and transition details...",
-            "Reviewing ADA-compliant ramp and detectable warning requirements...",
-            "Pricing expansion joint material and saw-cut control joints...",
-            "Estimating cure-and-seal application costs per square foot...",
-        ],
-        "Erosion Control": [
-            "Calculating silt fence and inlet protection quantities from the SWPPP...",
-            "Pricing hydroseeding by the acre including mobilization...",
-            "Factoring in maintenance and inspection costs over the project duration...",
-            "Checking stabilized construction entrance specifications against site access...",
-            "Reviewing NPDES permit compliance requirements and reporting costs...",
-            "Estimating temporary sediment basin sizing and removal costs...",
-            "Pricing erosion control blanket installation on disturbed slopes...",
-            "Calculating seeding and mulching rates for final stabilization...",
-        ],
-    }
-    _default_thinking = [
-        "Analyzing quantity takeoff data for this scope category...",
-        "Cross-referencing unit rates against the cost database...",
-        "Computing labor, material, and equipment costs per line item...",
-        "Verifying totals and checking for pricing anomalies...",
-        "Reviewing quantity measurements against plan details...",
-        "Applying waste and overrun factors to material quantities...",
-        "Checking for scope items that may require specialized equipment...",
-        "Reconciling calculated costs with database rate structure...",
-    ]
+    # The proposal narrative needs only the project and its scope categories, not the priced
+    # totals, so it is drafted while the categories are being priced.
+    # Streamed, and each finished narrative sentence is shown as a thinking line as soon as it
+    # arrives, interleaved with the pricing feed.
+    narrative_preview = _NarrativePreview()
+    proposal_task = asyncio.create_task(llm_json_response(
+        agent_id=agent_id,
+        on_delta=narrative_preview.feed,
+        on_discard=narrative_preview.discard,
+        objective=(
+            "Write the narrative sections for a professional construction cost proposal. "
+            f"Project: {project.get('name', '')} — {project.get('description', '')}. "
+            f"Location: {project.get('location', '')}. Client: {project.get('client', '')}. "
+            f"Scope categories: {', '.join(category_names)}. "
+            "Return JSON with these keys:\n"
+            "- scope_narrative: 2-3 paragraph professional description of the work\n"
+            "- assumptions: array of 5-7 strings (soil conditions, access, working hours, "
+            "weather, material availability, utilities, subgrade)\n"
+            "- exclusions: array of 4-6 strings (building construction, electrical/mechanical, "
+            "permits, design changes, hazmat, landscaping beyond seeding)\n"
+            "- schedule_statement: 1 sentence estimated project duration\n"
+            "- validity_statement: 1 sentence pricing validity period"
+        ),
+        context_payload={
+            "project": project,
+            "categories": category_names,
+        },
+        max_tokens=1500,
+        temperature=0.2,
+        validator=validate_proposal_narrative,
+        model="anthropic/claude-opus-4",
+    ))
 
-    for cat_idx, cat_name in enumerate(category_names, start=1):
-        cat_items = categories_map[cat_name]
+    # Drafted sentences queue up while pricing runs and are shown once its reporting is done,
+    # so they never interleave with the per-category pricing feed
+    preview_task: Optional[asyncio.Task] = None
 
-        await emitter.emit_status_change(
-            "working", f"Pricing category {cat_idx} of {len(category_names)}: {cat_name}"
-        )
-        await update_agent_status(
-            conn, agent_id, status="working",
-            current_activity=f"Pricing {cat_name} ({cat_idx}/{len(category_names)})",
-        )
+    # Everything up to the await runs while the proposal call is in flight; if any of it
+    # fails, the proposal request is cancelled rather than left running after the run ends.
+    try:
+        # Categories are priced independently, so every pricing call starts now (bounded). By
+        # default each category gets its own call; with ESTIMATOR_LLM_BATCH_TOKENS set,
+        # consecutive categories share a call while their context fits that budget. The loop
+        # below reports each call's categories as soon as it completes.
+        pricing_gate = asyncio.Semaphore(_CATEGORY_LLM_CONCURRENCY)
+        # Each category's rate table is resolved once, shared by its summary and its pricing call.
+        category_rates = {c: cost_database.get(c, {}) for c in category_names}
+        batch_tokens = get_settings().estimator_llm_batch_tokens
+        pricing_batches: list[list[int]] = []
+        batch_size_tokens = 0
+        for cat_pos, cat_name in enumerate(category_names):
+            # Rough chars-per-token estimate of the category's share of the prompt
+            cat_tokens = len(dumps_json([categories_map[cat_name], category_rates[cat_name]])) // 4
+            if batch_tokens > 0 and pricing_batches and batch_size_tokens + cat_tokens <= batch_tokens:
+                pricing_batches[-1].append(cat_pos)
+                batch_size_tokens += cat_tokens
+            else:
+                pricing_batches.append([cat_pos])
+                batch_size_tokens = cat_tokens
+
+        async def _bounded_pricing(batch: list[int]) -> tuple[list[int], list[LLMResult]]:
+            async with pricing_gate:
+                return batch, await cost_estimate_price_categories(
+                    agent_id=agent_id,
+                    batch=[
+                        (category_names[pos], categories_map[category_names[pos]], category_rates[category_names[pos]])
+                        for pos in batch
+                    ],
+                    first_index=batch[0] + 1,
+                    total_categories=len(category_names),
+                    model="anthropic/claude-opus-4",
+                )
 
-        await emitter.emit_reasoning(
-            f"Pricing {cat_name} — {len(cat_items)} items. "
-            f"Looking up labor, material, and equipment rates from cost database."
-        )
+        pricing_tasks = [asyncio.create_task(_bounded_pricing(batch)) for batch in pricing_batches]
+        # category -> (line items, subtotal, notes), filled in completion order and assembled
+        # in takeoff order afterwards so totals and the proposal stay deterministic
+        priced: dict[str, tuple[list[dict[str, Any]], float, str]] = {}
 
-        # Show the rates being looked up
-        cat_rates = cost_database.get(cat_name, {})
-        await emitter.emit_tool_call("lookup_cost_database", {
-            "category": cat_name,
-            "items": len(cat_items),
-            "rates_available": len(cat_rates),
-        })
-        await asyncio.sleep(0.15)
-
-        rates_summary_parts = []
-        for ti in cat_items:
-            item_name = ti["item"]
-            rates = cat_rates.get(item_name, {})
-            rates_summary_parts.append(
-                f"{item_name}: L=${rates.get('labor_rate', 0)}/unit, "
-                f"M=${rates.get('material_rate', 0)}/unit, "
-                f"E=${rates.get('equipment_rate', 0)}/unit"
-            )
+        try:
+            # Each batch's categories are reported as soon as that batch lands, rather than
+            # behind slower calls for earlier categories.
+            for finished in asyncio.as_completed(pricing_tasks):
+                waiting_on = next(c for c in category_names if c not in priced)
+                thinking_lines = _CATEGORY_THINKING.get(waiting_on, _DEFAULT_CATEGORY_THINKING)
+                async with _thinking(_run_thinking_stream(emitter, thinking_lines, interval=1.6)):
+                    batch, batch_results = await finished
+
+                for cat_pos, _llm in zip(batch, batch_results):
+                    cat_idx = cat_pos + 1
+                    cat_name = category_names[cat_pos]
+                    cat_items = categories_map[cat_name]
+
+                    await emitter.emit_status_change(
+                        "working", f"Pricing category {cat_idx} of {len(category_names)}: {cat_name}"
+                    )
+                    await update_agent_status(
+                        conn, agent_id, status="working",
+                        current_activity=f"Pricing {cat_name} ({cat_idx}/{len(category_names)})",
+                    )
 
-        await emitter.emit_tool_result(
-            "lookup_cost_database",
-            {"category": cat_name, "rates_found": len(cat_rates)},
-            f"Found rates for {len(cat_rates)} items in {cat_name}:\n" + "\n".join(rates_summary_parts),
-        )
-        await asyncio.sleep(0.15)
+                    await emitter.emit_reasoning(
+                        f"Pricing {cat_name} — {len(cat_items)} items. "
+                        f"Looking up labor, material, and equipment rates from cost database."
+                    )
 
-        # Start thinking stream while LLM works
-        thinking_lines = _category_thinking.get(cat_name, _default_thinking)
-        thinking_task = asyncio.create_task(
-            _run_thinking_stream(emitter, thinking_lines, interval=1.6)
-        )
+                    # Show the rates being looked up
+                    cat_rates = category_rates[cat_name]
+                    await emitter.emit_tool_call("lookup_cost_database", {
+                        "category": cat_name,
+                        "items": len(cat_items),
+                        "rates_available": len(cat_rates),
+                    })
+                    await emit_tick()
+
+                    rate_get = cat_rates.get
+                    rates_summary = "\n".join(
+                        f"{ti['item']}: L=${(r := rate_get(ti['item'], _NO_RATES)).get('labor_rate', 0)}/unit, "
+                        f"M=${r.get('material_rate', 0)}/unit, "
+                        f"E=${r.get('equipment_rate', 0)}/unit"
+                        for ti in cat_items
+                    )
 
-        # LLM call to price this category
-        try:
-            _llm = await cost_estimate_price_category(
-                agent_id=agent_id,
-                category=cat_name,
-                items=cat_items,
-                cost_db=cost_database,
-                category_index=cat_idx,
-                total_categories=len(category_names),
-                model="anthropic/claude-opus-4",
-            )
-        finally:
-            thinking_task.cancel()
-            try:
-                await thinking_task
-            except asyncio.CancelledError:
-                pass
-
-        cat_result = _llm.data
-
-        await emitter.emit_llm(
-            "tool_result",
-            {"tool": "llm_analysis", "result": {}, "summary": f"Priced {cat_name}"},
-            message=f"LLM pricing for {cat_name}",
-            prompt_tokens=_llm.prompt_tokens,
-            completion_tokens=_llm.completion_tokens,
-        )
+                    await emitter.emit_tool_result(
+                        "lookup_cost_database",
+                        {"category": cat_name, "rates_found": len(cat_rates)},
+                        f"Found rates for {len(cat_rates)} items in {cat_name}:\n{rates_summary}",
+                    )
+                    await emit_tick()
 
-        cat_subtotal = float(cat_result.get("category_subtotal", 0))
-        cat_line_items = cat_result.get("line_items", [])
+                    cat_result = _llm.data
 
-        # Tag each line item with category for assembly
-        for li in cat_line_items:
-            li["category"] = cat_name
-        all_line_items.extend(cat_line_items)
+                    await emitter.emit_llm(
+                        "tool_result",
+                        {"tool": "llm_analysis", "result": {}, "summary": f"Priced {cat_name}"},
+                        message=f"LLM pricing for {cat_name}",
+                        prompt_tokens=_llm.prompt_tokens,
+                        completion_tokens=_llm.completion_tokens,
+                    )
 
-        category_subtotals[cat_name] = round(cat_subtotal, 2)
-        category_notes[cat_name] = cat_result.get("category_notes", "")
+                    cat_subtotal = float(cat_result.get("category_subtotal", 0))
+                    cat_line_items = cat_result.get("line_items", [])
+
+                    # Tag each line item with category for assembly
+                    for li in cat_line_items:
+                        li["category"] = cat_name
+                    priced[cat_name] = (cat_line_items, round(cat_subtotal, 2), cat_result.get("category_notes", ""))
+
+                    await emitter.emit_tool_call("price_category", {
+                        "category": cat_name,
+                        "items_priced": len(cat_line_items),
+                        "category_subtotal": round(cat_subtotal, 2),
+                    })
+                    await emitter.emit_tool_result(
+                        "price_category",
+                        {
+                            "category": cat_name,
+                            "items_priced": len(cat_line_items),
+                            "category_subtotal": round(cat_subtotal, 2),
+                        },
+                        f"{cat_name}: {len(cat_line_items)} items priced — subtotal ${cat_subtotal:,.0f}",
+                    )
+                    await emit_tick()
+        finally:
+            for task in pricing_tasks:
+                task.cancel()
+            await asyncio.gather(*pricing_tasks, return_exceptions=True)
 
-        await emitter.emit_tool_call("price_category", {
-            "category": cat_name,
-            "items_priced": len(cat_line_items),
-            "category_subtotal": round(cat_subtotal, 2),
-        })
-        await emitter.emit_tool_result(
-            "price_category",
-            {
-                "category": cat_name,
-                "items_priced": len(cat_line_items),
-                "category_subtotal": round(cat_subtotal, 2),
-            },
-            f"{cat_name}: {len(cat_line_items)} items priced — subtotal ${cat_subtotal:,.0f}",
-        )
-        await asyncio.sleep(0.15)
+        for cat_name in category_names:
+            cat_line_items, category_subtotals[cat_name], category_notes[cat_name] = priced[cat_name]
+            all_line_items.extend(cat_line_items)
 
-    # ═══════════════════════════════════════════════════════════════
-    # Phase 3: Apply Markups (deterministic — no LLM)
-    # ═══════════════════════════════════════════════════════════════
-    direct_cost_total = round(sum(category_subtotals.values()), 2)
-
-    overhead_rate = markup_schedule.get("overhead", 0.12)
-    profit_rate = markup_schedule.get("profit", 0.10)
-    contingency_rate = markup_schedule.get("contingency", 0.05)
-    bond_rate = markup_schedule.get("bond", 0.015)
-    mobilization_rate = markup_schedule.get("mobilization", 0.03)
-
-    markups = {
-        "overhead": round(direct_cost_total * overhead_rate, 2),
-        "profit": round(direct_cost_total * profit_rate, 2),
-        "contingency": round(direct_cost_total * contingency_rate, 2),
-        "bond": round(direct_cost_total * bond_rate, 2),
-        "mobilization": round(direct_cost_total * mobilization_rate, 2),
-    }
-    total_markups = round(sum(markups.values()), 2)
-    grand_total = round(direct_cost_total + total_markups, 2)
+        preview_task = asyncio.create_task(_show_narrative_preview(emitter, narrative_preview, interval=1.8))
 
-    await emitter.emit_status_change("working", "Applying markups")
-    await update_agent_status(conn, agent_id, status="working", current_activity="Applying markups")
+        # ═══════════════════════════════════════════════════════════════
+        # Phase 3: Apply Markups (deterministic — no LLM)
+        # ═══════════════════════════════════════════════════════════════
+        direct_cost_total = round(sum(category_subtotals.values()), 2)
 
-    await emitter.emit_reasoning(
-        f"All {len(category_names)} categories priced. Direct cost total: ${direct_cost_total:,.0f}. "
-        f"Applying standard markups — "
-        f"Overhead {overhead_rate*100:.0f}%: ${markups['overhead']:,.0f}, "
-        f"Profit {profit_rate*100:.0f}%: ${markups['profit']:,.0f}, "
-        f"Contingency {contingency_rate*100:.0f}%: ${markups['contingency']:,.0f}, "
-        f"Bond {bond_rate*100:.1f}%: ${markups['bond']:,.0f}, "
-        f"Mobilization {mobilization_rate*100:.0f}%: ${markups['mobilization']:,.0f}."
-    )
-    await asyncio.sleep(0.2)
-
-    await emitter.emit_tool_call("apply_markups", {
-        "direct_cost": direct_cost_total,
-        "overhead": f"{overhead_rate*100:.0f}%",
-        "profit": f"{profit_rate*100:.0f}%",
-        "contingency": f"{contingency_rate*100:.0f}%",
-        "bond": f"{bond_rate*100:.1f}%",
-        "mobilization": f"{mobilization_rate*100:.0f}%",
-    })
-    await asyncio.sleep(0.15)
+        markup_rates = {key: markup_schedule.get(key, default) for key, _, default, _ in _MARKUP_COMPONENTS}
+        markups = {key: round(direct_cost_total * rate, 2) for key, rate in markup_rates.items()}
+        markup_pcts = {key: f"{markup_rates[key]*100:{pct_spec}}%" for key, _, _, pct_spec in _MARKUP_COMPONENTS}
+        total_markups = round(sum(markups.values()), 2)
+        grand_total = round(direct_cost_total + total_markups, 2)
 
-    await emitter.emit_tool_result(
-        "apply_markups",
-        {
-            "direct_cost": direct_cost_total,
-            "markups": markups,
-            "total_markups": total_markups,
-            "grand_total": grand_total,
-        },
-        f"Markups applied: ${total_markups:,.0f} on ${direct_cost_total:,.0f} direct cost. Grand total: ${grand_total:,.0f}",
-    )
-    await asyncio.sleep(0.15)
+        await emitter.emit_status_change("working", "Applying markups")
+        await update_agent_status(conn, agent_id, status="working", current_activity="Applying markups")
 
-    # ═══════════════════════════════════════════════════════════════
-    # Phase 4: Generate Proposal Narrative (1 LLM call)
-    # ═══════════════════════════════════════════════════════════════
-    await emitter.emit_status_change("working", "Generating proposal narrative")
-    await update_agent_status(conn, agent_id, status="working", current_activity="Generating proposal narrative")
+        await emitter.emit_reasoning(_MARKUPS_REASONING_TEMPLATE.format_map({
+            "categories": len(category_names),
+            "direct_cost": direct_cost_total,
+            "breakdown": ", ".join(
+                _MARKUP_LINE_TEMPLATE.format_map({"label": label, "pct": markup_pcts[key], "amount": markups[key]})
+                for key, label, _, _ in _MARKUP_COMPONENTS
+            ),
+        }))
+        await emit_tick()
 
-    await emitter.emit_tool_call("generate_proposal", {
-        "project": project.get("name", ""),
-        "grand_total": grand_total,
-        "categories": len(category_names),
-    })
-    await asyncio.sleep(0.1)
-
-    # Thinking stream for proposal generation
-    proposal_thinking_task = asyncio.create_task(
-        _run_thinking_stream(emitter, [
-            "Drafting scope of work narrative for the proposal document...",
-            f"Describing the {len(category_names)} major work categories and their interdependencies...",
-            "Structuring the proposal around site preparation, underground, and surface improvements...",
-            "Compiling standard assumptions for soil conditions, site access, and working hours...",
-            "Documenting material availability and lead time assumptions...",
-            "Identifying exclusions — building construction, electrical, permits, hazmat...",
-            "Noting design change and unforeseen condition exclusions...",
-            "Determining realistic project schedule based on scope complexity and sequencing...",
-            "Factoring in weather-related schedule allowances for the region...",
-            "Finalizing pricing validity period and contractual terms...",
-            "Reviewing proposal language for completeness and professional tone...",
-            "Assembling final proposal sections — scope, assumptions, exclusions, schedule...",
-        ], interval=1.8)
-    )
+        await emitter.emit_tool_call("apply_markups", {"direct_cost": direct_cost_total, **markup_pcts})
+        await emit_tick()
 
-    try:
-        proposal_llm = await llm_json_response(
-            agent_id=agent_id,
-            objective=(
-                "Write the narrative sections for a professional construction cost proposal. "
-                f"Project: {project.get('name', '')} — {project.get('description', '')}. "
-                f"Location: {project.get('location', '')}. Client: {project.get('client', '')}. "
-                f"Scope categories: {', '.join(category_names)}. "
-                f"Direct cost: ${direct_cost_total:,.0f}. Grand total: ${grand_total:,.0f}. "
-                "Return JSON with these keys:\n"
-                "- scope_narrative: 2-3 paragraph professional description of the work\n"
-                "- assumptions: array of 5-7 strings (soil conditions, access, working hours, "
-                "weather, material availability, utilities, subgrade)\n"
-                "- exclusions: array of 4-6 strings (building construction, electrical/mechanical, "
-                "permits, design changes, hazmat, landscaping beyond seeding)\n"
-                "- schedule_statement: 1 sentence estimated project duration\n"
-                "- validity_statement: 1 sentence pricing validity period"
-            ),
-            context_payload={
-                "project": project,
-                "categories": category_names,
-                "category_subtotals": category_subtotals,
-                "category_notes": category_notes,
-                "direct_cost_total": direct_cost_total,
+        await emitter.emit_tool_result(
+            "apply_markups",
+            {
+                "direct_cost": direct_cost_total,
+                "markups": markups,
+                "total_markups": total_markups,
                 "grand_total": grand_total,
             },
-            max_tokens=1500,
-            temperature=0.2,
-            validator=validate_proposal_narrative,
-            model="anthropic/claude-opus-4",
+            f"Markups applied: ${total_markups:,.0f} on ${direct_cost_total:,.0f} direct cost. Grand total: ${grand_total:,.0f}",
         )
+        await emit_tick()
+
+        # ═══════════════════════════════════════════════════════════════
+        # Phase 4: Generate Proposal Narrative (1 LLM call)
+        # ═══════════════════════════════════════════════════════════════
+        await emitter.emit_status_change("working", "Generating proposal narrative")
+        await update_agent_status(conn, agent_id, status="working", current_activity="Generating proposal narrative")
+
+        await emitter.emit_tool_call("generate_proposal", {
+            "project": project.get("name", ""),
+            "grand_total": grand_total,
+            "categories": len(category_names),
+        })
+        await emit_tick()
+
+        # Thinking stream for the rest of proposal generation (drafted sentences keep showing too)
+        async with _thinking(
+            _run_thinking_stream(emitter, [
+                "Drafting scope of work narrative for the proposal document...",
+                f"Describing the {len(category_names)} major work categories and their interdependencies...",
+                "Structuring the proposal around site preparation, underground, and surface improvements...",
+                "Compiling standard assumptions for soil conditions, site access, and working hours...",
+                "Documenting material availability and lead time assumptions...",
+                "Identifying exclusions — building construction, electrical, permits, hazmat...",
+                "Noting design change and unforeseen condition exclusions...",
+                "Determining realistic project schedule based on scope complexity and sequencing...",
+                "Factoring in weather-related schedule allowances for the region...",
+                "Finalizing pricing validity period and contractual terms...",
+                "Reviewing proposal language for completeness and professional tone...",
+                "Assembling final proposal sections — scope, assumptions, exclusions, schedule...",
+            ], interval=1.8)
+        ):
+            proposal_llm = await proposal_task
+    except BaseException:
+        proposal_task.cancel()
+        await asyncio.gather(proposal_task, return_exceptions=True)
+        raise
     finally:
-        proposal_thinking_task.cancel()
-        try:
-            await proposal_thinking_task
-        except asyncio.CancelledError:
-            pass
+        # Sentences still queued once the proposal is in are dropped; the full narrative follows
+        if preview_task is not None:
+            preview_task.cancel()
+            await asyncio.gather(preview_task, return_exceptions=True)
 
     proposal = proposal_llm.data
 
@@ -3963,7 +5158,7 @@ async def run_cost_estimator(conn, emitter: EventEmitter) -> dict[str, Any]:
         {"status": "complete", "assumptions": len(proposal.get("assumptions", [])), "exclusions": len(proposal.get("exclusions", []))},
         f"Proposal narrative generated with {len(proposal.get('assumptions', []))} assumptions and {len(proposal.get('exclusions', []))} exclusions.",
     )
-    await asyncio.sleep(0.1)
+    await emit_tick()
 
     # ═══════════════════════════════════════════════════════════════
     # Assemble final result
@@ -3992,6 +5187,62 @@ async def run_cost_estimator(conn, emitter: EventEmitter) -> dict[str, Any]:
     return result
 
 
+# Inboxes larger than the threshold are routed in chunks of this many emails, several at once
+_INQUIRY_CHUNK_THRESHOLD = 20
+_INQUIRY_CHUNK_SIZE = 8
+_INQUIRY_LLM_CONCURRENCY = 4
+
+
+async def _route_inquiry_batch(payload: dict[str, Any], *, with_email_ids: bool = False) -> LLMResult:
+    objective = (
+        "Route customer inquiries. Return JSON with key routes (array). "
+        "Each route item must include from, subject, route, priority, description."
+    )
+    if with_email_ids:
+        objective += " Each route item must also include the email_id of the email it routes."
+    return await llm_json_response(
+        agent_id="inquiry_router",
+        objective=objective,
+        context_payload=payload,
+        max_tokens=900,
+        temperature=0.1,
+        validator=validate_inquiry_routes,
+    )
+
+
+async def _route_inquiries(payload: dict[str, Any], *, with_email_ids: bool = False) -> LLMResult:
+    """Route the inbox in one LLM call, or in concurrent chunks once it is large.
+
+    Chunk routes are concatenated in inbox order and their token usage is summed. With
+    ``with_email_ids`` the model is asked to echo each email's ``email_id`` on its route.
+    """
+    emails = payload.get("emails", [])
+    if len(emails) <= _INQUIRY_CHUNK_THRESHOLD:
+        return await _route_inquiry_batch(payload, with_email_ids=with_email_ids)
+
+    gate = asyncio.Semaphore(_INQUIRY_LLM_CONCURRENCY)
+
+    async def _bounded(chunk: list[Any]) -> LLMResult:
+        async with gate:
+            return await _route_inquiry_batch({**payload, "emails": chunk}, with_email_ids=with_email_ids)
+
+    tasks = [
+        asyncio.create_task(_bounded(emails[start:start + _INQUIRY_CHUNK_SIZE]))
+        for start in range(0, len(emails), _INQUIRY_CHUNK_SIZE)
+    ]
+    try:
+        results = [await task for task in tasks]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return LLMResult(
+        data={"routes": [route for result in results for route in result.data["routes"]]},
+        prompt_tokens=sum(result.prompt_tokens for result in results),
+        completion_tokens=sum(result.completion_tokens for result in results),
+    )
+
+
 async def run_inquiry_router(conn, emitter: EventEmitter) -> dict[str, Any]:
     payload = await load_json("inquiry_emails.json")
     emails = payload.get("emails", [])
@@ -4000,44 +5251,94 @@ async def run_inquiry_router(conn, emitter: EventEmitter) -> dict[str, Any]:
         f"Loading customer inquiry inbox. Found {len(emails)} incoming emails to classify and route "
         "to the appropriate department (estimating, billing, operations, management)."
     )
-    await asyncio.sleep(0.3)
+    await emit_tick()
 
     await emitter.emit_tool_call("load_inquiry_emails", {"email_count": len(emails)})
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await emitter.emit_reasoning(
         "Analyzing each email's subject, sender, and content to determine the correct department routing, "
         "urgency level, and create appropriate internal tasks."
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
     await emitter.emit_tool_call("route_inquiries", {"emails": len(emails)})
-    await asyncio.sleep(0.1)
-
-    _llm = await llm_json_response(
-        agent_id="inquiry_router",
-        objective=(
-            "Route customer inquiries. Return JSON with key routes (array). "
-            "Each route item must include from, subject, route, priority, description."
-        ),
-        context_payload=payload,
-        max_tokens=900,
-        temperature=0.1,
-        validator=validate_inquiry_routes,
-    )
-    plan = _llm.data
-    await emitter.emit_llm("tool_result", {"tool": "llm_analysis", "result": {}, "summary": "LLM analysis complete"}, message="LLM analysis", prompt_tokens=_llm.prompt_tokens, completion_tokens=_llm.completion_tokens)
+    await emit_tick()
+
+    # With ROUTE_CACHE on, emails already routed recently for the same sender and subject under
+    # the current skills reuse that decision; only the rest go to the model
+    route_cache = get_settings().route_cache
+    if route_cache:
+        skills_digest = hashlib.blake2s(read_skills("inquiry_router").encode(), digest_size=8).hexdigest()
+        cached_routes: list[Optional[dict[str, Any]]] = [
+            _route_cache_get(_route_cache_key(skills_digest, email.get("from", ""), email.get("subject", "")))
+            if isinstance(email, dict) else None
+            for email in emails
+        ]
+    else:
+        cached_routes = [None] * len(emails)
+    miss_positions = [pos for pos, cached in enumerate(cached_routes) if cached is None]
+
+    if miss_positions:
+        if route_cache:
+            # Each email sent to the model carries its inbox position, so its route can be matched
+            # back to it however the model orders or rewrites the routes
+            request = {
+                **payload,
+                "emails": [
+                    {**emails[pos], "email_id": pos} if isinstance(emails[pos], dict) else emails[pos]
+                    for pos in miss_positions
+                ],
+            }
+        else:
+            request = payload
+        _llm = await _route_inquiries(request, with_email_ids=route_cache)
+        plan = _llm.data
+        await emitter.emit_llm("tool_result", {"tool": "llm_analysis", "result": {}, "summary": "LLM analysis complete"}, message="LLM analysis", prompt_tokens=_llm.prompt_tokens, completion_tokens=_llm.completion_tokens)
+        model_routes = plan.get("routes")
+        if not isinstance(model_routes, list):
+            raise RuntimeError("inquiry_router: model output missing routes[]")
+    else:
+        model_routes = []
 
-    routes = plan.get("routes")
-    if not isinstance(routes, list):
-        raise RuntimeError("inquiry_router: model output missing routes[]")
+    # Inbox position each route came from, or None when it is cached or could not be matched
+    route_sources: list[Optional[int]]
+    if not route_cache:
+        routes = model_routes
+        route_sources = [None] * len(routes)
+    else:
+        pending = set(miss_positions)
+        fresh: dict[int, dict[str, Any]] = {}
+        unmatched: list[Any] = []
+        for route in model_routes:
+            email_id = route.get("email_id") if isinstance(route, dict) else None
+            if type(email_id) is int and email_id in pending:
+                pending.discard(email_id)
+                fresh[email_id] = {key: value for key, value in route.items() if key != "email_id"}
+            else:
+                unmatched.append(route)
+        # Routes keep their inbox position; anything the model returned without a usable
+        # email_id follows in model order and is not cached
+        routes, route_sources = [], []
+        for pos, cached in enumerate(cached_routes):
+            if cached is not None:
+                routes.append(dict(cached))
+                route_sources.append(None)
+            elif pos in fresh:
+                routes.append(fresh[pos])
+                route_sources.append(pos)
+        routes.extend(unmatched)
+        route_sources.extend([None] * len(unmatched))
 
     await emitter.emit_reasoning(
         f"Routing decisions complete. Processing {len(routes)} inquiries and creating internal tasks."
     )
-    await asyncio.sleep(0.2)
+    await emit_tick()
 
-    for route in routes:
+    # Validate every route before acting on any, so a bad entry leaves no partial routing behind
+    routed: list[tuple[str, str, str, str, str]] = []
+    cache_writes: list[tuple[int, dict[str, Any]]] = []
+    for route, source in zip(routes, route_sources):
         if not isinstance(route, dict):
             continue
         subject = str(route.get("subject", "")).strip()
@@ -4047,41 +5348,64 @@ async def run_inquiry_router(conn, emitter: EventEmitter) -> dict[str, Any]:
         description = str(route.get("description", "")).strip() or f"From {sender} -> {destination}"
         if not subject or not sender or not destination:
             raise RuntimeError("inquiry_router: route entry missing required fields")
+        routed.append((subject, sender, destination, priority, description))
+        if source is not None:
+            cache_writes.append((
+                source,
+                {"from": sender, "subject": subject, "route": destination, "priority": priority, "description": description},
+            ))
+
+    # Decisions are cached under the inbox email they were made for, not the model's echo of it
+    for source, decision in cache_writes:
+        email = emails[source]
+        _route_cache_put(_route_cache_key(skills_digest, email.get("from", ""), email.get("subject", "")), decision)
+
+    # All routing tasks go in with one executemany before the per-route events are shown
+    await insert_internal_tasks_many(
+        conn,
+        "inquiry_router",
+        [(f"Route customer inquiry: {subject}", description, priority, None)
+         for subject, _, _, priority, description in routed],
+    )
 
-        await emitter.emit_tool_call("route_email", {"from": sender, "subject": subject})
-        await asyncio.sleep(0.1)
-
-        await insert_internal_task(
-            conn,
-            "inquiry_router",
-            f"Route customer inquiry: {subject}",
-            description,
-            priority,
-        )
-
-        await emitter.emit_tool_result(
-            "route_email",
-            {"from": sender, "subject": subject, "route": destination, "priority": priority},
-            f"{sender} → {destination} [{priority}]: {subject}",
-        )
-        await asyncio.sleep(0.15)
+    if len(routed) > get_settings().agent_emit_threshold:
+        # Large inboxes get one bulk call/result pair carrying every route instead of 2N events
+        await emitter.emit_batch([
+            EventEmitter.tool_call_event("route_emails_bulk", {"emails": len(routed)}),
+            EventEmitter.tool_result_event(
+                "route_emails_bulk",
+                {
+                    "routes": [
+                        {"from": sender, "subject": subject, "route": destination, "priority": priority}
+                        for subject, sender, destination, priority, _ in routed
+                    ]
+                },
+                f"Routed {len(routed)} emails",
+            ),
+        ])
+        await emit_tick()
+    else:
+        for subject, sender, destination, priority, _ in routed:
+            await emitter.emit_batch([
+                EventEmitter.tool_call_event("route_email", {"from": sender, "subject": subject}),
+                EventEmitter.tool_result_event(
+                    "route_email",
+                    {"from": sender, "subject": subject, "route": destination, "priority": priority},
+                    f"{sender} → {destination} [{priority}]: {subject}",
+                ),
+            ])
+            await emit_tick()
 
     await emitter.emit_status_change("complete", f"Routed {len(routes)} customer inquiries.")
 
-    # Build inbox summary for frontend
-    dept_counts: dict[str, int] = {}
-    urgent_count = 0
-    for r in routes:
-        if not isinstance(r, dict):
-            continue
-        dept = str(r.get("route", "Other")).strip()
-        dept_counts[dept] = dept_counts.get(dept, 0) + 1
-        if str(r.get("priority", "")).lower() == "high":
-            urgent_count += 1
+    # Inbox summary for frontend, tallied from the validated routes
     inbox_summary = {
         "total_emails": len(routes),
-        "urgent": urgent_count,
-        "departments": dept_counts,
+        # Compared on the model's unstripped priority, as the summary always has
+        "urgent": sum(
+            str(route.get("priority", "")).lower() == "high" for route in routes if isinstance(route, dict)
+        ),
+        "departments": dict(Counter(destination for _, _, destination, _, _ in routed)),
     }
 
     return {"routes": routes, "inbox_summary": inbox_summary}
@@ -4102,7 +5426,7 @@ RUNNERS: dict[str, Callable[[Any, EventEmitter], Any]] = {
 }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RunResult:
     output: dict[str, Any]
     total_cost: float
@@ -4110,80 +5434,110 @@ class RunResult:
     output_tokens: int
 
 
+# Output keys whose list length counts as units processed, in precedence order
+_COMPLETED_TASK_KEYS = ("processed", "results", "findings", "issues", "routes", "conversation")
+
+
 def infer_completed_tasks(output: dict[str, Any]) -> int:
-    candidate_keys = ["processed", "results", "findings", "issues", "routes", "conversation"]
-    for key in candidate_keys:
-        value = output.get(key)
-        if isinstance(value, list):
-            return len(value)
-    return 1
+    return next(
+        (len(value) for key in _COMPLETED_TASK_KEYS if isinstance(value := output.get(key), list)),
+        1,
+    )
+
+
+async def _record_run_finished(conn, agent_id: str, cost: float, tasks_completed: int) -> None:
+    await update_agent_status(
+        conn,
+        agent_id,
+        status="idle",
+        current_activity="Ready",
+        additional_cost=cost,
+        additional_tasks=tasks_completed,
+        set_last_run=True,
+    )
+    await conn.commit()
 
 
 async def run_agent_session(agent_id: str, session_id: str) -> RunResult:
-    if agent_id not in RUNNERS:
+    runner = RUNNERS.get(agent_id)
+    if runner is None:
         raise ValueError(f"Unknown agent id: {agent_id}")
+    try:
+        UUID(session_id)
+    except (TypeError, ValueError):
+        raise ValueError(f"{agent_id}: invalid session id {session_id!r}") from None
     if not llm_enabled():
         raise RuntimeError(
             "Model-only runtime requires USE_REAL_LLM=true and OPENROUTER_API_KEY configured."
         )
 
-    conn = await connect_db()
-    emitter = EventEmitter(conn, session_id, agent_id)
+    async with pooled_db() as conn:
+        emitter = EventEmitter(conn, session_id, agent_id)
 
-    try:
-        await update_agent_status(conn, agent_id, status="working", current_activity="Starting run")
-        await conn.commit()
+        try:
+            await update_agent_status(conn, agent_id, status="working", current_activity="Starting run")
+            await conn.commit()
 
-        runner = RUNNERS[agent_id]
-        output = await runner(conn, emitter)
+            output = await runner(conn, emitter)
 
-        tasks_completed = infer_completed_tasks(output)
-        cost_per_unit = round(emitter.total_cost / max(tasks_completed, 1), 6)
+            tasks_completed = infer_completed_tasks(output)
+            # Run totals as of the end of the runner (the complete event itself is not included)
+            total_cost, total_raw_cost, multiplier, input_tokens, output_tokens = (
+                emitter.total_cost, emitter.total_raw_cost, emitter._multiplier,
+                emitter.total_input_tokens, emitter.total_output_tokens,
+            )
 
-        await emitter.emit(
-            "complete",
-            {
-                "agent_id": agent_id,
-                "output": output,
-                "metrics": {
-                    "cost": round(emitter.total_cost, 6),
-                    "raw_cost": round(emitter.total_raw_cost, 6),
-                    "multiplier": emitter._multiplier,
-                    "input_tokens": emitter.total_input_tokens,
-                    "output_tokens": emitter.total_output_tokens,
-                    "units_processed": tasks_completed,
-                    "cost_per_unit": cost_per_unit,
+            await emitter.emit(
+                "complete",
+                {
+                    "agent_id": agent_id,
+                    "output": output,
+                    "metrics": {
+                        "cost": round(total_cost, 6),
+                        "raw_cost": round(total_raw_cost, 6),
+                        "multiplier": multiplier,
+                        "input_tokens": input_tokens,
+                        "output_tokens": output_tokens,
+                        "units_processed": tasks_completed,
+                        "cost_per_unit": round(total_cost / max(tasks_completed, 1), 6),
+                    },
                 },
-            },
-            message=f"{agent_id} completed run",
-        )
-        await update_agent_status(
-            conn,
-            agent_id,
-            status="idle",
-            current_activity="Ready",
-            additional_cost=emitter.total_cost,
-            additional_tasks=tasks_completed,
-            set_last_run=True,
-        )
-        await conn.commit()
-        await session_manager.mark_done(session_id, output=output)
-
-        return RunResult(
-            output=output,
-            total_cost=round(emitter.total_cost, 6),
-            input_tokens=emitter.total_input_tokens,
-            output_tokens=emitter.total_output_tokens,
-        )
-    except Exception as exc:  # noqa: BLE001
-        await emitter.emit(
-            "error",
-            {"message": str(exc)},
-            message=f"Run failed for {agent_id}: {exc}",
-        )
-        await update_agent_status(conn, agent_id, status="error", current_activity=str(exc)[:120])
-        await conn.commit()
-        await session_manager.mark_done(session_id, output={"error": str(exc)})
-        raise
-    finally:
-        await conn.close()
+                message=f"{agent_id} completed run",
+            )
+            await emitter.flush()
+            # The complete event above is already in the totals; the status write and commit
+            # share the connection in order, while the in-memory session is closed out alongside.
+            # A failure in either cancels the other; the first error is re-raised unwrapped so the
+            # error path below reports it as before.
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    tg.create_task(_record_run_finished(conn, agent_id, emitter.total_cost, tasks_completed))
+                    tg.create_task(session_manager.mark_done(session_id, output=output))
+            except ExceptionGroup as group:
+                raise group.exceptions[0]
+
+            return RunResult(
+                output=output,
+                total_cost=round(emitter.total_cost, 6),
+                input_tokens=emitter.total_input_tokens,
+                output_tokens=emitter.total_output_tokens,
+            )
+        except Exception as exc:  # noqa: BLE001
+            try:
+                await emitter.emit(
+                    "error",
+                    {"message": str(exc)},
+                    message=f"Run failed for {agent_id}: {exc}",
+                )
+                await emitter.aclose()
+            except Exception as log_exc:  # noqa: BLE001
+                # The run's own error is what gets raised; the agent must still leave "working"
+                exc.add_note(f"Activity log write also failed: {log_exc!r}")
+            await update_agent_status(conn, agent_id, status="error", current_activity=str(exc)[:120])
+            await conn.commit()
+            await session_manager.mark_done(session_id, output={"error": str(exc)})
+            raise
+        except BaseException:
+            # Cancelled runs still write what they logged (completed runs flushed above)
+            await emitter.aclose()
+            raise
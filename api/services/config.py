@@ -19,9 +19,25 @@ class Settings(BaseSettings):
     openrouter_base_url: str = "https://openrouter.ai/api/v1"
     llm_timeout_seconds: float = 45.0
     database_path: str = "./data/rpmx.db"
+    # Idle SQLite connections kept open for reuse by agent runs
+    db_pool_size: int = 4
     api_port: int = 8000
     frontend_url: str = "http://localhost:5173"
     skills_dir: str = "./agents"
+    # Pause between agent UI events in milliseconds; 0 disables demo pacing
+    agent_emit_tick_ms: float = 0.0
+    # Route counts above this are shown as one bulk routing event instead of one per email
+    agent_emit_threshold: int = 32
+    # Same-finding projects analyzed per progress-tracking LLM call; 1 = one call per project
+    progress_llm_batch_size: int = 1
+    # Estimated context tokens per combined cost-estimator pricing call; 0 = one call per category
+    estimator_llm_batch_tokens: int = 0
+    # Reuse inquiry routing decisions for repeat sender/subject pairs within the process
+    route_cache: bool = False
+    # Reuse validated JSON results for byte-identical llm_json_response requests within the process
+    llm_cache: bool = False
+    # Fire the first two JSON acquisition attempts concurrently and keep the first valid one
+    speculative_llm: bool = False
 
     # Cost multiplier: projected cost = raw_api_cost * multiplier
     cost_multiplier_global: float = 3.0
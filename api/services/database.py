@@ -1,13 +1,45 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import aiosqlite
 
 from api.services.config import get_settings
 
+# Idle connections kept for reuse across agent runs (aiosqlite connections are not tied to a loop)
+_IDLE: list[aiosqlite.Connection] = []
+
 
-async def connect_db() -> aiosqlite.Connection:
+async def connect_db(*, daemon: bool = False) -> aiosqlite.Connection:
     settings = get_settings()
-    conn = await aiosqlite.connect(settings.resolved_database_path)
+    conn = aiosqlite.connect(settings.resolved_database_path)
+    # Pooled connections must not keep the interpreter alive on exit
+    conn.daemon = daemon
+    await conn
     conn.row_factory = aiosqlite.Row
     await conn.execute("PRAGMA foreign_keys = ON;")
     return conn
+
+
+@asynccontextmanager
+async def pooled_db() -> AsyncIterator[aiosqlite.Connection]:
+    """Borrow a pooled connection; uncommitted work is rolled back when it is returned."""
+    conn = _IDLE.pop() if _IDLE else await connect_db(daemon=True)
+    try:
+        yield conn
+    except BaseException:
+        await conn.close()
+        raise
+    if conn.in_transaction:
+        await conn.rollback()
+    if len(_IDLE) < get_settings().db_pool_size:
+        _IDLE.append(conn)
+    else:
+        await conn.close()
+
+
+async def close_db_pool() -> None:
+    """Close idle pooled connections (app shutdown, demo reset)."""
+    while _IDLE:
+        await _IDLE.pop().close()
@@ -1,16 +1,18 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import weakref
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Any, Awaitable, Callable, Optional
 
 import httpx
+import orjson
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 from api.services.config import get_settings
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LLMResponse:
     """LLM response with real token usage from OpenRouter."""
     text: str
@@ -36,6 +38,37 @@ def _extract_text_from_message(content: Any) -> str:
     return str(content)
 
 
+# One pooled keep-alive client per event loop: httpx connections are bound to the loop
+# that opened them, and scripts/tests may run several loops in one process.
+_CLIENTS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = weakref.WeakKeyDictionary()
+
+
+def _http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        settings = get_settings()
+        if not settings.openrouter_api_key:
+            raise RuntimeError("OPENROUTER_API_KEY is not configured")
+        client = _CLIENTS[loop] = httpx.AsyncClient(
+            base_url=settings.openrouter_base_url,
+            headers={
+                "Authorization": f"Bearer {settings.openrouter_api_key}",
+                "Content-Type": "application/json",
+            },
+            timeout=httpx.Timeout(settings.llm_timeout_seconds),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+    return client
+
+
+async def aclose_llm_client() -> None:
+    """Close the running loop's pooled LLM client (called on app shutdown)."""
+    client = _CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
 @retry(
     retry=retry_if_exception_type((httpx.TimeoutException, httpx.TransportError, RuntimeError)),
     wait=wait_exponential(multiplier=1, min=1, max=8),
@@ -43,19 +76,7 @@ def _extract_text_from_message(content: Any) -> str:
     reraise=True,
 )
 async def _chat_completion_request(payload: dict[str, Any]) -> dict[str, Any]:
-    settings = get_settings()
-    if not settings.openrouter_api_key:
-        raise RuntimeError("OPENROUTER_API_KEY is not configured")
-
-    url = settings.openrouter_base_url.rstrip("/") + "/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {settings.openrouter_api_key}",
-        "Content-Type": "application/json",
-    }
-
-    timeout = httpx.Timeout(settings.llm_timeout_seconds)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.post(url, headers=headers, json=payload)
+    response = await _http_client().post("chat/completions", content=orjson.dumps(payload))
 
     if response.status_code >= 500 or response.status_code in {408, 409, 425, 429}:
         raise RuntimeError(f"OpenRouter temporary error: {response.status_code}")
@@ -64,7 +85,7 @@ async def _chat_completion_request(payload: dict[str, Any]) -> dict[str, Any]:
         detail = response.text[:300]
         raise RuntimeError(f"OpenRouter request failed ({response.status_code}): {detail}")
 
-    return response.json()
+    return orjson.loads(response.content)
 
 
 async def llm_chat_with_usage(
@@ -105,6 +126,67 @@ async def llm_chat_with_usage(
     )
 
 
+async def llm_chat_stream_with_usage(
+    messages: list[dict[str, Any]],
+    temperature: float = 0.2,
+    max_tokens: int = 500,
+    model: Optional[str] = None,
+    *,
+    on_delta: Callable[[str], Awaitable[None]],
+) -> LLMResponse:
+    """Streaming llm_chat_with_usage: ``on_delta`` is awaited with each text chunk as it arrives.
+
+    Not retried, since chunks may already have been delivered; callers fall back to
+    llm_chat_with_usage on failure.
+    """
+    settings = get_settings()
+    if not llm_enabled():
+        raise RuntimeError("Real LLM mode is not enabled")
+
+    payload = {
+        "model": model or settings.openrouter_model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True,
+        "usage": {"include": True},
+    }
+
+    parts: list[str] = []
+    usage: dict[str, Any] = {}
+    async with _http_client().stream("POST", "chat/completions", content=orjson.dumps(payload)) as response:
+        if response.status_code >= 400:
+            detail = (await response.aread()).decode("utf-8", "replace")[:300]
+            raise RuntimeError(f"OpenRouter request failed ({response.status_code}): {detail}")
+        async for line in response.aiter_lines():
+            # SSE: skip blank separators and ": keep-alive" comments
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            chunk = orjson.loads(data)
+            if "error" in chunk:
+                raise RuntimeError(f"OpenRouter stream error: {str(chunk['error'])[:300]}")
+            usage = chunk.get("usage") or usage
+            choices = chunk.get("choices") or [{}]
+            delta = _extract_text_from_message(choices[0].get("delta", {}).get("content") or "")
+            if delta:
+                parts.append(delta)
+                await on_delta(delta)
+
+    text = "".join(parts).strip()
+    if not text:
+        raise RuntimeError("OpenRouter stream did not contain text content")
+
+    return LLMResponse(
+        text=text,
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        completion_tokens=usage.get("completion_tokens", 0),
+        total_tokens=usage.get("total_tokens", 0),
+    )
+
+
 async def llm_chat(
     messages: list[dict[str, str]],
     temperature: float = 0.2,
@@ -122,10 +204,10 @@ def try_parse_json_object(text: str) -> Optional[dict[str, Any]]:
         return None
 
     try:
-        value = json.loads(text)
+        value = orjson.loads(text)
         if isinstance(value, dict):
             return value
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         pass
 
     start = text.find("{")
@@ -135,10 +217,10 @@ def try_parse_json_object(text: str) -> Optional[dict[str, Any]]:
 
     snippet = text[start : end + 1]
     try:
-        value = json.loads(snippet)
+        value = orjson.loads(snippet)
         if isinstance(value, dict):
             return value
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         return None
 
     return None
@@ -62,6 +62,18 @@ class SessionManager:
                 state.done = True
                 state.latest_output = event.get("payload", {}).get("output")
 
+    async def append_events(self, session_id: str, events: list[dict[str, Any]]) -> None:
+        """Append several events under one lock acquisition."""
+        async with self._lock:
+            state = self._sessions.get(session_id)
+            if not state:
+                return
+            state.events.extend(events)
+            for event in events:
+                if event.get("type") == "complete":
+                    state.done = True
+                    state.latest_output = event.get("payload", {}).get("output")
+
     async def mark_done(self, session_id: str, output: Any = None) -> None:
         async with self._lock:
             state = self._sessions.get(session_id)
@@ -9,6 +9,28 @@ class SkillsError(RuntimeError):
     pass
 
 
+# Markdown file contents keyed by path, tagged with (mtime_ns, size) so edits on disk are
+# picked up; write_skills drops its entry so a write within the same mtime tick is never missed
+_TEXT_CACHE: dict[Path, tuple[tuple[int, int], str]] = {}
+
+
+def _read_cached(path: Path) -> str | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        _TEXT_CACHE.pop(path, None)
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _TEXT_CACHE.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = _TEXT_CACHE[path] = (stamp, path.read_text())
+    return cached[1]
+
+
+def clear_skills_cache() -> None:
+    _TEXT_CACHE.clear()
+
+
 def _agent_dir(agent_id: str) -> Path:
     settings = get_settings()
     path = settings.resolved_skills_dir / agent_id
@@ -18,21 +40,22 @@ def _agent_dir(agent_id: str) -> Path:
 
 
 def read_identity(agent_id: str) -> str:
-    path = _agent_dir(agent_id) / "identity.md"
-    if not path.exists():
+    text = _read_cached(_agent_dir(agent_id) / "identity.md")
+    if text is None:
         raise SkillsError(f"Identity file missing for {agent_id}")
-    return path.read_text()
+    return text
 
 
 def read_skills(agent_id: str) -> str:
-    path = _agent_dir(agent_id) / "skills.md"
-    if not path.exists():
+    text = _read_cached(_agent_dir(agent_id) / "skills.md")
+    if text is None:
         raise SkillsError(f"Skills file missing for {agent_id}")
-    return path.read_text()
+    return text
 
 
 def write_skills(agent_id: str, content: str) -> None:
     path = _agent_dir(agent_id) / "skills.md"
+    _TEXT_CACHE.pop(path, None)
     path.write_text(content)
 
 
@@ -74,6 +74,9 @@ CREATE TABLE purchase_orders (
     status TEXT NOT NULL DEFAULT 'open'
 );
 
+-- PO search falls back to matching on amount when the invoice has no PO reference
+CREATE INDEX idx_purchase_orders_amount ON purchase_orders(amount);
+
 CREATE TABLE invoices (
     invoice_number TEXT PRIMARY KEY,
     vendor_id INTEGER NOT NULL REFERENCES vendors(id),
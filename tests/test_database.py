@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from api.services import database
+from api.services.config import get_settings
+
+
+@pytest.fixture
+def pool_db(tmp_path, monkeypatch):
+    path = tmp_path / "pool.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE notes (body TEXT NOT NULL)")
+    monkeypatch.setenv("DATABASE_PATH", str(path))
+    monkeypatch.setenv("DB_POOL_SIZE", "2")
+    get_settings.cache_clear()
+    yield path
+    asyncio.run(database.close_db_pool())
+    get_settings.cache_clear()
+
+
+def _note_count(path) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+
+def test_pooled_db_rolls_back_and_reuses_connection_on_clean_exit(pool_db) -> None:
+    async def _scenario():
+        async with database.pooled_db() as conn:
+            await conn.execute("INSERT INTO notes (body) VALUES ('uncommitted')")
+        assert database._IDLE == [conn]
+        async with database.pooled_db() as reused:
+            assert reused is conn
+            assert not reused.in_transaction
+
+    asyncio.run(_scenario())
+    assert _note_count(pool_db) == 0
+
+
+def test_pooled_db_drops_connection_on_exception(pool_db) -> None:
+    async def _scenario():
+        with pytest.raises(RuntimeError):
+            async with database.pooled_db() as conn:
+                await conn.execute("INSERT INTO notes (body) VALUES ('half-done')")
+                raise RuntimeError("run failed")
+        assert database._IDLE == []
+        with pytest.raises(ValueError):
+            await conn.execute("SELECT 1")
+
+    asyncio.run(_scenario())
+    assert _note_count(pool_db) == 0
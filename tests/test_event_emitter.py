@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+
+import pytest
+
+import api.services.agent_runtime as agent_runtime
+from api.services.session_manager import session_manager
+
+
+class _FailingLogConn:
+    """Accepts status updates and commits but fails the first (or every) activity-log executemany."""
+
+    def __init__(self, *, always: bool = False) -> None:
+        self.commits = 0
+        self.failed = False
+        self.always = always
+        self.statuses: list[str] = []
+
+    async def execute(self, sql, params=()):
+        if "UPDATE agent_status" in sql:
+            self.statuses.append(params[0])
+        return None
+
+    async def executemany(self, sql, rows):  # noqa: ARG002
+        if self.always or not self.failed:
+            self.failed = True
+            raise sqlite3.OperationalError("disk I/O error")
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+def test_failed_background_write_is_raised_by_flush() -> None:
+    async def _scenario() -> None:
+        session = await session_manager.create("po_match")
+        emitter = agent_runtime.EventEmitter(_FailingLogConn(), session.session_id, "po_match")
+        await emitter.emit_reasoning("Checking invoices")
+        # Let the background flusher run (and fail) on its own
+        await asyncio.sleep(agent_runtime._ACTIVITY_FLUSH_WINDOW_SECONDS * 5)
+
+        with pytest.raises(sqlite3.OperationalError):
+            await emitter.flush()
+        # The rows were kept for a retry, and no writer task is left behind
+        assert len(emitter._pending_rows) == 1
+        assert emitter._flusher is None
+
+    asyncio.run(_scenario())
+
+
+def test_failed_activity_log_write_fails_the_run(monkeypatch) -> None:
+    conn = _FailingLogConn()
+
+    @asynccontextmanager
+    async def fake_pooled_db():
+        yield conn
+
+    async def fake_runner(conn, emitter):  # noqa: ARG001
+        await emitter.emit_reasoning("Reviewing invoices")
+        await asyncio.sleep(agent_runtime._ACTIVITY_FLUSH_WINDOW_SECONDS * 5)
+        return {"processed": []}
+
+    monkeypatch.setattr(agent_runtime, "llm_enabled", lambda: True)
+    monkeypatch.setattr(agent_runtime, "pooled_db", fake_pooled_db)
+    monkeypatch.setitem(agent_runtime.RUNNERS, "po_match", fake_runner)
+
+    async def _run() -> None:
+        session = await session_manager.create("po_match")
+        await agent_runtime.run_agent_session("po_match", session.session_id)
+
+    with pytest.raises(sqlite3.OperationalError):
+        asyncio.run(_run())
+
+
+def test_failed_log_write_on_error_path_still_closes_out_the_run(monkeypatch) -> None:
+    conn = _FailingLogConn(always=True)
+
+    @asynccontextmanager
+    async def fake_pooled_db():
+        yield conn
+
+    async def fake_runner(conn, emitter):  # noqa: ARG001
+        await emitter.emit_reasoning("Reviewing invoices")
+        raise ValueError("invoice feed unavailable")
+
+    monkeypatch.setattr(agent_runtime, "llm_enabled", lambda: True)
+    monkeypatch.setattr(agent_runtime, "pooled_db", fake_pooled_db)
+    monkeypatch.setitem(agent_runtime.RUNNERS, "po_match", fake_runner)
+
+    async def _run():
+        session = await session_manager.create("po_match")
+        with pytest.raises(ValueError, match="invoice feed unavailable") as raised:
+            await agent_runtime.run_agent_session("po_match", session.session_id)
+        return raised.value, await session_manager.get(session.session_id)
+
+    error, state = asyncio.run(_run())
+    # The run's own error is raised, with the log failure noted on it
+    assert any("Activity log write also failed" in note for note in error.__notes__)
+    # The agent still leaves "working" and the session is closed out
+    assert conn.statuses == ["working", "error"]
+    assert conn.commits == 2
+    assert state.done
+    assert state.latest_output == {"error": "invoice feed unavailable"}
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import api.services.agent_runtime as agent_runtime
+from api.services.config import get_settings
+
+_INBOX = {
+    "emails": [
+        {"from": "accounts@greenfield.com", "subject": "Invoice #7744 payment status"},
+        {"from": "ap@summitoffice.com", "subject": "Invoice #8812 copy request"},
+    ]
+}
+
+
+class _SilentEmitter:
+    """Accepts every emit_* call without touching the session manager or the DB."""
+
+    def __getattr__(self, name):
+        async def _noop(*args, **kwargs):  # noqa: ARG001
+            return None
+
+        return _noop
+
+
+@pytest.fixture
+def router(monkeypatch):
+    """Inquiry router wired to a canned inbox with the route cache enabled."""
+    monkeypatch.setenv("ROUTE_CACHE", "true")
+    get_settings.cache_clear()
+    agent_runtime.clear_route_cache()
+
+    async def fake_load_json(name):  # noqa: ARG001
+        return _INBOX
+
+    async def fake_insert_internal_tasks_many(conn, agent_id, rows):  # noqa: ARG001
+        return None
+
+    monkeypatch.setattr(agent_runtime, "load_json", fake_load_json)
+    monkeypatch.setattr(agent_runtime, "insert_internal_tasks_many", fake_insert_internal_tasks_many)
+    yield monkeypatch
+    agent_runtime.clear_route_cache()
+    get_settings.cache_clear()
+
+
+def _run() -> dict:
+    return asyncio.run(agent_runtime.run_inquiry_router(None, _SilentEmitter()))
+
+
+def test_route_cache_reuses_decisions_until_router_is_retrained(router) -> None:
+    skills = {"text": "Route invoice questions to Accounts Receivable."}
+    model_batches: list[list[str]] = []
+
+    async def fake_route_inquiries(payload, *, with_email_ids=False):
+        assert with_email_ids
+        model_batches.append([email["subject"] for email in payload["emails"]])
+        destination = "Billing" if "Billing" in skills["text"] else "Accounts Receivable"
+        return agent_runtime.LLMResult(
+            data={
+                "routes": [
+                    {
+                        "email_id": email["email_id"],
+                        "from": email["from"],
+                        "subject": email["subject"],
+                        "route": destination,
+                        "priority": "medium",
+                        "description": "Routed",
+                    }
+                    for email in payload["emails"]
+                ]
+            },
+            prompt_tokens=10,
+            completion_tokens=5,
+        )
+
+    router.setattr(agent_runtime, "_route_inquiries", fake_route_inquiries)
+    router.setattr(agent_runtime, "read_skills", lambda agent_id: skills["text"])
+
+    first = _run()
+    assert len(model_batches) == 1
+    assert {route["route"] for route in first["routes"]} == {"Accounts Receivable"}
+    assert all("email_id" not in route for route in first["routes"])
+
+    # Same inbox, same skills: every email is served from the cache
+    second = _run()
+    assert len(model_batches) == 1
+    assert second["routes"] == first["routes"]
+
+    # Retraining changes the skills, so the next run asks the model again
+    skills["text"] += "\n\n## Training Update\n- Route invoice questions to Billing."
+    third = _run()
+    assert len(model_batches) == 2
+    assert {route["route"] for route in third["routes"]} == {"Billing"}
+
+
+def test_route_cache_matches_reordered_and_rewritten_routes_to_their_emails(router) -> None:
+    calls = 0
+    destinations = {"Invoice #7744 payment status": "Accounts Receivable", "Invoice #8812 copy request": "Billing"}
+
+    async def fake_route_inquiries(payload, *, with_email_ids=False):  # noqa: ARG001
+        nonlocal calls
+        calls += 1
+        # Routes come back in reverse order with the sender and subject normalized
+        return agent_runtime.LLMResult(
+            data={
+                "routes": [
+                    {
+                        "email_id": email["email_id"],
+                        "from": email["from"].upper(),
+                        "subject": email["subject"].lower(),
+                        "route": destinations[email["subject"]],
+                        "priority": "medium",
+                        "description": "Routed",
+                    }
+                    for email in reversed(payload["emails"])
+                ]
+            },
+        )
+
+    router.setattr(agent_runtime, "_route_inquiries", fake_route_inquiries)
+    router.setattr(agent_runtime, "read_skills", lambda agent_id: "skills")
+
+    first = _run()
+    assert [route["route"] for route in first["routes"]] == ["Accounts Receivable", "Billing"]
+
+    # Cached under the inbox emails' own sender and subject, so the rerun is all hits
+    second = _run()
+    assert calls == 1
+    assert second["routes"] == first["routes"]
+
+
+def test_route_cache_is_off_by_default(monkeypatch) -> None:
+    get_settings.cache_clear()
+    agent_runtime.clear_route_cache()
+    calls: list[bool] = []
+
+    async def fake_load_json(name):  # noqa: ARG001
+        return _INBOX
+
+    async def fake_insert_internal_tasks_many(conn, agent_id, rows):  # noqa: ARG001
+        return None
+
+    async def fake_route_inquiries(payload, *, with_email_ids=False):
+        calls.append(with_email_ids)
+        assert all("email_id" not in email for email in payload["emails"])
+        return agent_runtime.LLMResult(
+            data={
+                "routes": [
+                    {**email, "route": "Billing", "priority": "low", "description": "Routed"}
+                    for email in payload["emails"]
+                ]
+            },
+        )
+
+    monkeypatch.setattr(agent_runtime, "load_json", fake_load_json)
+    monkeypatch.setattr(agent_runtime, "insert_internal_tasks_many", fake_insert_internal_tasks_many)
+    monkeypatch.setattr(agent_runtime, "_route_inquiries", fake_route_inquiries)
+
+    _run()
+    _run()
+    assert calls == [False, False]
+    assert not agent_runtime._ROUTE_CACHE
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+import api.services.agent_runtime as agent_runtime
+from api.services.config import get_settings
+from api.services.llm import LLMResponse
+
+
+def _response(payload: dict) -> LLMResponse:
+    return LLMResponse(text=json.dumps(payload), prompt_tokens=40, completion_tokens=8, total_tokens=48)
+
+
+@pytest.fixture
+def llm_settings(monkeypatch):
+    """Real-LLM mode with fake credentials; individual tests add their own flags."""
+    monkeypatch.setenv("USE_REAL_LLM", "true")
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    get_settings.cache_clear()
+    agent_runtime._LLM_RESPONSE_CACHE.clear()
+    yield monkeypatch
+    agent_runtime._LLM_RESPONSE_CACHE.clear()
+    get_settings.cache_clear()
+
+
+def test_llm_cache_hits_identical_requests_and_misses_on_changed_inputs(llm_settings) -> None:
+    llm_settings.setenv("LLM_CACHE", "true")
+    get_settings.cache_clear()
+    skills = {"text": "Flag material price variances."}
+    calls: list[dict] = []
+
+    async def fake_chat(messages, temperature=0.2, max_tokens=500, model=None):  # noqa: ARG001
+        calls.append(json.loads(messages[1]["content"]))
+        return _response({"training_rule_active": "project manager" in skills["text"]})
+
+    llm_settings.setattr(agent_runtime, "llm_chat_with_usage", fake_chat)
+    llm_settings.setattr(agent_runtime, "read_skills", lambda agent_id: skills["text"])
+
+    def _ask(context: dict) -> agent_runtime.LLMResult:
+        return asyncio.run(agent_runtime.llm_json_response(
+            agent_id="po_match",
+            objective="Return JSON with key training_rule_active (boolean).",
+            context_payload=context,
+            temperature=0.0,
+            validator=agent_runtime.validate_training_rule_flag,
+        ))
+
+    first = _ask({"invoice": "INV-9001"})
+    assert len(calls) == 1
+    assert (first.prompt_tokens, first.completion_tokens) == (40, 8)
+
+    # Identical request: served from the cache with no model call and no token usage
+    cached = _ask({"invoice": "INV-9001"})
+    assert len(calls) == 1
+    assert cached.data == first.data
+    assert cached.data is not first.data
+    assert (cached.prompt_tokens, cached.completion_tokens) == (0, 0)
+
+    # Different context: a new model call
+    _ask({"invoice": "INV-9002"})
+    assert len(calls) == 2
+
+    # Retrained skills change the key, so the same context is asked again
+    skills["text"] += "\n- Email the project manager when a variance exceeds $1,000."
+    retrained = _ask({"invoice": "INV-9001"})
+    assert len(calls) == 3
+    assert retrained.data == {"training_rule_active": True}
+
+
+def test_llm_cache_keys_factory_validators_on_their_arguments(llm_settings) -> None:
+    llm_settings.setenv("LLM_CACHE", "true")
+    get_settings.cache_clear()
+    calls = 0
+
+    async def fake_chat(messages, temperature=0.2, max_tokens=500, model=None):  # noqa: ARG001
+        nonlocal calls
+        calls += 1
+        return _response({"action": "select_po", "reason": "match", "args": {"po_number": "PO-1"}})
+
+    llm_settings.setattr(agent_runtime, "llm_chat_with_usage", fake_chat)
+    llm_settings.setattr(agent_runtime, "read_skills", lambda agent_id: "skills")
+
+    def _ask(validator) -> None:
+        asyncio.run(agent_runtime.llm_json_response(
+            agent_id="po_match", objective="Pick the next step.", context_payload={}, validator=validator,
+        ))
+
+    _ask(agent_runtime.make_po_step_validator(["select_po"], {"PO-1"}))
+    _ask(agent_runtime.make_po_step_validator(["select_po"], {"PO-1"}))
+    assert calls == 1
+    # Same prompt and qualname, different factory arguments: validated by its own call
+    _ask(agent_runtime.make_po_step_validator(["select_po"], {"PO-1", "PO-2"}))
+    assert calls == 2
+
+    # Closures without cache_params are never cached
+    allowed = {"select_po"}
+
+    def closure_validator(payload):
+        return [] if payload.get("action") in allowed else ["action invalid"]
+
+    _ask(closure_validator)
+    _ask(closure_validator)
+    assert calls == 4
+
+
+def test_llm_cache_is_off_by_default(llm_settings) -> None:
+    calls = 0
+
+    async def fake_chat(messages, temperature=0.2, max_tokens=500, model=None):  # noqa: ARG001
+        nonlocal calls
+        calls += 1
+        return _response({"ok": True})
+
+    llm_settings.setattr(agent_runtime, "llm_chat_with_usage", fake_chat)
+    llm_settings.setattr(agent_runtime, "read_skills", lambda agent_id: "skills")
+
+    for _ in range(2):
+        asyncio.run(agent_runtime.llm_json_response(
+            agent_id="po_match", objective="Return JSON with key ok.", context_payload={},
+        ))
+    assert calls == 2
+    assert not agent_runtime._LLM_RESPONSE_CACHE
+
+
+def test_speculative_attempts_cancel_the_loser_without_leaking_tasks(llm_settings) -> None:
+    llm_settings.setenv("SPECULATIVE_LLM", "true")
+    get_settings.cache_clear()
+    slow_attempt = {"started": False, "cancelled": False}
+
+    async def fake_chat(messages, temperature=0.2, max_tokens=500, model=None):  # noqa: ARG001
+        if temperature > 0:
+            # Attempt 1 (requested temperature) hangs; attempt 2 (temperature 0) answers
+            slow_attempt["started"] = True
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                slow_attempt["cancelled"] = True
+                raise
+        return _response({"route": "Billing"})
+
+    llm_settings.setattr(agent_runtime, "llm_chat_with_usage", fake_chat)
+    llm_settings.setattr(agent_runtime, "read_skills", lambda agent_id: "skills")
+
+    async def _scenario():
+        result = await asyncio.wait_for(
+            agent_runtime.llm_json_response(
+                agent_id="inquiry_router",
+                objective="Return JSON with key route.",
+                context_payload={},
+                temperature=0.7,
+            ),
+            timeout=5,
+        )
+        leftover = asyncio.all_tasks() - {asyncio.current_task()}
+        return result, leftover
+
+    result, leftover = asyncio.run(_scenario())
+    assert result.data == {"route": "Billing"}
+    # Only the finished attempt is billed
+    assert (result.prompt_tokens, result.completion_tokens) == (40, 8)
+    assert slow_attempt == {"started": True, "cancelled": True}
+    assert leftover == set()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import api.services.agent_runtime as agent_runtime
+
+
+def _preview_sentences(response: str, chunk: int) -> list[str]:
+    async def _scenario() -> list[str]:
+        preview = agent_runtime._NarrativePreview()
+        for start in range(0, len(response), chunk):
+            await preview.feed(response[start:start + chunk])
+        sentences = []
+        while not preview.sentences.empty():
+            sentences.append(preview.sentences.get_nowait())
+        return sentences
+
+    return asyncio.run(_scenario())
+
+
+def test_narrative_preview_decodes_escapes_and_stops_at_the_closing_quote() -> None:
+    narrative = 'Grading \u2014 cut\tand fill. Drains end at C:\\ then "stop". Second paragraph.\nFinal line.'
+    response = json.dumps({"scope_narrative": narrative, "assumptions": ["Dry soil. Open access."]})
+
+    for chunk in (1, 4, 9):
+        assert _preview_sentences(response, chunk) == [
+            "Grading \u2014 cut and fill.",
+            'Drains end at C:\\ then "stop".',
+            "Second paragraph.",
+            "Final line.",
+        ]